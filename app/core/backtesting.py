@@ -0,0 +1,192 @@
+"""
+⏪ BACKTESTING WALK-FORWARD DE PREDICCIONES DE RESONANCIA
+Reproduce el historial como entrenar-luego-predecir con re-entrenamiento periódico,
+tramos independientes en paralelo y métricas por horizonte y fase del ciclo solar
+"""
+import numpy as np
+from datetime import datetime
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional
+from joblib import Parallel, delayed
+from sklearn.preprocessing import StandardScaler
+
+from app.core.prediction_engine import AdvancedHelioBioPredictor, PREDICTION_HORIZONS, build_model
+from app.core.solar_cycle import SolarCyclePhaseDetector, month_index
+from app.core.time_series import load_metric_series
+
+logger = logging.getLogger(__name__)
+
+CYCLE_PHASES = ['minimum', 'ascending', 'maximum', 'descending']
+
+def cycle_phase_labels(sunspots: np.ndarray, timestamps: np.ndarray,
+                       detector: Optional[SolarCyclePhaseDetector] = None) -> np.ndarray:
+    """
+    Fase del ciclo por fila sin mirar al futuro: la que SolarCyclePhaseDetector
+    (suavizado causal de 13 meses, umbrales sobre el rango de referencia) reporta
+    con los datos hasta esa fila. None mientras no hay meses suavizados suficientes
+    """
+    sunspots = np.asarray(sunspots, dtype=float)
+    timestamps = np.asarray(timestamps, dtype=float)
+    labels = np.full(len(sunspots), None, dtype=object)
+    if len(sunspots) == 0:
+        return labels
+
+    detector = detector or SolarCyclePhaseDetector()
+    # La fase solo cambia al cerrar un mes: basta evaluarla una vez por mes de calendario
+    months = month_index(timestamps)
+    bounds = np.flatnonzero(np.diff(months)) + 1
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(months)]):
+        finite = np.isfinite(sunspots[start:stop])
+        detector.ingest(timestamps[start:stop][finite], sunspots[start:stop][finite])
+        labels[start:stop] = detector.phase
+    return labels
+
+def _run_slice(family: str, params: Dict, paths: Dict[str, str], train_start: int,
+               train_stop: int, test_stop: int, steps: List[int]) -> Dict:
+    """Entrenar con filas cuyo objetivo ya es conocido en train_stop y predecir el tramo siguiente"""
+    X = np.load(paths['X'], mmap_mode='r')
+    Y = np.load(paths['Y'], mmap_mode='r')
+
+    # Sin fuga: la fila i solo entrena si i + paso máximo < train_stop
+    fit_stop = train_stop - max(steps)
+    X_train, Y_train = X[train_start:fit_stop], Y[train_start:fit_stop, :len(steps)]
+    X_test, Y_test = X[train_stop:test_stop], Y[train_stop:test_stop, :len(steps)]
+
+    scaler = StandardScaler().fit(X_train)
+    model = build_model(family, params)
+    if family == 'random_forest_advanced':
+        # El paralelismo ya está a nivel de tramo
+        model.set_params(n_jobs=1)
+    model.fit(scaler.transform(X_train), Y_train)
+    Y_pred = np.asarray(model.predict(scaler.transform(X_test))).reshape(len(X_test), len(steps))
+
+    return {'rows': np.arange(train_stop, test_stop), 'Y_true': np.asarray(Y_test), 'Y_pred': Y_pred}
+
+def _regression_summary(y_true: np.ndarray, y_pred: np.ndarray, current: np.ndarray) -> Dict:
+    """MAE, R² y tasa de acierto direccional (sube/baja respecto al valor actual)"""
+    if len(y_true) == 0:
+        return {'samples': 0}
+    residual_ss = float(np.sum((y_true - y_pred) ** 2))
+    total_ss = float(np.sum((y_true - y_true.mean()) ** 2))
+    return {
+        'samples': int(len(y_true)),
+        'mae': float(np.mean(np.abs(y_true - y_pred))),
+        'r2': 1 - residual_ss / total_ss if total_ss > 0 else 0.0,
+        'hit_rate': float(np.mean(np.sign(y_pred - current) == np.sign(y_true - current)))
+    }
+
+class BacktestEngine:
+    """Backtest walk-forward del predictor sobre el historial almacenado"""
+
+    def __init__(self, predictor: AdvancedHelioBioPredictor, retrain_every_hours: float = 24 * 7,
+                 train_window_hours: Optional[float] = None, min_train_rows: int = 50,
+                 family: str = 'random_forest_advanced', n_jobs: int = -1):
+        self.predictor = predictor
+        self.retrain_every_hours = retrain_every_hours
+        self.train_window_hours = train_window_hours  # None: ventana expansiva
+        self.min_train_rows = min_train_rows
+        self.family = family
+        self.n_jobs = n_jobs
+        self.report_file = os.path.join(predictor.model_path, "advanced_backtest.json")
+
+    def _plan_slices(self, n_rows: int, tick_seconds: float, max_step: int) -> List[tuple]:
+        """(inicio de entrenamiento, fin de entrenamiento, fin de test) por cada re-entrenamiento"""
+        cadence = max(1, int(round(self.retrain_every_hours * 3600 / tick_seconds)))
+        window = (int(round(self.train_window_hours * 3600 / tick_seconds))
+                  if self.train_window_hours else None)
+        slices = []
+        for train_stop in range(self.min_train_rows + max_step, n_rows, cadence):
+            train_start = max(0, train_stop - window) if window else 0
+            slices.append((train_start, train_stop, min(train_stop + cadence, n_rows)))
+        return slices
+
+    def _raw_sunspots(self, historical_data: List[Dict], timestamps: np.ndarray) -> np.ndarray:
+        """Número de manchas del tick de cada fila (sin la media de ventana de las features)"""
+        series_timestamps, columns, _ = load_metric_series(
+            historical_data, ['sunspot_number'], self.predictor.feature_store
+        )
+        if len(series_timestamps) == 0:
+            return np.full(len(timestamps), np.nan)
+        index = np.searchsorted(series_timestamps, timestamps, side='right') - 1
+        return columns['sunspot_number'][np.clip(index, 0, len(series_timestamps) - 1)]
+
+    def run(self, historical_data: List[Dict]) -> Dict:
+        """Ejecutar el backtest completo y persistir el informe"""
+        logger.info("⏪ Iniciando backtest walk-forward...")
+
+        try:
+            X_all, resonance, _, timestamps = self.predictor._training_matrix(historical_data)
+            tick_seconds = self.predictor._estimate_tick_seconds(timestamps)
+
+            # Horizontes con al menos un tramo posible
+            horizons, steps = [], []
+            for horizon in PREDICTION_HORIZONS:
+                step = max(1, int(round(horizon * 3600 / tick_seconds)))
+                if len(X_all) - step > self.min_train_rows + step:
+                    horizons.append(horizon)
+                    steps.append(step)
+            if not horizons:
+                return {"error": "Historial insuficiente para backtesting"}
+
+            Y = self.predictor._build_horizon_targets(resonance, steps)
+            # Filas con todos los objetivos conocidos (las últimas max_step no son evaluables)
+            n_rows = len(X_all) - max(steps)
+            slices = self._plan_slices(n_rows, tick_seconds, max(steps))
+            if not slices:
+                return {"error": "Historial insuficiente para backtesting"}
+
+            params = self.predictor._load_tuned_params().get(self.family)
+            with tempfile.TemporaryDirectory(prefix="heliobio_backtest_") as workdir:
+                paths = {'X': os.path.join(workdir, "X.npy"), 'Y': os.path.join(workdir, "Y.npy")}
+                np.save(paths['X'], np.ascontiguousarray(X_all, dtype=np.float64))
+                np.save(paths['Y'], np.ascontiguousarray(Y))
+                results = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_run_slice)(self.family, params, paths, *bounds, steps)
+                    for bounds in slices
+                )
+
+            rows = np.concatenate([r['rows'] for r in results])
+            Y_true = np.vstack([r['Y_true'] for r in results])
+            Y_pred = np.clip(np.vstack([r['Y_pred'] for r in results]), 0.0, 1.0)
+            current = resonance[rows]
+            phases = cycle_phase_labels(self._raw_sunspots(historical_data, timestamps), timestamps)[rows]
+
+            by_horizon, by_phase = {}, {}
+            for j, horizon in enumerate(horizons):
+                key = f"{horizon}_hour"
+                by_horizon[key] = _regression_summary(Y_true[:, j], Y_pred[:, j], current)
+                for phase in CYCLE_PHASES:
+                    mask = phases == phase
+                    if mask.any():
+                        by_phase.setdefault(phase, {})[key] = _regression_summary(
+                            Y_true[mask, j], Y_pred[mask, j], current[mask]
+                        )
+
+            report = {
+                'family': self.family,
+                'retrain_every_hours': self.retrain_every_hours,
+                'train_window_hours': self.train_window_hours,
+                'n_slices': len(slices),
+                'samples': int(len(rows)),
+                'period': {
+                    'start': datetime.utcfromtimestamp(timestamps[rows[0]]).isoformat(),
+                    'end': datetime.utcfromtimestamp(timestamps[rows[-1]]).isoformat()
+                },
+                'horizons': horizons,
+                'by_horizon': by_horizon,
+                'by_cycle_phase': by_phase,
+                'run_at': datetime.utcnow().isoformat()
+            }
+
+            with open(self.report_file, 'w') as f:
+                json.dump(report, f, indent=2, default=float)
+
+            logger.info(f"✅ Backtest completado - Tramos: {len(slices)}, Muestras: {len(rows)}")
+            return report
+
+        except Exception as e:
+            logger.error(f"❌ Error en backtesting: {e}")
+            return {"error": str(e)}
@@ -6,11 +6,28 @@ import asyncio
 import logging
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Union
 from dataclasses import dataclass
 
+from app.core.lag_correlation import LagCorrelationEngine
+from app.core.superposed_epoch import SuperposedEpochAnalyzer
+from app.core.solar_cycle import SolarCyclePhaseDetector
+
 logger = logging.getLogger(__name__)
 
+# Columnas de la matriz social del modo multi-stream (una fila por página, región o tema)
+BATCH_SOCIAL_COLUMNS = ('engagement_intensity', 'sentiment_polarity', 'conflict_metric')
+
+# Niveles de interpretación (umbral de resonancia global), de mayor a menor
+RESONANCE_LEVELS = ("ALTA", "MODERADA", "BAJA", "MÍNIMA")
+
+CYCLE_MULTIPLIERS = {
+    "ascending": 1.2,
+    "maximum": 1.8,
+    "descending": 1.1,
+    "minimum": 0.7
+}
+
 @dataclass
 class CosmicResonance:
     """Estructura para resonancias cósmicas detectadas"""
@@ -27,20 +44,45 @@ class ChizhevskyEngine:
     para correlacionar actividad solar con comportamiento social digital
     """
     
-    def __init__(self, solar_monitor, social_analyzer):
+    def __init__(self, solar_monitor, social_analyzer, cycle_detector: Optional[SolarCyclePhaseDetector] = None):
         self.solar_monitor = solar_monitor
         self.social_analyzer = social_analyzer
         self.status = "initializing"
         self.resonances: List[CosmicResonance] = []
         self.crispation_alerts: List[Dict] = []
         
-        # Parámetros del modelo basados en investigación histórica
+        # Desfases solar → social medidos sobre el historial (FFT)
+        self.lag_engine = LagCorrelationEngine()
+        self.lag_scan: Dict[str, Any] = {}
+        self.lagged_resonances: List[CosmicResonance] = []
+        
+        # Respuesta social media alrededor de eventos solares (épocas superpuestas)
+        self.epoch_analyzer = SuperposedEpochAnalyzer()
+        
+        # Fase del ciclo desde el SSN suavizado de 13 meses; "ascending" hasta tener historial
+        self.cycle_detector = cycle_detector or SolarCyclePhaseDetector()
         self.solar_cycle_phase = "ascending"  # ascending, maximum, descending, minimum
+        
+        # Parámetros del modelo basados en investigación histórica
         self.geomagnetic_sensitivity = 0.7
         self.collective_excitability_threshold = 0.65
         
         logger.info("🚀 Motor Chizhevsky inicializado - Conectando dimensiones solares y sociales")
     
+    @property
+    def solar_cycle_phase(self) -> str:
+        """Fase detectada; la asignada manualmente solo se usa mientras el detector no está listo"""
+        return self.cycle_detector.phase or self._fallback_cycle_phase
+    
+    @solar_cycle_phase.setter
+    def solar_cycle_phase(self, phase: str):
+        self._fallback_cycle_phase = phase
+    
+    def update_solar_cycle(self, timestamp: float, sunspot_number: float) -> str:
+        """Alimentar el detector con una observación de manchas solares"""
+        self.cycle_detector.update(timestamp, sunspot_number)
+        return self.solar_cycle_phase
+    
     async def calculate_realtime_correlation(self) -> Dict[str, Any]:
         """Calcular correlación en tiempo real entre dimensiones"""
         try:
@@ -68,12 +110,14 @@ class ChizhevskyEngine:
             
             # Guardar resonancia significativa
             if resonance_metrics["overall_resonance"] > 0.6:
+                # Desfase y confianza del par más significativo del último barrido
+                strongest = self.lagged_resonances[0] if self.lagged_resonances else None
                 resonance = CosmicResonance(
                     solar_metric="composite",
                     social_metric="composite", 
                     correlation_strength=resonance_metrics["overall_resonance"],
-                    time_lag=timedelta(hours=0),
-                    confidence=0.85,
+                    time_lag=strongest.time_lag if strongest else timedelta(hours=0),
+                    confidence=strongest.confidence if strongest else 0.0,
                     interpretation=interpretation
                 )
                 self.resonances.append(resonance)
@@ -100,10 +144,7 @@ class ChizhevskyEngine:
         
         # Cálculo de resonancias específicas
         resonances = {
-            "solar_social_engagement": self._pearson_similarity(
-                [solar_intensity, solar_volatility], 
-                [engagement_level, sentiment_polarity]
-            ),
+            "solar_social_engagement": self._lagged_correlation('sunspot_number', 'engagement_intensity'),
             "geomagnetic_conflict": geomagnetic_activity * conflict_index,
             "solar_sentiment_volatility": solar_volatility * sentiment_polarity,
             "overall_resonance": (solar_intensity + solar_volatility) * (engagement_level + conflict_index) / 2
@@ -150,26 +191,163 @@ class ChizhevskyEngine:
         base_excitability = resonance_metrics.get("overall_resonance", 0)
         
         # Modificar por fase del ciclo solar
-        cycle_multipliers = {
-            "ascending": 1.2,
-            "maximum": 1.8, 
-            "descending": 1.1,
-            "minimum": 0.7
-        }
-        
-        multiplier = cycle_multipliers.get(self.solar_cycle_phase, 1.0)
+        multiplier = CYCLE_MULTIPLIERS.get(self.solar_cycle_phase, 1.0)
         return min(1.0, base_excitability * multiplier)
     
-    def _pearson_similarity(self, list1: List[float], list2: List[float]) -> float:
-        """Calcular similitud de Pearson entre dos listas"""
-        if len(list1) != len(list2) or len(list1) == 0:
-            return 0.0
+    # ---------- Modo multi-stream ----------
+    
+    def compute_batch_resonance(self, solar_data: Dict,
+                                social_matrix: Union[np.ndarray, Dict[str, Sequence[float]]]) -> Dict[str, Any]:
+        """
+        Métricas, nivel de interpretación, crispación y excitabilidad de N streams sociales
+        frente al mismo estado solar en una sola pasada vectorizada.
+        
+        social_matrix: array (N, 3) con las columnas de BATCH_SOCIAL_COLUMNS o dict de columnas
+        """
+        if isinstance(social_matrix, dict):
+            engagement, sentiment, conflict = (
+                np.asarray(social_matrix.get(column, 0.0), dtype=np.float64) for column in BATCH_SOCIAL_COLUMNS
+            )
+            engagement, sentiment, conflict = np.broadcast_arrays(engagement, sentiment, conflict)
+        else:
+            matrix = np.asarray(social_matrix, dtype=np.float64)
+            if matrix.ndim != 2 or matrix.shape[1] != len(BATCH_SOCIAL_COLUMNS):
+                raise ValueError(f"La matriz social debe ser (N, {len(BATCH_SOCIAL_COLUMNS)}): {BATCH_SOCIAL_COLUMNS}")
+            engagement, sentiment, conflict = matrix.T
+        
+        # Escalares solares (mismas normalizaciones que _compute_resonance_metrics)
+        solar_intensity = solar_data.get('sunspot_number', 0) / 300.0
+        solar_volatility = solar_data.get('flare_activity', 0) / 10.0
+        geomagnetic_activity = solar_data.get('geomagnetic_storm', 0) / 9.0
+        
+        geomagnetic_conflict = geomagnetic_activity * conflict
+        overall = (solar_intensity + solar_volatility) * (engagement / 100.0 + conflict) / 2
         
+        # Umbrales de _chizhevsky_interpretation: el nivel es el índice en RESONANCE_LEVELS
+        level = np.select(
+            [(overall > 0.8) & (geomagnetic_conflict > 0.7), overall > 0.6, overall > 0.4],
+            [0, 1, 2], default=3
+        )
+        crispation = (geomagnetic_conflict > self.collective_excitability_threshold) & (overall > 0.7)
+        excitability = np.minimum(1.0, overall * CYCLE_MULTIPLIERS.get(self.solar_cycle_phase, 1.0))
+        
+        return {
+            "resonance_metrics": {
+                "geomagnetic_conflict": geomagnetic_conflict,
+                "solar_sentiment_volatility": solar_volatility * np.abs(sentiment),
+                "overall_resonance": overall
+            },
+            # Depende solo del historial agregado: común a todos los streams
+            "solar_social_engagement": self._lagged_correlation('sunspot_number', 'engagement_intensity'),
+            "resonance_level": level,
+            "crispation_alert": crispation,
+            "collective_excitability": excitability
+        }
+    
+    async def calculate_batch_correlation(self, social_matrix: Union[np.ndarray, Dict[str, Sequence[float]]],
+                                          stream_ids: Optional[Sequence[str]] = None,
+                                          top_k: int = 10) -> Dict[str, Any]:
+        """Versión multi-stream de calculate_realtime_correlation (resultado por columnas)"""
         try:
-            correlation = np.corrcoef(list1, list2)[0, 1]
-            return float(correlation) if not np.isnan(correlation) else 0.0
-        except:
-            return 0.0
+            solar_data = await self.solar_monitor.get_current_activity()
+            batch = self.compute_batch_resonance(solar_data, social_matrix)
+            
+            n_streams = len(batch["collective_excitability"])
+            if stream_ids is None:
+                stream_ids = [str(i) for i in range(n_streams)]
+            elif len(stream_ids) != n_streams:
+                raise ValueError("stream_ids no coincide con el número de streams")
+            
+            level_counts = np.bincount(batch["resonance_level"], minlength=len(RESONANCE_LEVELS))
+            alerted = np.flatnonzero(batch["crispation_alert"])
+            # Solo los top_k streams más excitados: ordenación parcial O(N)
+            k = min(top_k, n_streams)
+            top = np.argpartition(-batch["collective_excitability"], k - 1)[:k] if k else np.empty(0, dtype=int)
+            top = top[np.argsort(-batch["collective_excitability"][top])]
+            
+            if len(alerted):
+                worst = alerted[np.argsort(-batch["resonance_metrics"]["geomagnetic_conflict"][alerted])][:top_k]
+                self.crispation_alerts.append({
+                    "level": "HIGH",
+                    "message": f"Condiciones de crispación social en {len(alerted)} de {n_streams} streams",
+                    "confidence": 0.85,
+                    "streams": [stream_ids[i] for i in worst],
+                    "recommendation": "Monitorear tendencias de conflicto en los streams señalados"
+                })
+            
+            self._last_excitability = float(batch["collective_excitability"].mean()) if n_streams else 0.0
+            self.status = "active"
+            return {
+                "timestamp": datetime.utcnow().isoformat(),
+                "n_streams": n_streams,
+                "stream_ids": list(stream_ids),
+                "solar_cycle_phase": self.solar_cycle_phase,
+                "solar_social_engagement": batch["solar_social_engagement"],
+                "resonance_metrics": {
+                    metric: np.round(values, 6).tolist() for metric, values in batch["resonance_metrics"].items()
+                },
+                "resonance_level": [RESONANCE_LEVELS[i] for i in batch["resonance_level"]],
+                "crispation_alert": batch["crispation_alert"].tolist(),
+                "collective_excitability": np.round(batch["collective_excitability"], 6).tolist(),
+                "summary": {
+                    "levels": dict(zip(RESONANCE_LEVELS, level_counts.tolist())),
+                    "crispation_streams": int(len(alerted)),
+                    "mean_excitability": round(self._last_excitability, 4),
+                    "top_streams": [
+                        {"stream_id": stream_ids[i],
+                         "collective_excitability": round(float(batch["collective_excitability"][i]), 4)}
+                        for i in top
+                    ]
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Error en correlación multi-stream: {e}")
+            self.status = "error"
+            return {"error": str(e)}
+    
+    def update_lagged_resonances(self, historical_data: List[Dict], feature_store=None) -> List[CosmicResonance]:
+        """Barrer desfases de ±30 días entre todas las métricas solares y sociales"""
+        scan = self.lag_engine.run(historical_data, feature_store)
+        if 'error' in scan:
+            return self.lagged_resonances
+        
+        self.lag_scan = scan
+        self.lagged_resonances = [
+            CosmicResonance(
+                solar_metric=pair['solar_metric'],
+                social_metric=pair['social_metric'],
+                correlation_strength=pair['correlation'],
+                time_lag=timedelta(hours=pair['lag_hours']),
+                confidence=pair['confidence'],
+                interpretation=self._lag_interpretation(pair)
+            )
+            for pair in scan['pairs']
+        ]
+        return self.lagged_resonances
+    
+    def superposed_epoch_analysis(self, historical_data: List[Dict], preset: Optional[str] = "kp7_storms",
+                                  events: Optional[List] = None, feature_store=None) -> Dict[str, Any]:
+        """Curvas medias de las métricas sociales alineadas con fulguraciones X, tormentas Kp≥7 o eventos dados"""
+        return self.epoch_analyzer.run(historical_data, feature_store, preset=preset, events=events)
+    
+    def _lag_interpretation(self, pair: Dict) -> str:
+        """Describir el sentido del desfase de un par"""
+        lag_hours = pair['lag_hours']
+        if lag_hours > 0:
+            timing = f"{pair['social_metric']} sigue a {pair['solar_metric']} con {lag_hours:.1f}h de retraso"
+        elif lag_hours < 0:
+            timing = f"{pair['social_metric']} precede a {pair['solar_metric']} en {-lag_hours:.1f}h"
+        else:
+            timing = f"{pair['social_metric']} y {pair['solar_metric']} varían simultáneamente"
+        return f"{timing} (r={pair['correlation']:+.2f})"
+    
+    def _lagged_correlation(self, solar_metric: str, social_metric: str) -> float:
+        """Correlación en el desfase de máxima dependencia (0 sin barrido previo)"""
+        for resonance in self.lagged_resonances:
+            if resonance.solar_metric == solar_metric and resonance.social_metric == social_metric:
+                return resonance.correlation_strength
+        return 0.0
     
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado del motor Chizhevsky"""
@@ -177,6 +355,8 @@ class ChizhevskyEngine:
             "status": self.status,
             "resonances_detected": len(self.resonances),
             "active_alerts": len(self.crispation_alerts),
+            "lagged_pairs": len(self.lagged_resonances),
             "solar_cycle_phase": self.solar_cycle_phase,
+            "solar_cycle": self.cycle_detector.get_phase(),
             "collective_excitability": getattr(self, '_last_excitability', 0)
         }
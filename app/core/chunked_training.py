@@ -0,0 +1,200 @@
+"""
+📦 ENTRENAMIENTO OUT-OF-CORE POR CHUNKS
+Entrena sobre historiales largos leyendo el feature store por bloques:
+memoria pico acotada por chunk_rows, sea cual sea la longitud del historial
+"""
+import numpy as np
+from datetime import datetime
+import logging
+from typing import Dict, Iterator, List, Tuple
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.preprocessing import StandardScaler
+
+from app.core.prediction_engine import PREDICTION_HORIZONS
+from app.core.tree_compiler import compile_models
+
+logger = logging.getLogger(__name__)
+
+class _StreamingRegressionMetrics:
+    """Acumuladores para MAE y R² sin guardar predicciones"""
+
+    def __init__(self, n_outputs: int = 1):
+        self.n = 0
+        self.abs_error = np.zeros(n_outputs)
+        self.squared_error = np.zeros(n_outputs)
+        self.sum_y = np.zeros(n_outputs)
+        self.sum_y2 = np.zeros(n_outputs)
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        y_true = y_true.reshape(len(y_true), -1)
+        y_pred = y_pred.reshape(len(y_pred), -1)
+        self.n += len(y_true)
+        self.abs_error += np.abs(y_true - y_pred).sum(axis=0)
+        self.squared_error += ((y_true - y_pred) ** 2).sum(axis=0)
+        self.sum_y += y_true.sum(axis=0)
+        self.sum_y2 += (y_true ** 2).sum(axis=0)
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.n == 0:
+            return np.full_like(self.sum_y, np.nan), np.full_like(self.sum_y, np.nan)
+        total = self.sum_y2 - self.sum_y ** 2 / self.n
+        r2 = np.where(total > 0, 1 - self.squared_error / np.where(total > 0, total, 1), 0.0)
+        return self.abs_error / self.n, r2
+
+class ChunkedTrainer:
+    """Modo de entrenamiento por chunks sobre el feature store del predictor"""
+
+    def __init__(self, predictor, chunk_rows: int = 50_000, holdout_fraction: float = 0.1,
+                 epochs: int = 2, hist_sample_rows: int = 200_000):
+        self.predictor = predictor
+        self.chunk_rows = chunk_rows
+        self.holdout_fraction = holdout_fraction
+        self.epochs = epochs
+        self.hist_sample_rows = hist_sample_rows
+
+    def _iter_chunks(self, start: int, stop: int, lookahead: int = 1) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """Bloques (inicio, X, resonancia[inicio:fin+lookahead]) leídos del memmap"""
+        store = self.predictor.feature_store
+        feature_names = store.meta.get('feature_names', [])
+        resonance = store.column('resonance')
+        for chunk_start in range(start, stop, self.chunk_rows):
+            chunk_stop = min(chunk_start + self.chunk_rows, stop)
+            X = np.column_stack([store.column(name)[chunk_start:chunk_stop] for name in feature_names])
+            yield chunk_start, X, np.asarray(resonance[chunk_start:chunk_stop + lookahead])
+
+    def _horizon_steps(self, n_rows: int) -> Tuple[List[int], List[int]]:
+        timestamps = self.predictor.feature_store.column('timestamp')
+        sample = np.asarray(timestamps[:min(n_rows, 10_000)])
+        tick_seconds = self.predictor._estimate_tick_seconds(sample)
+        horizons, steps = [], []
+        for horizon in PREDICTION_HORIZONS:
+            step = max(1, int(round(horizon * 3600 / tick_seconds)))
+            if n_rows - step >= 15:
+                horizons.append(horizon)
+                steps.append(step)
+        return horizons, steps
+
+    def train(self) -> Dict:
+        """Entrenar en modo chunked e instalar los modelos en el predictor"""
+        with self.predictor._training_lock:
+            return self._train()
+
+    def _train(self) -> Dict:
+        store = self.predictor.feature_store
+        if store is None or store.n_rows < 50:
+            return {"error": "Feature store insuficiente para entrenamiento por chunks"}
+
+        logger.info(f"📦 Entrenamiento por chunks sobre {store.n_rows} filas...")
+        try:
+            n_rows = store.n_rows - 1  # la última fila no tiene objetivo a 1 paso
+            split = int(n_rows * (1 - self.holdout_fraction))
+            horizons, steps = self._horizon_steps(n_rows)
+            max_step = max(steps) if steps else 1
+
+            # Pasada 1: escalador en streaming + muestra estratificada en el tiempo para HGB
+            scaler = StandardScaler()
+            stride = max(1, int(np.ceil(split / self.hist_sample_rows)))
+            sample_X, sample_y = [], []
+            for chunk_start, X, resonance in self._iter_chunks(0, split):
+                scaler.partial_fit(X)
+                offset = (-chunk_start) % stride
+                sample_X.append(X[offset::stride])
+                sample_y.append(resonance[1:len(X) + 1][offset::stride])
+
+            # Pasadas 2..: descenso estocástico incremental (1 paso y multi-horizonte)
+            sgd = SGDRegressor(loss='huber', alpha=1e-4, learning_rate='invscaling', eta0=0.01, random_state=42)
+            horizon_sgd = MultiOutputRegressor(
+                SGDRegressor(loss='huber', alpha=1e-4, learning_rate='invscaling', eta0=0.01, random_state=42)
+            ) if horizons else None
+            for _ in range(self.epochs):
+                for chunk_start, X, resonance in self._iter_chunks(0, split, lookahead=max_step):
+                    X_scaled = scaler.transform(X)
+                    sgd.partial_fit(X_scaled, resonance[1:len(X) + 1])
+                    if horizon_sgd is not None:
+                        valid = np.arange(len(X)) + max_step < len(resonance)
+                        if valid.any():
+                            Y = np.column_stack([resonance[np.flatnonzero(valid) + step] for step in steps])
+                            horizon_sgd.partial_fit(X_scaled[valid], Y)
+
+            # Ajuste por histogramas sobre la muestra acotada
+            hist_gb = HistGradientBoostingRegressor(max_iter=200, learning_rate=0.1, random_state=42)
+            hist_gb.fit(scaler.transform(np.vstack(sample_X)), np.concatenate(sample_y))
+            del sample_X, sample_y
+
+            # Evaluación en streaming sobre el holdout temporal
+            models = {'sgd_chunked': sgd, 'hist_gradient_boosting': hist_gb}
+            evaluators = {name: _StreamingRegressionMetrics() for name in models}
+            horizon_eval = _StreamingRegressionMetrics(len(horizons))
+            for chunk_start, X, resonance in self._iter_chunks(split, n_rows, lookahead=max_step):
+                X_scaled = scaler.transform(X)
+                y = resonance[1:len(X) + 1]
+                for name, model in models.items():
+                    evaluators[name].update(y, model.predict(X_scaled))
+                if horizon_sgd is not None:
+                    valid = np.arange(len(X)) + max_step < len(resonance)
+                    if valid.any():
+                        Y = np.column_stack([resonance[np.flatnonzero(valid) + step] for step in steps])
+                        horizon_eval.update(Y, horizon_sgd.predict(X_scaled[valid]))
+
+            metrics = {}
+            best_r2, best_model = -np.inf, None
+            for name, evaluator in evaluators.items():
+                mae, r2 = evaluator.result()
+                metrics[f'{name}_r2'] = float(r2[0])
+                metrics[f'{name}_mae'] = float(mae[0])
+                if r2[0] > best_r2:
+                    best_r2, best_model = float(r2[0]), name
+            metrics.update({
+                'best_r2': best_r2,
+                'best_model': best_model,
+                'test_samples': n_rows - split,
+                'train_samples': split,
+                'training_mode': 'chunked',
+                'chunk_rows': self.chunk_rows
+            })
+
+            horizon_metrics = {'horizons': horizons, 'steps': steps}
+            if horizon_sgd is not None:
+                mae, r2 = horizon_eval.result()
+                horizon_metrics['sgd_chunked_r2'] = r2.tolist()
+                horizon_metrics['sgd_chunked_mae'] = mae.tolist()
+            metrics['horizon_metrics'] = horizon_metrics
+
+            self._install(scaler, models, horizon_sgd, horizons, horizon_metrics, metrics, (split, n_rows))
+            logger.info(f"✅ Entrenamiento por chunks completado - Mejor R²: {best_r2:.3f}")
+            return metrics
+
+        except Exception as e:
+            logger.error(f"❌ Error en entrenamiento por chunks: {e}")
+            return {"error": str(e)}
+
+    def _install(self, scaler, models: Dict, horizon_model, horizons: List[int],
+                 horizon_metrics: Dict, metrics: Dict, holdout_rows: Tuple[int, int]):
+        """Sustituir de una vez los modelos servidos por los entrenados en modo chunked"""
+        predictor = self.predictor
+        feature_names = list(predictor.feature_store.meta.get('feature_names', []))
+        horizon_models = {'sgd_chunked': horizon_model} if horizon_model is not None else {}
+        model_version = datetime.utcnow().isoformat()
+        predictor._publish({
+            'scalers': {**predictor.scalers, 'advanced': scaler},
+            'models': models,
+            'feature_names': feature_names,
+            'horizon_models': horizon_models,
+            'horizons': horizons if horizon_model is not None else [],
+            'horizon_metrics': horizon_metrics,
+            'compiled_models': compile_models(models),
+            'compiled_horizon_models': compile_models(horizon_models),
+            'compaction_report': {},
+            '_compaction_variants': {},
+            'performance_metrics': metrics,
+            'model_version': model_version,
+            # Holdout demasiado grande para copiarlo: rango de filas del store
+            'holdout': {'model_version': model_version, 'store_rows': np.asarray(holdout_rows)},
+            'feature_importance': predictor._impurity_importance(models, feature_names, model_version),
+            # La política de re-entrenamiento en memoria no puede ampliar estos modelos
+            'training_state': {}
+        })
+        predictor._save_advanced_models()
+        predictor._save_training_info(metrics['train_samples'], metrics['test_samples'])
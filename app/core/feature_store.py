@@ -0,0 +1,288 @@
+"""
+🗄️ FEATURE STORE HELIOBIOLÓGICO
+Vectores de características por tick en disco (una columna por archivo),
+versionados por el hash de la definición de features y leídos con memmap
+"""
+import numpy as np
+from collections import deque
+from datetime import datetime
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.resonance import DEFAULT_RESONANCE_WEIGHTS, apply_resonance, resolve_weights
+from app.core.time_series import SOCIAL_METRICS, SOLAR_METRICS, history_columns
+
+logger = logging.getLogger(__name__)
+
+# Métricas crudas que se mantienen parseadas en memoria entre lecturas del log
+RAW_METRICS = SOLAR_METRICS + SOCIAL_METRICS + ('resonance',)
+
+class FeatureStore:
+    """Almacén columnar append-only de features por tick"""
+
+    def __init__(self, predictor, base_path: str = "data/feature_store/",
+                 resonance_weights: Optional[Dict[str, float]] = None):
+        self.predictor = predictor
+        self.base_path = base_path
+        self.raw_log_path = os.path.join(base_path, "raw_ticks.jsonl")
+        # La resonancia se recalcula desde las métricas crudas con estos pesos
+        self.resonance_weights = resolve_weights(resonance_weights)
+        self.definition_hash = self.compute_definition_hash(predictor)
+        if self.resonance_weights != DEFAULT_RESONANCE_WEIGHTS:
+            # Otros pesos: versión nueva (backfill) sin invalidar los almacenes existentes
+            weights = json.dumps(self.resonance_weights, sort_keys=True)
+            self.definition_hash = hashlib.sha256(f"{self.definition_hash}|{weights}".encode('utf-8')).hexdigest()
+        self.version_path = os.path.join(base_path, f"v_{self.definition_hash[:12]}")
+        self.meta_path = os.path.join(self.version_path, "meta.json")
+        self._lock = threading.Lock()
+        self._tail: Optional[Deque[Dict]] = None
+        self.meta = self._read_meta()
+        # Columnas crudas ya parseadas y byte del log hasta el que llegan
+        self._raw_lock = threading.Lock()
+        self._raw_offset = 0
+        self._raw_timestamps = np.empty(0)
+        self._raw_columns: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def compute_definition_hash(predictor) -> str:
+        """Hash del código que define las features: cualquier cambio crea una versión nueva"""
+        source = inspect.getsource(type(predictor)._build_feature_matrix)
+        payload = f"{source}|window={predictor.FEATURE_WINDOW_SIZE}|min={predictor.MIN_FEATURE_POINTS}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ---------- Metadatos y columnas ----------
+
+    def _read_meta(self) -> Dict:
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        self._truncate_columns(meta)
+        return meta
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.version_path, f"{column}.f64")
+
+    def _truncate_columns(self, meta: Dict):
+        """Descartar bytes escritos tras el último commit de meta (escrituras interrumpidas)"""
+        expected = meta.get('n_rows', 0) * 8
+        for column in ['timestamp', 'resonance'] + meta.get('feature_names', []):
+            path = self._column_path(column)
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                with open(path, 'r+b') as f:
+                    f.truncate(expected)
+
+    @property
+    def n_rows(self) -> int:
+        return self.meta.get('n_rows', 0)
+
+    @property
+    def needs_backfill(self) -> bool:
+        """Versión nueva de features con ticks crudos anteriores sin procesar"""
+        return not self.meta and os.path.exists(self.raw_log_path)
+
+    def _append_rows(self, timestamps: np.ndarray, resonance: np.ndarray, X: np.ndarray, feature_names: List[str]):
+        if len(timestamps) == 0:
+            return
+        if not self.meta:
+            os.makedirs(self.version_path, exist_ok=True)
+            self.meta = {
+                'definition_hash': self.definition_hash,
+                'feature_names': list(feature_names),
+                'n_rows': 0,
+                'created_at': datetime.utcnow().isoformat()
+            }
+
+        columns = {'timestamp': timestamps, 'resonance': resonance}
+        columns.update({name: X[:, j] for j, name in enumerate(self.meta['feature_names'])})
+        for column, values in columns.items():
+            with open(self._column_path(column), 'ab') as f:
+                np.ascontiguousarray(values, dtype=np.float64).tofile(f)
+
+        self.meta['n_rows'] += len(timestamps)
+        self.meta['last_timestamp'] = float(timestamps[-1])
+        self._write_meta()
+
+    # ---------- Escritura por tick ----------
+
+    def _load_tail(self) -> Deque[Dict]:
+        """Últimos ticks crudos necesarios para calcular la fila de un tick nuevo"""
+        tail: Deque[Dict] = deque(maxlen=self.predictor.MIN_FEATURE_POINTS - 1)
+        if os.path.exists(self.raw_log_path):
+            with open(self.raw_log_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        tail.append(json.loads(line))
+        apply_resonance(list(tail), self.resonance_weights)
+        return tail
+
+    def append_tick(self, tick: Dict) -> Optional[np.ndarray]:
+        """Registrar un tick crudo y persistir su vector de features; devuelve la fila"""
+        with self._lock:
+            if self._tail is None:
+                self._tail = self._load_tail()
+
+            timestamp = datetime.fromisoformat(tick['timestamp']).timestamp()
+            if self.meta.get('last_timestamp') is not None and timestamp <= self.meta['last_timestamp']:
+                return None
+
+            tick = apply_resonance([dict(tick)], self.resonance_weights)[0]
+            os.makedirs(self.base_path, exist_ok=True)
+            with open(self.raw_log_path, 'a') as f:
+                f.write(json.dumps(tick, default=str) + "\n")
+
+            window = list(self._tail) + [tick]
+            self._tail.append(tick)
+            if len(window) < self.predictor.MIN_FEATURE_POINTS:
+                return None
+
+            X, resonance, feature_names = self.predictor._build_feature_matrix(window)
+            self._append_rows(np.array([timestamp]), resonance[-1:], X[-1:], feature_names)
+            return X[-1]
+
+    # ---------- Backfill ----------
+
+    def backfill(self, chunk_size: int = 5000) -> int:
+        """Recalcular todas las features de la versión actual a partir del log crudo"""
+        if not os.path.exists(self.raw_log_path):
+            return 0
+
+        logger.info(f"🗄️ Backfill del feature store (versión {self.definition_hash[:12]})...")
+        with self._lock:
+            overlap = self.predictor.MIN_FEATURE_POINTS - 1
+            last_timestamp = self.meta.get('last_timestamp')
+            prefix: List[Dict] = []
+            chunk: List[Dict] = []
+            written = 0
+
+            def flush(prefix: List[Dict], chunk: List[Dict]) -> int:
+                # Resonancia del log con los pesos vigentes (el prefijo ya viene recalculado)
+                window = prefix + apply_resonance(chunk, self.resonance_weights)
+                if len(window) < self.predictor.MIN_FEATURE_POINTS:
+                    return 0
+                X, resonance, feature_names = self.predictor._build_feature_matrix(window)
+                # Las filas de X corresponden a window[FEATURE_WINDOW_SIZE:]; quedarnos con las del chunk
+                n_new = min(len(chunk), len(X))
+                points = window[-n_new:]
+                timestamps = np.array([datetime.fromisoformat(p['timestamp']).timestamp() for p in points])
+                keep = timestamps > last_timestamp if last_timestamp is not None else np.ones(n_new, dtype=bool)
+                self._append_rows(timestamps[keep], resonance[-n_new:][keep], X[-n_new:][keep], feature_names)
+                return int(keep.sum())
+
+            with open(self.raw_log_path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    chunk.append(json.loads(line))
+                    # El chunk crece hasta poder calcular al menos una ventana completa
+                    if len(chunk) >= chunk_size and len(prefix) + len(chunk) >= self.predictor.MIN_FEATURE_POINTS:
+                        written += flush(prefix, chunk)
+                        prefix = (prefix + chunk)[-overlap:]
+                        chunk = []
+            written += flush(prefix, chunk)
+
+        logger.info(f"✅ Backfill completado - Filas: {written}")
+        return written
+
+    def ensure_current(self) -> Dict:
+        """Backfill si la definición de features cambió desde la última escritura"""
+        if self.needs_backfill:
+            self.backfill()
+        return self.get_info()
+
+    # ---------- Lectura ----------
+
+    def column(self, name: str) -> np.ndarray:
+        """Columna mapeada en memoria (sin copia)"""
+        if self.n_rows == 0:
+            return np.empty(0)
+        return np.memmap(self._column_path(name), dtype=np.float64, mode='r', shape=(self.n_rows,))
+
+    def load_matrix(self, start: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """Timestamps, matriz de features y resonancia desde la fila start"""
+        feature_names = self.meta.get('feature_names', [])
+        if self.n_rows == 0:
+            return np.empty(0), np.empty((0, len(feature_names))), np.empty(0), feature_names
+        X = np.column_stack([self.column(name)[start:] for name in feature_names])
+        return self.column('timestamp')[start:], X, self.column('resonance')[start:], feature_names
+
+    @property
+    def raw_log_size(self) -> int:
+        """Bytes del log crudo (solo se añade): cambia con cada tick registrado"""
+        return os.path.getsize(self.raw_log_path) if os.path.exists(self.raw_log_path) else 0
+
+    def _sync_raw_columns(self, metrics: Sequence[str], chunk_size: int):
+        """Parsear solo las líneas añadidas al log desde la última lectura"""
+        size = self.raw_log_size
+        if any(metric not in self._raw_columns for metric in metrics) or size < self._raw_offset:
+            # Métrica nueva o log reemplazado: releer desde el principio
+            names = list(dict.fromkeys([*RAW_METRICS, *self._raw_columns, *metrics]))
+            self._raw_offset, self._raw_timestamps = 0, np.empty(0)
+            self._raw_columns = {metric: np.empty(0) for metric in names}
+        if size == self._raw_offset:
+            return
+
+        timestamp_parts = [self._raw_timestamps]
+        column_parts = {metric: [values] for metric, values in self._raw_columns.items()}
+
+        def flush(points: List[Dict]):
+            timestamps, columns = history_columns(points, list(column_parts))
+            timestamp_parts.append(timestamps)
+            for metric, values in columns.items():
+                column_parts[metric].append(values)
+
+        points: List[Dict] = []
+        with open(self.raw_log_path, 'rb') as f:
+            f.seek(self._raw_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # línea a medio escribir: se leerá en la próxima llamada
+                self._raw_offset += len(line)
+                if line.strip():
+                    points.append(json.loads(line))
+                if len(points) >= chunk_size:
+                    flush(points)
+                    points = []
+        if points:
+            flush(points)
+
+        self._raw_timestamps = np.concatenate(timestamp_parts)
+        self._raw_columns = {metric: np.concatenate(parts) for metric, parts in column_parts.items()}
+
+    def raw_columns(self, metrics: Sequence[str], start: Optional[float] = None, end: Optional[float] = None,
+                    chunk_size: int = 5000) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Métricas crudas del log (sin medias de ventana) con start ≤ timestamp ≤ end.
+
+        Las columnas parseadas se conservan entre llamadas: cada lectura solo
+        parsea los ticks añadidos desde la anterior
+        """
+        with self._raw_lock:
+            self._sync_raw_columns(metrics, chunk_size)
+            timestamps, cached = self._raw_timestamps, self._raw_columns
+
+        keep = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps <= end
+        return timestamps[keep], {metric: cached[metric][keep] for metric in metrics}
+
+    def get_info(self) -> Dict:
+        return {
+            "definition_hash": self.definition_hash[:12],
+            "rows": self.n_rows,
+            "features": len(self.meta.get('feature_names', [])),
+            "last_timestamp": self.meta.get('last_timestamp')
+        }
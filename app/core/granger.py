@@ -0,0 +1,175 @@
+"""
+🧭 CAUSALIDAD DE GRANGER SOLAR → SOCIAL
+Regresiones restringida y completa por (driver solar, respuesta social, desfase
+máximo) resueltas en lote, repartidas en un pool de procesos y cacheadas por ventana
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.stats import f as f_distribution
+from collections import OrderedDict
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+from joblib import Parallel, delayed
+
+from app.core.lag_correlation import standardize_rows
+from app.core.time_series import (
+    SOCIAL_METRICS, SOLAR_METRICS, load_metric_series, metric_matrix, resample_mean, series_version
+)
+
+logger = logging.getLogger(__name__)
+
+def _residual_ss(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Suma de residuos al cuadrado por lote: X (b, m, k), y (m,) → (b,)"""
+    XtX = np.einsum('bmk,bml->bkl', X, X)
+    Xty = np.einsum('bmk,m->bk', X, y)
+    # pinv: drivers constantes dejan XtX singular
+    beta = np.einsum('bkl,bl->bk', np.linalg.pinv(XtX), Xty)
+    residual = y[None, :] - np.einsum('bmk,bk->bm', X, beta)
+    return np.einsum('bm,bm->b', residual, residual)
+
+def _granger_response(paths: Dict[str, str], response: int, max_lag: int) -> Dict:
+    """Todos los drivers solares contra una respuesta social con un desfase máximo"""
+    solar = np.load(paths['solar'], mmap_mode='r')
+    social = np.load(paths['social'], mmap_mode='r')
+    y_series = np.asarray(social[response])
+    m = len(y_series) - max_lag
+    y = y_series[max_lag:]
+
+    # Ventanas deslizantes: la fila t contiene los max_lag valores previos a y[t]
+    own_lags = sliding_window_view(y_series, max_lag)[:m]
+    driver_lags = sliding_window_view(np.asarray(solar), max_lag, axis=1)[:, :m, :]
+    restricted = np.column_stack([np.ones(m), own_lags])
+
+    rss_restricted = _residual_ss(restricted[None], y)[0]
+    unrestricted = np.concatenate(
+        [np.broadcast_to(restricted, (len(solar),) + restricted.shape), driver_lags], axis=2
+    )
+    rss_unrestricted = _residual_ss(unrestricted, y)
+
+    df_num, df_den = max_lag, m - unrestricted.shape[2]
+    f_stat = ((rss_restricted - rss_unrestricted) / df_num) / np.maximum(rss_unrestricted / df_den, 1e-300)
+    f_stat = np.maximum(f_stat, 0.0)
+    return {
+        'response': response,
+        'max_lag': max_lag,
+        'f_stat': f_stat,
+        'p_value': f_distribution.sf(f_stat, df_num, df_den)
+    }
+
+class GrangerCausalityEngine:
+    """Tabla F / p-valor de Granger para todos los pares solar → social en un único job"""
+
+    def __init__(self, max_lags: Sequence[int] = (1, 2, 3, 6, 12, 24), resample_hours: float = 1.0,
+                 significance: float = 0.05, min_dof: int = 20, n_jobs: int = -1, cache_size: int = 8,
+                 solar_metrics: Sequence[str] = SOLAR_METRICS,
+                 social_metrics: Sequence[str] = SOCIAL_METRICS):
+        self.max_lags = tuple(sorted(max_lags))
+        self.resample_hours = resample_hours  # rejilla regular: los desfases se miden en horas
+        self.significance = significance  # Settings.confidence_threshold
+        self.min_dof = min_dof
+        self.n_jobs = n_jobs
+        self.cache_size = cache_size
+        self.solar_metrics = tuple(solar_metrics)
+        self.social_metrics = tuple(social_metrics)
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.latest: Optional[Dict] = None
+
+    def _window_key(self, version: Tuple, window_hours: Optional[float]) -> Tuple:
+        """Versión de la serie, ventana pedida y configuración del test (sin cargar datos)"""
+        return (version, window_hours or None, self.max_lags, self.resample_hours,
+                self.solar_metrics, self.social_metrics)
+
+    def _prepare(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray],
+                 window_hours: Optional[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if window_hours and len(timestamps):
+            start = np.searchsorted(timestamps, timestamps[-1] - window_hours * 3600, side='left')
+            timestamps = timestamps[start:]
+            columns = {metric: np.asarray(values)[start:] for metric, values in columns.items()}
+        timestamps, columns = resample_mean(timestamps, columns, self.resample_hours * 3600)
+        return timestamps, metric_matrix(columns, self.solar_metrics), metric_matrix(columns, self.social_metrics)
+
+    def test(self, timestamps: np.ndarray, solar: np.ndarray, social: np.ndarray) -> Dict:
+        """Ajustar todas las combinaciones (respuesta, desfase) en paralelo"""
+        n = solar.shape[1]
+        max_lags = [lag for lag in self.max_lags if n - lag - (2 * lag + 1) >= self.min_dof]
+        if not max_lags:
+            raise ValueError("Historial insuficiente para el test de Granger")
+
+        with tempfile.TemporaryDirectory(prefix="heliobio_granger_") as workdir:
+            paths = {'solar': os.path.join(workdir, "solar.npy"), 'social': os.path.join(workdir, "social.npy")}
+            np.save(paths['solar'], standardize_rows(solar))
+            np.save(paths['social'], standardize_rows(social))
+            results = Parallel(n_jobs=self.n_jobs)(
+                delayed(_granger_response)(paths, response, lag)
+                for response in range(len(self.social_metrics))
+                for lag in max_lags
+            )
+
+        by_pair: Dict[Tuple[int, int], List[Dict]] = {}
+        for result in results:
+            for driver in range(len(self.solar_metrics)):
+                by_pair.setdefault((driver, result['response']), []).append({
+                    "max_lag": result['max_lag'],
+                    "lag_hours": result['max_lag'] * self.resample_hours,
+                    "f_stat": round(float(result['f_stat'][driver]), 4),
+                    "p_value": float(result['p_value'][driver])
+                })
+
+        pairs = []
+        for (driver, response), tests in by_pair.items():
+            best = min(tests, key=lambda test: test['p_value'])
+            # Elegir el mejor desfase es una comparación múltiple: Šidák sobre los desfases probados
+            p_adjusted = float(-np.expm1(len(tests) * np.log1p(-min(best['p_value'], 1 - 1e-16))))
+            pairs.append({
+                "driver": self.solar_metrics[driver],
+                "response": self.social_metrics[response],
+                "best_lag": best['max_lag'],
+                "best_lag_hours": best['lag_hours'],
+                "f_stat": best['f_stat'],
+                "p_value": best['p_value'],
+                "p_value_adjusted": p_adjusted,
+                "significant": p_adjusted < self.significance,
+                "by_lag": sorted(tests, key=lambda test: test['max_lag'])
+            })
+        pairs.sort(key=lambda pair: pair['p_value'])
+
+        return {
+            "pairs": pairs,
+            "n_points": int(n),
+            "resample_hours": self.resample_hours,
+            "max_lags": max_lags,
+            "significance": self.significance,
+            "significant_pairs": sum(pair['significant'] for pair in pairs),
+            "window_start": float(timestamps[0]),
+            "window_end": float(timestamps[-1])
+        }
+
+    def run(self, historical_data: List[Dict], feature_store=None, window_hours: Optional[float] = None) -> Dict:
+        """Job completo sobre el historial; repetir la misma ventana devuelve la tabla cacheada"""
+        try:
+            metrics = self.solar_metrics + self.social_metrics
+            # Búsqueda antes de cargar: un acierto no vuelve a leer el log crudo
+            key = self._window_key(series_version(historical_data, feature_store), window_hours)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.latest = self._cache[key]
+                return self.latest
+
+            timestamps, columns, source = load_metric_series(historical_data, metrics, feature_store)
+            timestamps, solar, social = self._prepare(timestamps, columns, window_hours)
+
+            logger.info(f"🧭 Test de Granger: {solar.shape[0]}×{social.shape[0]} pares, {solar.shape[1]} puntos")
+            result = self.test(timestamps, solar, social)
+            result['source'] = source
+
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.latest = result
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error en test de Granger: {e}")
+            return {"error": str(e)}
@@ -0,0 +1,146 @@
+"""
+🎛️ BÚSQUEDA WALK-FORWARD DE HIPERPARÁMETROS
+Validación temporal en paralelo con features de cada fold compartidas por memmap
+"""
+import numpy as np
+from datetime import datetime
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+import os
+import tempfile
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from app.core.prediction_engine import AdvancedHelioBioPredictor, build_model
+
+logger = logging.getLogger(__name__)
+
+# Rejillas por familia de modelo (nombres compatibles con AdvancedHelioBioPredictor)
+DEFAULT_SEARCH_SPACE = {
+    'random_forest_advanced': {
+        'n_estimators': [100, 200],
+        'max_depth': [4, 8, 15],
+        'min_samples_leaf': [2, 5]
+    },
+    'gradient_boosting': {
+        'n_estimators': [50, 100],
+        'max_depth': [2, 3, 6],
+        'learning_rate': [0.05, 0.1]
+    },
+    'poly_ridge': {
+        'alpha': [0.1, 1.0, 10.0, 100.0]
+    }
+}
+
+def _evaluate_fold(family: str, params: Dict, fold: Dict[str, str]) -> Tuple[float, float]:
+    """Ajustar y evaluar una configuración en un fold (ejecutado en un worker)"""
+    # Los arrays se abren en modo memmap: sin copias entre procesos
+    X_train = np.load(fold['X_train'], mmap_mode='r')
+    y_train = np.load(fold['y_train'], mmap_mode='r')
+    X_test = np.load(fold['X_test'], mmap_mode='r')
+    y_test = np.load(fold['y_test'], mmap_mode='r')
+
+    model = build_model(family, params)
+    if family == 'random_forest_advanced':
+        # El paralelismo ya está a nivel de (candidato, fold)
+        model.set_params(n_jobs=1)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return float(r2_score(y_test, y_pred)), float(mean_absolute_error(y_test, y_pred))
+
+class WalkForwardTuner:
+    """Job de tuning walk-forward sobre familias de modelos y rejillas"""
+
+    def __init__(self, predictor: AdvancedHelioBioPredictor, n_splits: int = 5,
+                 search_space: Optional[Dict[str, Dict[str, List]]] = None, n_jobs: int = -1):
+        self.predictor = predictor
+        self.n_splits = n_splits
+        self.search_space = search_space or DEFAULT_SEARCH_SPACE
+        self.n_jobs = n_jobs
+        self.tuning_file = os.path.join(predictor.model_path, "advanced_tuning.json")
+
+    def _materialize_folds(self, X: np.ndarray, y: np.ndarray, workdir: str) -> List[Dict[str, str]]:
+        """Escalar cada fold una sola vez y volcarlo a disco para memmap"""
+        n_splits = min(self.n_splits, len(X) // 10)
+        if n_splits < 2:
+            raise ValueError("Datos insuficientes para validación walk-forward")
+
+        fold_paths = []
+        for k, (train_idx, test_idx) in enumerate(TimeSeriesSplit(n_splits=n_splits).split(X)):
+            scaler = StandardScaler().fit(X[train_idx])
+            arrays = {
+                'X_train': scaler.transform(X[train_idx]),
+                'y_train': y[train_idx],
+                'X_test': scaler.transform(X[test_idx]),
+                'y_test': y[test_idx]
+            }
+            paths = {}
+            for key, array in arrays.items():
+                paths[key] = os.path.join(workdir, f"fold{k}_{key}.npy")
+                np.save(paths[key], np.ascontiguousarray(array))
+            fold_paths.append(paths)
+        return fold_paths
+
+    def run(self, historical_data: List[Dict]) -> Dict:
+        """Ejecutar la búsqueda completa y persistir la configuración ganadora"""
+        logger.info("🎛️ Iniciando búsqueda walk-forward de hiperparámetros...")
+
+        try:
+            # Features calculadas una única vez para todos los candidatos
+            X_all, resonance_rows, _, _ = self.predictor._training_matrix(historical_data)
+            X, y = X_all[:-1], resonance_rows[1:]
+            candidates = [
+                (family, params)
+                for family, grid in self.search_space.items()
+                for params in ParameterGrid(grid)
+            ]
+
+            with tempfile.TemporaryDirectory(prefix="heliobio_folds_") as workdir:
+                fold_paths = self._materialize_folds(X, y, workdir)
+                fold_scores = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_evaluate_fold)(family, params, fold)
+                    for family, params in candidates
+                    for fold in fold_paths
+                )
+
+            n_folds = len(fold_paths)
+            best_by_family = {}
+            for i, (family, params) in enumerate(candidates):
+                scores = np.array(fold_scores[i * n_folds:(i + 1) * n_folds])
+                result = {
+                    'family': family,
+                    'params': params,
+                    'mean_r2': float(scores[:, 0].mean()),
+                    'mean_mae': float(scores[:, 1].mean())
+                }
+                current = best_by_family.get(result['family'])
+                if current is None or result['mean_r2'] > current['mean_r2']:
+                    best_by_family[result['family']] = result
+
+            best_overall = max(best_by_family.values(), key=lambda r: r['mean_r2'])
+            summary = {
+                'best_params': {family: r['params'] for family, r in best_by_family.items()},
+                'best_scores': {
+                    family: {'mean_r2': r['mean_r2'], 'mean_mae': r['mean_mae']}
+                    for family, r in best_by_family.items()
+                },
+                'best_family': best_overall['family'],
+                'n_candidates': len(candidates),
+                'n_folds': n_folds,
+                'samples': len(X),
+                'tuned_at': datetime.utcnow().isoformat()
+            }
+
+            with open(self.tuning_file, 'w') as f:
+                json.dump(summary, f, indent=2, default=float)
+
+            logger.info(f"✅ Tuning completado - Mejor familia: {summary['best_family']} "
+                        f"(R² walk-forward {best_overall['mean_r2']:.3f})")
+            return summary
+
+        except Exception as e:
+            logger.error(f"❌ Error en búsqueda de hiperparámetros: {e}")
+            return {"error": str(e)}
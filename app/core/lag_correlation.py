@@ -0,0 +1,141 @@
+"""
+🔭 CORRELACIÓN CRUZADA CON DESFASE (FFT)
+Barrido de desfases entre cada métrica solar y cada métrica social sobre el
+historial almacenado: O(n log n) por par mediante el espectro cruzado
+"""
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.time_series import (
+    SOCIAL_METRICS, SOLAR_METRICS, correlation_confidence, estimate_tick_seconds,
+    load_metric_series, metric_matrix, series_version
+)
+
+logger = logging.getLogger(__name__)
+
+def standardize_rows(M: np.ndarray) -> np.ndarray:
+    """Media cero y varianza unitaria por fila (filas constantes quedan a cero)"""
+    M = np.asarray(M, dtype=np.float64)
+    centered = M - M.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1, keepdims=True)
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0)
+
+def lag_one_autocorrelation(Z: np.ndarray) -> np.ndarray:
+    """Autocorrelación a un paso de cada fila estandarizada"""
+    n = Z.shape[1]
+    return np.einsum('ij,ij->i', Z[:, :-1], Z[:, 1:]) / max(n - 1, 1)
+
+def cross_correlation(solar: np.ndarray, social: np.ndarray, max_lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correlación cruzada de todos los pares (p, q) para desfases en [-max_lag, max_lag].
+
+    ccf[i, j, k] ≈ corr(solar_i[t], social_j[t + lag_k]): un desfase positivo
+    indica que la métrica social sigue a la solar. Con nfft ≥ n + max_lag la
+    correlación circular no se solapa con la lineal en el rango pedido
+    """
+    Zs, Zq = standardize_rows(solar), standardize_rows(social)
+    n = Zs.shape[1]
+    nfft = next_fast_len(n + max_lag, real=True)
+
+    # Una FFT por serie y una inversa por par (en lote sobre todos los pares)
+    spectrum = np.conj(rfft(Zs, nfft, axis=1))[:, None, :] * rfft(Zq, nfft, axis=1)[None, :, :]
+    raw = irfft(spectrum, nfft, axis=2)
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    overlap = n - np.abs(lags)
+    ccf = np.clip(raw[..., lags % nfft] / overlap, -1.0, 1.0)
+    return lags, ccf
+
+def lag_confidence(correlation: np.ndarray, overlap: np.ndarray, r1_solar: np.ndarray,
+                   r1_social: np.ndarray, n_lags: int) -> np.ndarray:
+    """
+    1 - p-valor (Fisher z) con n efectivo corregido por autocorrelación (Bartlett)
+    y corrección de Šidák por el número de desfases barridos
+    """
+    rho = np.clip(r1_solar * r1_social, -0.99, 0.99)
+    n_eff = np.minimum(overlap * (1 - rho) / (1 + rho), overlap)
+    return correlation_confidence(correlation, n_eff, n_lags)
+
+class LagCorrelationEngine:
+    """Desfase de máxima correlación y su confianza para cada par solar × social"""
+
+    def __init__(self, max_lag_hours: float = 720.0, min_overlap: int = 30,
+                 solar_metrics: Sequence[str] = SOLAR_METRICS,
+                 social_metrics: Sequence[str] = SOCIAL_METRICS):
+        self.max_lag_hours = max_lag_hours  # ±30 días
+        self.min_overlap = min_overlap
+        self.solar_metrics = tuple(solar_metrics)
+        self.social_metrics = tuple(social_metrics)
+        # (clave, resultado) del último barrido: una sola asignación para lectores concurrentes
+        self._cached: Optional[Tuple[Tuple, Dict]] = None
+
+    def scan(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray],
+             max_lag_hours: Optional[float] = None) -> Dict:
+        """Barrido completo sobre columnas ya extraídas (timestamps en epoch, ticks regulares)"""
+        max_lag_hours = self.max_lag_hours if max_lag_hours is None else max_lag_hours
+        n = len(timestamps)
+        if n < self.min_overlap + 1:
+            raise ValueError(f"Se necesitan al menos {self.min_overlap + 1} puntos para el barrido de desfases")
+
+        tick_seconds = estimate_tick_seconds(timestamps)
+        max_lag = int(min(round(max_lag_hours * 3600 / tick_seconds), n - self.min_overlap))
+
+        solar = metric_matrix(columns, self.solar_metrics)
+        social = metric_matrix(columns, self.social_metrics)
+        lags, ccf = cross_correlation(solar, social, max_lag)
+
+        # Pico por par: índice del máximo |r| a lo largo de los desfases
+        peak = np.abs(ccf).argmax(axis=2)
+        peak_corr = np.take_along_axis(ccf, peak[..., None], axis=2)[..., 0]
+        peak_lag = lags[peak]
+        overlap = n - np.abs(peak_lag)
+
+        r1_solar = lag_one_autocorrelation(standardize_rows(solar))
+        r1_social = lag_one_autocorrelation(standardize_rows(social))
+        confidence = lag_confidence(peak_corr, overlap, r1_solar[:, None], r1_social[None, :], len(lags))
+
+        pairs: List[Dict] = []
+        for i, solar_metric in enumerate(self.solar_metrics):
+            for j, social_metric in enumerate(self.social_metrics):
+                pairs.append({
+                    "solar_metric": solar_metric,
+                    "social_metric": social_metric,
+                    "lag_ticks": int(peak_lag[i, j]),
+                    "lag_hours": round(float(peak_lag[i, j]) * tick_seconds / 3600, 3),
+                    "correlation": round(float(peak_corr[i, j]), 4),
+                    "zero_lag_correlation": round(float(ccf[i, j, max_lag]), 4),
+                    "confidence": round(float(confidence[i, j]), 4),
+                    "n_overlap": int(overlap[i, j])
+                })
+        pairs.sort(key=lambda pair: (pair['confidence'], abs(pair['correlation'])), reverse=True)
+
+        return {
+            "pairs": pairs,
+            "n_points": n,
+            "tick_seconds": tick_seconds,
+            "max_lag_ticks": max_lag,
+            "max_lag_hours": round(max_lag * tick_seconds / 3600, 3)
+        }
+
+    def run(self, historical_data: List[Dict], feature_store=None, max_lag_hours: Optional[float] = None) -> Dict:
+        """Barrido sobre el historial más largo disponible; cacheado hasta el siguiente tick"""
+        try:
+            max_lag_hours = self.max_lag_hours if max_lag_hours is None else max_lag_hours
+            metrics = self.solar_metrics + self.social_metrics
+            # Clave antes de cargar: un acierto no vuelve a leer el log crudo
+            key = (series_version(historical_data, feature_store), max_lag_hours, metrics)
+            cached = self._cached
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            timestamps, columns, source = load_metric_series(historical_data, metrics, feature_store)
+            result = self.scan(timestamps, columns, max_lag_hours)
+            result['source'] = source
+            self._cached = (key, result)
+            logger.info(f"🔭 Barrido de desfases: {len(result['pairs'])} pares, ±{result['max_lag_hours']}h")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error en barrido de desfases: {e}")
+            return {"error": str(e)}
@@ -0,0 +1,103 @@
+"""
+📨 MICRO-BATCHING DE PETICIONES DE PREDICCIÓN
+Agrupa las peticiones concurrentes durante unos milisegundos y ejecuta una única
+inferencia vectorizada por modelo en un hilo de trabajo
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+logger = logging.getLogger(__name__)
+
+class PredictionMicroBatcher:
+    """Cola asíncrona delante de AdvancedHelioBioPredictor.predict_advanced_batch"""
+
+    def __init__(self, predictor: AdvancedHelioBioPredictor, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # (tick, versión de modelo, horizonte) → futuro en curso compartido por peticiones idénticas
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.merged_requests = 0
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    def start(self):
+        """Arrancar el bucle de agrupación en el event loop actual"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def predict(self, current_data: Dict, historical_context: List[Dict], hours_ahead: int = 6) -> Dict:
+        """Encolar una petición y esperar su resultado; las idénticas en curso comparten uno solo"""
+        self.start()
+        key = (current_data['timestamp'], self.predictor.model_version, hours_ahead)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.merged_requests += 1
+        else:
+            # Solo la ventana mínima: el historial global puede crecer mientras espera
+            context = historical_context[-(self.predictor.MIN_FEATURE_POINTS - 1):]
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            await self._queue.put(((current_data, context, hours_ahead), future))
+        # shield: cancelar una petición no cancela el resultado que esperan las demás
+        return await asyncio.shield(future)
+
+    async def _collect(self) -> List[Tuple[Tuple, asyncio.Future]]:
+        """Primera petición + las que lleguen dentro de la ventana o hasta llenar el lote"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            requests = [request for request, _ in batch]
+            try:
+                responses = await asyncio.to_thread(self.predictor.predict_advanced_batch, requests)
+            except Exception as e:
+                logger.error(f"❌ Error en lote de predicciones: {e}")
+                responses = [{"error": str(e)}] * len(batch)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def get_stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "merged_requests": self.merged_requests,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms
+        }
@@ -0,0 +1,267 @@
+"""
+🗜️ COMPACTACIÓN DE MODELOS HELIOBIOLÓGICOS
+Poda de profundidad y de hojas, selección de miembros y cuantización float32
+sobre los ensembles aplanados, con informe de tamaño / carga / latencia / error
+"""
+import numpy as np
+import heapq
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.tree_compiler import CompiledTreeEnsemble, compile_tree_ensemble
+
+logger = logging.getLogger(__name__)
+
+def node_depths(ensemble: CompiledTreeEnsemble) -> np.ndarray:
+    """Profundidad de cada nodo alcanzable desde las raíces (-1 si no es alcanzable)"""
+    depth = np.full(ensemble.n_nodes, -1, dtype=np.int64)
+    frontier = ensemble.roots.astype(np.intp)
+    level = 0
+    while len(frontier) > 0:
+        depth[frontier] = level
+        internal = frontier[ensemble.children[frontier, 0] != frontier]
+        frontier = ensemble.children[internal].ravel().astype(np.intp)
+        level += 1
+    return depth
+
+def _rebuild(ensemble: CompiledTreeEnsemble, roots: np.ndarray, children: np.ndarray,
+             feature: np.ndarray, threshold: np.ndarray, scale: float) -> CompiledTreeEnsemble:
+    """Eliminar nodos inalcanzables y reindexar los arrays globales"""
+    candidate = CompiledTreeEnsemble(children, feature, threshold, ensemble.value, roots,
+                                     ensemble.max_depth, ensemble.base, scale)
+    depth = node_depths(candidate)
+    reachable = depth >= 0
+    new_index = np.cumsum(reachable) - 1
+
+    return CompiledTreeEnsemble(
+        children=new_index[children[reachable]],
+        feature=feature[reachable],
+        threshold=threshold[reachable],
+        value=ensemble.value[reachable],
+        roots=new_index[roots],
+        max_depth=int(depth.max()),
+        base=ensemble.base,
+        scale=scale
+    )
+
+def truncate_depth(ensemble: CompiledTreeEnsemble, max_depth: int) -> CompiledTreeEnsemble:
+    """Convertir en hoja todo nodo a profundidad max_depth (usa el valor medio del nodo)"""
+    depth = node_depths(ensemble)
+    children = ensemble.children.copy()
+    feature = ensemble.feature.copy()
+    threshold = ensemble.threshold.copy()
+
+    cut = np.flatnonzero(depth == max_depth)
+    children[cut, 0] = cut
+    children[cut, 1] = cut
+    feature[cut] = 0
+    threshold[cut] = np.inf
+    return _rebuild(ensemble, ensemble.roots, children, feature, threshold, ensemble.scale)
+
+def split_gains(model) -> np.ndarray:
+    """
+    Reducción de impureza ponderada de cada split, alineada con los nodos de
+    compile_tree_ensemble (0 en las hojas)
+    """
+    gains = []
+    for estimator in np.ravel(model.estimators_):
+        tree = estimator.tree_
+        weighted = tree.weighted_n_node_samples * tree.impurity
+        internal = tree.children_left != -1
+        gain = np.zeros(tree.node_count)
+        gain[internal] = (weighted[internal] - weighted[tree.children_left[internal]]
+                          - weighted[tree.children_right[internal]])
+        gains.append(gain)
+    return np.concatenate(gains)
+
+def cap_leaves(ensemble: CompiledTreeEnsemble, max_leaves: int, gains: np.ndarray) -> CompiledTreeEnsemble:
+    """
+    Como max_leaf_nodes: cada árbol conserva los max_leaves - 1 splits de mayor
+    ganancia expandidos primero-el-mejor desde la raíz; el resto pasa a ser hoja
+    """
+    children = ensemble.children.copy()
+    feature = ensemble.feature.copy()
+    threshold = ensemble.threshold.copy()
+    is_leaf = ensemble.children[:, 0] == np.arange(ensemble.n_nodes)
+
+    for root in ensemble.roots.tolist():
+        expanded = 0
+        frontier = [(-gains[root], root)]
+        while frontier:
+            _, node = heapq.heappop(frontier)
+            if is_leaf[node]:
+                continue
+            if expanded >= max_leaves - 1:
+                children[node] = node
+                feature[node] = 0
+                threshold[node] = np.inf
+                continue
+            expanded += 1
+            for child in ensemble.children[node].tolist():
+                heapq.heappush(frontier, (-gains[child], child))
+    return _rebuild(ensemble, ensemble.roots, children, feature, threshold, ensemble.scale)
+
+def select_members(ensemble: CompiledTreeEnsemble, averaging: bool,
+                   X_sel: np.ndarray, y_sel: np.ndarray) -> CompiledTreeEnsemble:
+    """Quitar miembros que no mejoran el error de selección"""
+    tree_values = ensemble.value[ensemble.apply(X_sel), 0].astype(np.float64)  # (n, n_trees)
+
+    if averaging:
+        # Selección greedy hacia delante (sin reemplazo) del promedio
+        selected, current_sum = [], np.zeros(len(y_sel))
+        remaining = list(range(ensemble.n_trees))
+        best_error = np.inf
+        while remaining:
+            k = len(selected) + 1
+            candidates = (current_sum[:, None] + tree_values[:, remaining]) / k
+            errors = np.abs(candidates - y_sel[:, None]).mean(axis=0)
+            best = int(np.argmin(errors))
+            if errors[best] >= best_error:
+                break
+            best_error = errors[best]
+            current_sum += tree_values[:, remaining[best]]
+            selected.append(remaining.pop(best))
+        kept = np.sort(np.array(selected, dtype=np.intp))
+        scale = 1.0 / len(kept)
+    else:
+        # Boosting: mejor prefijo de etapas
+        staged = ensemble.base + ensemble.scale * np.cumsum(tree_values, axis=1)
+        errors = np.abs(staged - y_sel[:, None]).mean(axis=0)
+        kept = np.arange(int(np.argmin(errors)) + 1)
+        scale = ensemble.scale
+
+    return _rebuild(ensemble, ensemble.roots[kept], ensemble.children,
+                    ensemble.feature, ensemble.threshold, scale)
+
+def quantize(ensemble: CompiledTreeEnsemble) -> CompiledTreeEnsemble:
+    """Umbrales y valores en float32, índices en int32"""
+    return CompiledTreeEnsemble(
+        children=ensemble.children.astype(np.int32),
+        feature=ensemble.feature.astype(np.int32),
+        threshold=ensemble.threshold.astype(np.float32),
+        value=ensemble.value.astype(np.float32),
+        roots=ensemble.roots.astype(np.int32),
+        max_depth=ensemble.max_depth,
+        base=ensemble.base,
+        scale=ensemble.scale
+    )
+
+class ModelCompactor:
+    """
+    Genera variantes compactas, las mide y elige la mejor bajo un presupuesto de latencia.
+
+    Con latency_runs=0 no se mide la latencia (latency_us=None) y la elección es
+    solo por error; profile la mide después sobre las variantes ya construidas
+    """
+
+    def __init__(self, latency_budget_ms: float = 1.0, depth_caps: List[int] = None,
+                 leaf_caps: List[int] = None, latency_runs: int = 200):
+        self.latency_budget_ms = latency_budget_ms
+        self.depth_caps = depth_caps or [8, 6, 4]
+        self.leaf_caps = leaf_caps or [64, 16]
+        self.latency_runs = latency_runs
+
+    @staticmethod
+    def split_holdout(X_val: np.ndarray, y_val: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Mitad inicial del holdout para elegir miembros, mitad final para el informe"""
+        half = len(X_val) // 2
+        return X_val[:half], y_val[:half], X_val[half:], y_val[half:]
+
+    def _single_row_latency_us(self, model, x: np.ndarray) -> float:
+        model.predict(x)
+        timings = []
+        for _ in range(self.latency_runs):
+            start = time.perf_counter()
+            model.predict(x)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings) * 1e6)
+
+    def _measure(self, name: str, model, X_val: np.ndarray, y_val: np.ndarray, workdir: str) -> Dict:
+        if isinstance(model, CompiledTreeEnsemble):
+            path = os.path.join(workdir, f"{name}.npz")
+            model.save(path)
+            start = time.perf_counter()
+            CompiledTreeEnsemble.load(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            structure = {"n_trees": model.n_trees, "n_nodes": model.n_nodes, "max_depth": model.max_depth}
+        else:
+            path = os.path.join(workdir, f"{name}.pkl")
+            with open(path, 'wb') as f:
+                pickle.dump(model, f)
+            start = time.perf_counter()
+            with open(path, 'rb') as f:
+                pickle.load(f)
+            load_ms = (time.perf_counter() - start) * 1000
+            structure = {}
+
+        y_pred = np.asarray(model.predict(X_val), dtype=np.float64)
+        residual_ss = float(np.sum((y_val - y_pred) ** 2))
+        total_ss = float(np.sum((y_val - y_val.mean()) ** 2))
+        return {
+            "variant": name,
+            "size_bytes": os.path.getsize(path),
+            "load_ms": load_ms,
+            "latency_us": self._single_row_latency_us(model, X_val[:1]) if self.latency_runs else None,
+            "val_mae": float(np.mean(np.abs(y_val - y_pred))),
+            "val_r2": 1 - residual_ss / total_ss if total_ss > 0 else 0.0,
+            **structure
+        }
+
+    def build_variants(self, model, X_sel: np.ndarray, y_sel: np.ndarray) -> Dict[str, object]:
+        """Variantes candidatas: original sklearn, compilado, poda, selección y float32"""
+        averaging = not hasattr(model, 'learning_rate')
+        compiled = compile_tree_ensemble(model)
+        variants = {"sklearn": model, "compiled": compiled}
+
+        bases = {"full": compiled}
+        for cap in self.depth_caps:
+            if cap < compiled.max_depth:
+                bases[f"depth{cap}"] = truncate_depth(compiled, cap)
+        max_leaves = int(np.max(np.add.reduceat(
+            compiled.children[:, 0] == np.arange(compiled.n_nodes), compiled.roots
+        )))
+        gains = split_gains(model)
+        for cap in self.leaf_caps:
+            if cap < max_leaves:
+                bases[f"leaves{cap}"] = cap_leaves(compiled, cap, gains)
+
+        for base_name, base in bases.items():
+            selected = select_members(base, averaging, X_sel, y_sel)
+            if base_name != "full":
+                variants[base_name] = base
+            variants[f"{base_name}+select"] = selected
+            variants[f"{base_name}+select+f32"] = quantize(selected)
+        return variants
+
+    def compact(self, model, X_val: np.ndarray, y_val: np.ndarray) -> Dict:
+        """Informe de variantes; la mitad inicial del holdout elige miembros, la final valida"""
+        X_sel, y_sel, X_rep, y_rep = self.split_holdout(X_val, y_val)
+
+        variants = self.build_variants(model, X_sel, y_sel)
+        with tempfile.TemporaryDirectory(prefix="heliobio_compaction_") as workdir:
+            report = [self._measure(name, variant, X_rep, y_rep, workdir)
+                      for name, variant in variants.items()]
+
+        selected = self.select(report)
+        return {"variants": report, "selected": selected, "model": variants[selected], "models": variants}
+
+    def profile(self, variants: Dict[str, object], report: List[Dict], x: np.ndarray) -> List[Dict]:
+        """Informe con la latencia por fila de cada variante medida (job opt-in, fuera del entrenamiento)"""
+        return [
+            {**entry, "latency_us": self._single_row_latency_us(variants[entry["variant"]], x)}
+            if entry["variant"] in variants else entry
+            for entry in report
+        ]
+
+    def select(self, report: List[Dict], latency_budget_ms: Optional[float] = None) -> str:
+        """Menor error de validación dentro del presupuesto; si ninguna cabe, la más rápida"""
+        budget_us = (latency_budget_ms or self.latency_budget_ms) * 1000
+        # Sin latencia medida la variante no se descarta por presupuesto
+        within_budget = [r for r in report if r["latency_us"] is None or r["latency_us"] <= budget_us]
+        if not within_budget:
+            return min(report, key=lambda r: r["latency_us"])["variant"]
+        return min(within_budget, key=lambda r: (r["val_mae"], r["size_bytes"]))["variant"]
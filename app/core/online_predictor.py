@@ -0,0 +1,120 @@
+"""
+🌊 PREDICTOR ONLINE HELIOBIOLÓGICO
+Aprendizaje incremental tick a tick con partial_fit y escalado en streaming
+"""
+import numpy as np
+from datetime import datetime
+import logging
+from typing import Dict, Optional
+import pickle
+import os
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+class OnlineHelioBioPredictor:
+    """Predictor de resonancia que se actualiza en cada tick con coste O(1)"""
+
+    def __init__(self, model_path: str = "data/models/", checkpoint_every: int = 30, warmup_ticks: int = 10):
+        self.model_path = model_path
+        self.checkpoint_every = checkpoint_every
+        self.warmup_ticks = warmup_ticks
+        self.checkpoint_file = os.path.join(model_path, "online_predictor.pkl")
+        self._reset()
+
+    def _reset(self):
+        """Reiniciar estado del aprendiz incremental"""
+        self.scaler = StandardScaler()
+        self.model = SGDRegressor(
+            loss='huber',
+            penalty='l2',
+            alpha=1e-4,
+            learning_rate='constant',
+            eta0=0.01,
+            random_state=42
+        )
+        self.pending_features: Optional[np.ndarray] = None
+        self.updates = 0
+        self.ewma_abs_error: Optional[float] = None
+        self.last_update: Optional[str] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.updates >= self.warmup_ticks
+
+    def update(self, features: np.ndarray, resonance: float) -> Dict:
+        """Procesar un tick: aprender del tick anterior y dejar pendiente el actual"""
+        features = np.asarray(features, dtype=float).reshape(1, -1)
+
+        if self.pending_features is not None and self.pending_features.shape == features.shape:
+            X_prev = self.pending_features
+            y = np.array([resonance])
+
+            # Error precuencial: predecir antes de aprender (seguimiento de deriva)
+            if self.is_ready:
+                error = abs(self._predict_row(X_prev) - resonance)
+                self.ewma_abs_error = error if self.ewma_abs_error is None else 0.95 * self.ewma_abs_error + 0.05 * error
+
+            self.scaler.partial_fit(X_prev)
+            self.model.partial_fit(self.scaler.transform(X_prev), y)
+            self.updates += 1
+            self.last_update = datetime.utcnow().isoformat()
+
+            if self.updates % self.checkpoint_every == 0:
+                self.save_checkpoint()
+
+        self.pending_features = features
+        return self.get_info()
+
+    def _predict_row(self, X: np.ndarray) -> float:
+        return float(np.clip(self.model.predict(self.scaler.transform(X))[0], 0.0, 1.0))
+
+    def predict(self, features: np.ndarray) -> Optional[float]:
+        """Predecir la resonancia del siguiente tick"""
+        if not self.is_ready:
+            return None
+        return self._predict_row(np.asarray(features, dtype=float).reshape(1, -1))
+
+    def save_checkpoint(self):
+        """Guardar checkpoint del estado incremental"""
+        try:
+            with open(self.checkpoint_file, 'wb') as f:
+                pickle.dump({
+                    'scaler': self.scaler,
+                    'model': self.model,
+                    'updates': self.updates,
+                    'ewma_abs_error': self.ewma_abs_error,
+                    'last_update': self.last_update
+                }, f)
+        except Exception as e:
+            logger.error(f"❌ Error guardando checkpoint online: {e}")
+
+    def load_checkpoint(self) -> bool:
+        """Restaurar el último checkpoint si existe"""
+        if not os.path.exists(self.checkpoint_file):
+            return False
+        try:
+            with open(self.checkpoint_file, 'rb') as f:
+                state = pickle.load(f)
+            self.scaler = state['scaler']
+            self.model = state['model']
+            # Sin fila pendiente: tras el reinicio el primer tick no es el objetivo de una fila antigua
+            self.pending_features = None
+            self.updates = state.get('updates', 0)
+            self.ewma_abs_error = state.get('ewma_abs_error')
+            self.last_update = state.get('last_update')
+            logger.info(f"✅ Predictor online restaurado - Actualizaciones: {self.updates}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error cargando checkpoint online: {e}")
+            self._reset()
+            return False
+
+    def get_info(self) -> Dict:
+        return {
+            "is_ready": self.is_ready,
+            "updates": self.updates,
+            "ewma_abs_error": self.ewma_abs_error,
+            "last_update": self.last_update
+        }
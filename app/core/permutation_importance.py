@@ -0,0 +1,116 @@
+"""
+🔀 IMPORTANCIA POR PERMUTACIÓN (JOB OFFLINE)
+Degradación del error del ensemble servido al permutar cada columna del
+holdout, con las columnas repartidas entre procesos
+"""
+import numpy as np
+from datetime import datetime
+import logging
+import os
+import tempfile
+from typing import Dict, List, Tuple
+from joblib import Parallel, delayed, effective_n_jobs
+
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+logger = logging.getLogger(__name__)
+
+def ensemble_predict(models: Dict, weights: Dict[str, float], X: np.ndarray) -> np.ndarray:
+    """Promedio ponderado por R² de las predicciones (igual que la predicción servida)"""
+    total = sum(weights.values())
+    predictions = {name: np.clip(np.asarray(model.predict(X), dtype=float), 0.0, 1.0)
+                   for name, model in models.items()}
+    if total > 0:
+        combined = sum(predictions[name] * weights[name] for name in models) / total
+    else:
+        combined = sum(predictions.values()) / len(predictions)
+    return np.clip(combined, 0.0, 1.0)
+
+def _permute_columns(models: Dict, weights: Dict[str, float], X_path: str, y_path: str,
+                     columns: List[int], baseline_mae: float, n_repeats: int, seed: int) -> Dict[int, List[float]]:
+    """Aumento del MAE al permutar cada columna asignada (ejecutado en un worker)"""
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    X_permuted = np.array(X)
+    scores = {}
+    for j in columns:
+        # Semilla por columna: resultado independiente del reparto entre workers
+        rng = np.random.RandomState(seed + j)
+        drops = []
+        for _ in range(n_repeats):
+            X_permuted[:, j] = X[rng.permutation(len(X)), j]
+            mae = float(np.mean(np.abs(y - ensemble_predict(models, weights, X_permuted))))
+            drops.append(mae - baseline_mae)
+        X_permuted[:, j] = X[:, j]
+        scores[j] = drops
+    return scores
+
+class PermutationImportanceJob:
+    """Job offline de importancia por permutación sobre el holdout guardado al entrenar"""
+
+    def __init__(self, predictor: AdvancedHelioBioPredictor, n_repeats: int = 5,
+                 n_jobs: int = -1, seed: int = 42):
+        self.predictor = predictor
+        self.n_repeats = n_repeats
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+    def _served_snapshot(self) -> Tuple[str, object, Dict, Dict[str, float], Dict, List[str]]:
+        """Versión, scaler, modelos servidos, pesos, holdout y features leídos de una misma publicación"""
+        predictor = self.predictor
+        with predictor._serving_lock:
+            models = {name: predictor.compiled_models.get(name, model) for name, model in predictor.models.items()}
+            weights = {name: predictor._serving_r2(name) for name in models}
+            return (predictor.model_version, predictor.scalers['advanced'], models, weights,
+                    predictor.holdout, list(predictor.feature_names))
+
+    def run(self) -> Dict:
+        """Calcular la importancia de la versión servida y guardarla en su manifiesto"""
+        if not self.predictor.is_trained:
+            return {"error": "Modelos no entrenados"}
+
+        logger.info("🔀 Calculando importancia por permutación...")
+        try:
+            model_version, scaler, models, weights, holdout, feature_names = self._served_snapshot()
+            # Solo las filas que el entrenamiento dejó fuera: recalcularlas solaparía el ajuste
+            if holdout.get('model_version') != model_version:
+                return {"error": "No hay holdout guardado para la versión de modelo servida; re-entrenar"}
+            X_holdout, y_test = self.predictor.holdout_matrix(holdout)
+            X_test = scaler.transform(X_holdout)
+            if len(X_test) < 5:
+                return {"error": "Holdout insuficiente para importancia por permutación"}
+
+            baseline_mae = float(np.mean(np.abs(y_test - ensemble_predict(models, weights, X_test))))
+
+            n_workers = max(1, min(effective_n_jobs(self.n_jobs), X_test.shape[1]))
+            column_groups = [list(group) for group in np.array_split(np.arange(X_test.shape[1]), n_workers)]
+            with tempfile.TemporaryDirectory(prefix="heliobio_permutation_") as workdir:
+                X_path, y_path = os.path.join(workdir, "X.npy"), os.path.join(workdir, "y.npy")
+                np.save(X_path, np.ascontiguousarray(X_test))
+                np.save(y_path, y_test)
+                partial_scores = Parallel(n_jobs=n_workers)(
+                    delayed(_permute_columns)(models, weights, X_path, y_path, group,
+                                              baseline_mae, self.n_repeats, self.seed)
+                    for group in column_groups
+                )
+
+            scores = {j: drops for part in partial_scores for j, drops in part.items()}
+            result = {
+                'model_version': model_version,
+                'baseline_mae': baseline_mae,
+                'importances': {
+                    name: {'mean': float(np.mean(scores[j])), 'std': float(np.std(scores[j]))}
+                    for j, name in enumerate(feature_names)
+                },
+                'n_repeats': self.n_repeats,
+                'samples': len(X_test),
+                'computed_at': datetime.utcnow().isoformat()
+            }
+
+            self.predictor.set_permutation_importance(result)
+            logger.info(f"✅ Importancia por permutación calculada - Features: {len(feature_names)}")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Error en importancia por permutación: {e}")
+            return {"error": str(e)}
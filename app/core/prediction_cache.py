@@ -0,0 +1,63 @@
+"""
+⚡ CACHÉ DE PREDICCIONES HELIOBIOLÓGICAS
+Resultados indexados por (tick de datos, versión de modelo, horizonte)
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class PredictionCache:
+    """Caché de predicciones válida mientras no cambien el tick ni el modelo"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Optional[str], int], Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tick_timestamp: str, model_version: Optional[str], hours_ahead: int) -> Optional[Dict]:
+        """Obtener una predicción cacheada en O(1)"""
+        with self._lock:
+            entry = self._entries.get((tick_timestamp, model_version, hours_ahead))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, tick_timestamp: str, model_version: Optional[str], hours_ahead: int, prediction: Dict):
+        """Guardar una predicción; las entradas de otros ticks/versiones quedan obsoletas"""
+        if 'error' in prediction:
+            return
+        with self._lock:
+            self._drop_stale(tick_timestamp, model_version)
+            self._entries[(tick_timestamp, model_version, hours_ahead)] = prediction
+
+    def on_new_tick(self, tick_timestamp: str):
+        """Invalidar predicciones de ticks anteriores"""
+        with self._lock:
+            self._entries = {
+                key: value for key, value in self._entries.items() if key[0] == tick_timestamp
+            }
+
+    def invalidate(self):
+        """Invalidar todo (p. ej. tras un cambio de modelo)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _drop_stale(self, tick_timestamp: str, model_version: Optional[str]):
+        self._entries = {
+            key: value for key, value in self._entries.items()
+            if key[0] == tick_timestamp and key[1] == model_version
+        }
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -10,31 +10,101 @@ import logging
 from typing import Dict, List, Optional, Tuple
 import pickle
 import os
+import copy
+import threading
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
-from sklearn.model_selection import train_test_split, TimeSeriesSplit
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
 from sklearn.pipeline import Pipeline
+from app.core.online_predictor import OnlineHelioBioPredictor
+from app.core.tree_compiler import CompiledTreeEnsemble, compile_models
+from app.core.model_compaction import ModelCompactor
+from app.core.retraining_policy import RetrainingPolicy
 import warnings
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# Horizontes de predicción directa (horas)
+PREDICTION_HORIZONS = [1, 3, 6, 12, 24]
+
+# Hiperparámetros por defecto (sobrescritos por advanced_tuning.json si existe)
+DEFAULT_MODEL_PARAMS = {
+    'random_forest_advanced': {'n_estimators': 200, 'max_depth': 15, 'min_samples_split': 5, 'min_samples_leaf': 2},
+    'gradient_boosting': {'n_estimators': 100, 'max_depth': 6, 'learning_rate': 0.1},
+    'poly_ridge': {'alpha': 1.0}
+}
+
+def build_model(name: str, params: Optional[Dict] = None):
+    """Construir un estimador de la familia indicada con sus hiperparámetros"""
+    params = {**DEFAULT_MODEL_PARAMS[name], **(params or {})}
+    
+    if name == 'random_forest_advanced':
+        return RandomForestRegressor(random_state=42, n_jobs=-1, **params)
+    elif name == 'gradient_boosting':
+        return GradientBoostingRegressor(random_state=42, **params)
+    elif name == 'poly_ridge':
+        return Pipeline([
+            ('poly', PolynomialFeatures(degree=2, include_bias=False)),
+            ('ridge', Ridge(**params))
+        ])
+    raise ValueError(f"Familia de modelo desconocida: {name}")
+
 class AdvancedHelioBioPredictor:
     """Motor de predicción avanzado para resonancia solar-social - VERSIÓN CORREGIDA"""
     
+    # Ventana deslizante de las features y puntos mínimos para calcularlas
+    FEATURE_WINDOW_SIZE = 5
+    MIN_FEATURE_POINTS = 20
+    # Fallback sin modelos: tendencia de los últimos puntos y techo de confianza
+    BASELINE_WINDOW = 24
+    BASELINE_MAX_CONFIDENCE = 0.3
+    
     def __init__(self, model_path: str = "data/models/"):
         self.model_path = model_path
         self.models = {}
         self.scalers = {}
         self.feature_names = []
+        self.horizon_models = {}
+        self.horizons = []
+        self.horizon_metrics = {}
+        # Versiones aplanadas (arrays numpy) de los ensembles de árboles
+        self.compiled_models = {}
+        self.compiled_horizon_models = {}
+        # Compactación: presupuesto de latencia por fila y variantes medidas
+        self.compaction_latency_budget_ms = 1.0
+        # Repeticiones de la medida de latencia al entrenar (0: solo con profile_compaction)
+        self.compaction_latency_runs = 0
+        self.compaction_report = {}
+        self._compaction_variants = {}
         self.is_trained = False
+        self.model_version = None
         self.performance_metrics = {}
         self.training_history = []
+        # Importancia de características calculada una vez por versión de modelo
+        self.feature_importance = {}
+        # Holdout del último entrenamiento (filas sin escalar o rango del feature store) y su versión
+        self.holdout = {}
+        # Contribuciones por predicción (top-k con signo; 0 desactiva)
+        self.explain_top_k = 5
+        # Re-entrenamiento incremental: huella de la última ventana y estado de warm-start
+        self.retraining_policy = RetrainingPolicy()
+        self.training_state = {}
+        # Un entrenamiento a la vez; el estado servido se sustituye de una vez bajo _serving_lock
+        self._training_lock = threading.Lock()
+        self._serving_lock = threading.RLock()
         
         # Crear directorio de modelos si no existe
         os.makedirs(model_path, exist_ok=True)
+        
+        # Aprendiz incremental que corre junto al ensemble batch
+        self.online_predictor = OnlineHelioBioPredictor(model_path)
+        
+        # Feature store persistente y muestreador acotado (opcionales, asignados por la aplicación)
+        self.feature_store = None
+        self.training_sampler = None
     
     def load_models(self):
         """Cargar modelos avanzados pre-entrenados - MÉTODO AÑADIDO"""
@@ -45,26 +115,50 @@ class AdvancedHelioBioPredictor:
                 with open(scaler_path, 'rb') as f:
                     self.scalers['advanced'] = pickle.load(f)
             
-            # Cargar modelos
-            model_files = {
-                'random_forest_advanced': 'advanced_random_forest_advanced.pkl',
-                'gradient_boosting': 'advanced_gradient_boosting.pkl',
-                'poly_ridge': 'advanced_poly_ridge.pkl'
-            }
-            
-            for name, filename in model_files.items():
-                model_path = os.path.join(self.model_path, filename)
-                if os.path.exists(model_path):
-                    with open(model_path, 'rb') as f:
-                        self.models[name] = pickle.load(f)
-            
             # Cargar información
+            info = {}
             info_path = os.path.join(self.model_path, "advanced_training_info.json")
             if os.path.exists(info_path):
                 with open(info_path, 'r') as f:
                     info = json.load(f)
                     self.performance_metrics = info.get('performance_metrics', {})
                     self.feature_names = info.get('feature_names', [])
+                    self.model_version = info.get('model_version', info.get('training_date'))
+                    self.training_state = info.get('training_state', {})
+                    importance = info.get('feature_importance', {})
+                    if importance.get('model_version') == self.model_version:
+                        self.feature_importance = importance
+            
+            # Cargar modelos (los nombres guardados dependen del modo de entrenamiento)
+            model_names = info.get('model_names', ['random_forest_advanced', 'gradient_boosting', 'poly_ridge'])
+            model_files = {name: f'advanced_{name}.pkl' for name in model_names}
+            
+            for name, filename in model_files.items():
+                model_path = os.path.join(self.model_path, filename)
+                if os.path.exists(model_path):
+                    with open(model_path, 'rb') as f:
+                        self.models[name] = pickle.load(f)
+            
+            # Cargar modelos multi-horizonte
+            horizon_path = os.path.join(self.model_path, "advanced_horizon_models.pkl")
+            if os.path.exists(horizon_path):
+                with open(horizon_path, 'rb') as f:
+                    horizon_bundle = pickle.load(f)
+                self.horizon_models = horizon_bundle.get('models', {})
+                self.horizons = horizon_bundle.get('horizons', [])
+                self.horizon_metrics = horizon_bundle.get('metrics', {})
+            
+            holdout_path = os.path.join(self.model_path, "advanced_holdout.npz")
+            if os.path.exists(holdout_path):
+                with np.load(holdout_path) as arrays:
+                    holdout = {key: arrays[key] for key in arrays.files}
+                holdout['model_version'] = str(holdout['model_version'])
+                if holdout['model_version'] == self.model_version:
+                    self.holdout = holdout
+            
+            self.online_predictor.load_checkpoint()
+            self._compile_tree_models()
+            self._restore_compact_models()
             
             self.is_trained = len(self.models) > 0
             logger.info(f"✅ Modelos avanzados cargados - Total: {len(self.models)}")
@@ -75,21 +169,27 @@ class AdvancedHelioBioPredictor:
 
     def prepare_advanced_features(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """Preparar características avanzadas con ingeniería de features"""
-        if len(historical_data) < 20:
+        X_all, resonance, feature_names = self._build_feature_matrix(historical_data)
+
+        # Objetivo: resonancia del siguiente punto
+        return X_all[:-1], resonance[1:], feature_names
+
+    def _build_feature_matrix(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Construir una fila de características por punto (incluido el último) y su resonancia"""
+        if len(historical_data) < self.MIN_FEATURE_POINTS:
             raise ValueError("Se necesitan al menos 20 puntos para entrenamiento avanzado")
-        
+
         features = []
-        targets = []
+        resonance_rows = []
         feature_names = []
-        
+
         # Usar ventana deslizante para características temporales
-        window_size = 5
-        
-        for i in range(window_size, len(historical_data) - 1):
+        window_size = self.FEATURE_WINDOW_SIZE
+
+        for i in range(window_size, len(historical_data)):
             window = historical_data[i-window_size:i]
             current = historical_data[i]
-            next_point = historical_data[i + 1]
-            
+
             # Características solares avanzadas
             sunspots_window = [p['solar'].get('sunspot_number', 0) for p in window]
             flares_window = [p['solar'].get('flare_activity', 0) for p in window]
@@ -156,7 +256,7 @@ class AdvancedHelioBioPredictor:
                             interaction_features)
             
             features.append(feature_vector)
-            targets.append(next_point['resonance'])
+            resonance_rows.append(current['resonance'])
         
         # Nombres de características para debugging
         feature_names = (
@@ -168,88 +268,626 @@ class AdvancedHelioBioPredictor:
             [f'hour', f'minute', f'weekday', f'day_norm', f'month_norm'] +
             [f'interaction_1', f'interaction_2', f'interaction_3']
         )
+
+        return np.array(features), np.array(resonance_rows), feature_names
+
+    def process_tick(self, historical_data: List[Dict]) -> Dict:
+        """Procesar el último tick: persistir sus features y actualizar el predictor online"""
+        try:
+            if self.feature_store is not None:
+                row = self.feature_store.append_tick(historical_data[-1])
+            elif len(historical_data) >= self.MIN_FEATURE_POINTS:
+                # Solo la ventana mínima necesaria para la fila del último punto
+                X_recent, _, _ = self._build_feature_matrix(historical_data[-self.MIN_FEATURE_POINTS:])
+                row = X_recent[-1]
+            else:
+                row = None
+            
+            if row is None:
+                return self.online_predictor.get_info()
+            return self.online_predictor.update(row, historical_data[-1]['resonance'])
+        except Exception as e:
+            logger.error(f"❌ Error procesando tick: {e}")
+            return {"error": str(e)}
+    
+    def _training_matrix(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray]:
+        """Features de entrenamiento: del feature store si cubre más historia, si no desde los dicts"""
+        store = self.feature_store
+        if store is not None and store.n_rows > len(historical_data) - self.FEATURE_WINDOW_SIZE:
+            timestamps, X_all, resonance_rows, feature_names = store.load_matrix()
+            return X_all, np.asarray(resonance_rows), feature_names, np.asarray(timestamps)
         
-        return np.array(features), np.array(targets), feature_names
+        X_all, resonance_rows, feature_names = self._build_feature_matrix(historical_data)
+        timestamps = np.array([
+            datetime.fromisoformat(p['timestamp']).timestamp()
+            for p in historical_data[self.FEATURE_WINDOW_SIZE:]
+        ])
+        return X_all, resonance_rows, feature_names, timestamps
     
-    def train_advanced_models(self, historical_data: List[Dict]) -> Dict:
-        """Entrenar múltiples modelos avanzados de ML"""
+    def _training_rows(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str], np.ndarray]:
+        """
+        Filas de entrenamiento, serie de resonancia contigua, índice de cada fila en
+        ella, nombres y timestamps. Con muestreador y un store mayor que su
+        presupuesto solo se leen las filas muestreadas
+        """
+        store, sampler = self.feature_store, self.training_sampler
+        if (sampler is not None and store is not None and store.n_rows > sampler.row_budget
+                and store.n_rows > len(historical_data) - self.FEATURE_WINDOW_SIZE):
+            rows = sampler.sample_indices()
+            feature_names = store.meta.get('feature_names', [])
+            X = np.column_stack([store.column(name)[rows] for name in feature_names])
+            return X, store.column('resonance'), rows, feature_names, store.column('timestamp')
+        
+        X_all, resonance_rows, feature_names, timestamps = self._training_matrix(historical_data)
+        return X_all, resonance_rows, np.arange(len(X_all)), feature_names, timestamps
+    
+    def _estimate_tick_seconds(self, timestamps: np.ndarray) -> float:
+        """Estimar el intervalo entre ticks (mediana) a partir de los timestamps"""
+        deltas = np.diff(np.asarray(timestamps, dtype=float))
+        deltas = deltas[deltas > 0]
+        if len(deltas) > 0:
+            return float(np.median(deltas))
+        return 60.0
+
+    def _build_horizon_targets(self, resonance: np.ndarray, steps: List[int],
+                               rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Objetivos multi-horizonte mediante desplazamientos vectorizados (NaN fuera de rango)"""
+        n = len(resonance)
+        rows = np.arange(n) if rows is None else np.asarray(rows)
+        target_index = rows[:, None] + np.asarray(steps)[None, :]
+        valid = target_index < n
+        return np.where(valid, resonance[np.minimum(target_index, n - 1)], np.nan)
+
+    def _train_horizon_models(self, X: np.ndarray, resonance: np.ndarray, tick_seconds: float, scaler,
+                              row_timestamps: np.ndarray, warm_start_fraction: Optional[float] = None,
+                              rows: Optional[np.ndarray] = None) -> Tuple[Dict, List[int], Dict, Optional[float]]:
+        """
+        Entrenar modelos multi-salida para todos los horizontes en un solo ajuste (sin
+        tocar los servidos). Devuelve modelos, horizontes, métricas y el timestamp de
+        la última fila ajustada
+        """
+        min_samples = 15
+        rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+        horizons, steps = [], []
+        for horizon in PREDICTION_HORIZONS:
+            step = max(1, int(round(horizon * 3600 / tick_seconds)))
+            # Un horizonte es entrenable si deja suficientes filas con objetivo
+            if np.count_nonzero(rows + step < len(resonance)) >= min_samples:
+                horizons.append(horizon)
+                steps.append(step)
+
+        if not horizons:
+            return {}, [], {"error": "Historial insuficiente para horizontes directos"}, None
+
+        Y = self._build_horizon_targets(resonance, steps, rows)
+        complete = ~np.isnan(Y).any(axis=1)
+        X_h, Y_h = X[complete], Y[complete]
+        timestamps_h = np.asarray(row_timestamps)[complete]
+
+        warm_start = warm_start_fraction is not None and horizons == self.horizons and self.horizon_models
+        if warm_start:
+            fitted_until = self.training_state.get('horizon_fitted_until', self.training_state['last_timestamp'])
+            increment_start, split_point = self.retraining_policy.warm_start_split(timestamps_h, fitted_until)
+        else:
+            increment_start, split_point = 0, int(0.8 * len(X_h))
+        X_train = scaler.transform(X_h[:split_point])
+        X_test = scaler.transform(X_h[split_point:])
+        Y_train, Y_test = Y_h[:split_point], Y_h[split_point:]
+
+        if warm_start:
+            # Mismos horizontes: ampliar una copia de los ensembles servidos
+            horizon_models = copy.deepcopy(self.horizon_models)
+            self._warm_start_models(horizon_models, X_train, Y_train, warm_start_fraction, increment_start)
+        else:
+            model_params = self._load_tuned_params()
+            horizon_models = {
+                name: build_model(name, model_params.get(name))
+                for name in ('random_forest_advanced', 'poly_ridge')
+            }
+            for model in horizon_models.values():
+                model.fit(X_train, Y_train)
+
+        metrics = {'horizons': horizons, 'steps': steps, 'tick_seconds': tick_seconds}
+        for name, model in horizon_models.items():
+            Y_pred = model.predict(X_test).reshape(len(X_test), len(horizons))
+            metrics[f'{name}_r2'] = r2_score(Y_test, Y_pred, multioutput='raw_values').tolist()
+            metrics[f'{name}_mae'] = np.mean(np.abs(Y_test - Y_pred), axis=0).tolist()
+
+        return horizon_models, horizons, metrics, float(timestamps_h[split_point - 1])
+
+    def _predict_horizon_matrix(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Predecir todos los horizontes de un lote con una única inferencia por modelo (n, H)"""
+        predictions = []
+        weights = []
+        for name, model in self.horizon_models.items():
+            model = self.compiled_horizon_models.get(name, model)
+            predictions.append(np.asarray(model.predict(X_scaled)).reshape(len(X_scaled), len(self.horizons)))
+            r2_values = self.horizon_metrics.get(f'{name}_r2', [0.0] * len(self.horizons))
+            weights.append(np.clip(np.nan_to_num(np.asarray(r2_values, dtype=float)), 0.0, None))
+
+        predictions = np.stack(predictions)
+        weights = np.vstack(weights)
+        # Sin modelo con R² positivo en un horizonte: promedio simple
+        weights[:, weights.sum(axis=0) == 0] = 1.0
+        combined = (predictions * weights[:, None, :]).sum(axis=0) / weights.sum(axis=0)
+        return np.clip(combined, 0.0, 1.0)
+
+    def _predict_horizons(self, X_current_scaled: np.ndarray, hours_ahead: int) -> Dict[str, float]:
+        """Predicciones directas multi-horizonte para una fila"""
+        if not self.horizon_models:
+            return {}
+        combined = self._predict_horizon_matrix(X_current_scaled)[0]
+        return {
+            f"{horizon}_hour": float(value)
+            for horizon, value in zip(self.horizons, combined)
+            if horizon <= hours_ahead
+        }
+
+    def _fast_model(self) -> Tuple[Optional[str], object]:
+        """Modelo más preciso entre los baratos de evaluar: ensembles aplanados o lineales"""
+        candidates = dict(self.compiled_models)
+        candidates.update({
+            name: model for name, model in self.models.items()
+            if not hasattr(model, 'estimators_') and not hasattr(model, '_predictors')
+        })
+        if not candidates:
+            return None, None
+        name = max(candidates, key=lambda n: self._serving_r2(n, 0.0))
+        return name, candidates[name]
+
+    def predict_fast(self, current_data: Dict, historical_context: List[Dict], hours_ahead: int = 6) -> Dict:
+        """Predicción de baja latencia: solo la ventana mínima y un único modelo compacto"""
+        if not self.is_trained:
+            return {"error": "Modelos no entrenados"}
+
+        try:
+            X_current = self._current_feature_row(current_data, historical_context).reshape(1, -1)
+            with self._serving_lock:
+                name, model = self._fast_model()
+                if model is None:
+                    return {"error": "No hay modelo compacto disponible"}
+                X_current_scaled = self.scalers['advanced'].transform(X_current)
+                prediction = float(np.clip(model.predict(X_current_scaled)[0], 0.0, 1.0))
+                confidence = self._serving_r2(name)
+                return self._prediction_response(
+                    current_data, prediction, confidence, name,
+                    model_predictions={name: prediction},
+                    model_confidences={name: confidence},
+                    horizon_predictions=self._predict_horizons(X_current_scaled, hours_ahead),
+                    online_prediction=self.online_predictor.predict(X_current[0]),
+                    feature_importance=self._top_feature_importance()
+                )
+        except Exception as e:
+            logger.error(f"❌ Error en predicción rápida: {e}")
+            return {"error": str(e), "engine_version": "AdvancedML v1.1"}
+
+    def predict_baseline(self, current_data: Dict, historical_context: List[Dict], hours_ahead: int = 6) -> Dict:
+        """
+        Fallback determinista sin modelos: tendencia lineal de la resonancia reciente
+        anclada en el valor actual (persistencia con menos de 3 puntos). La confianza
+        es el R² del ajuste acotado a BASELINE_MAX_CONFIDENCE
+        """
+        current_resonance = float(current_data.get('resonance', 0))
+        slope, confidence, tick_hours = 0.0, 0.0, 1.0
+        try:
+            current_time = datetime.fromisoformat(current_data['timestamp'])
+            points = [
+                p for p in historical_context[-self.BASELINE_WINDOW:]
+                if datetime.fromisoformat(p['timestamp']) < current_time
+            ] + [current_data]
+            hours = np.array([
+                (datetime.fromisoformat(p['timestamp']) - current_time).total_seconds() / 3600 for p in points
+            ])
+            resonance = np.array([p.get('resonance', 0) for p in points], dtype=float)
+            if len(points) >= 3 and np.ptp(hours) > 0:
+                slope, intercept = np.polyfit(hours, resonance, 1)
+                total_ss = float(np.sum((resonance - resonance.mean()) ** 2))
+                residual_ss = float(np.sum((resonance - intercept - slope * hours) ** 2))
+                r2 = 1 - residual_ss / total_ss if total_ss > 0 else 0.0
+                confidence = self.BASELINE_MAX_CONFIDENCE * max(0.0, r2)
+                tick_hours = self._estimate_tick_seconds(hours * 3600) / 3600
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️  Tendencia no disponible, usando persistencia: {e}")
+
+        def extrapolate(h: float) -> float:
+            return float(np.clip(current_resonance + slope * h, 0.0, 1.0))
+
+        prediction = extrapolate(tick_hours)
+        return self._prediction_response(
+            current_data, prediction, confidence, "trend_baseline",
+            model_predictions={"trend_baseline": prediction},
+            model_confidences={"trend_baseline": confidence},
+            horizon_predictions={
+                f"{horizon}_hour": extrapolate(horizon) for horizon in PREDICTION_HORIZONS if horizon <= hours_ahead
+            },
+            prediction_quality="POOR"
+        )
+
+    def _prediction_response(self, current_data: Dict, prediction: float, confidence: float, model: str,
+                             model_predictions: Dict[str, float], model_confidences: Dict[str, float],
+                             horizon_predictions: Dict[str, float], online_prediction: Optional[float] = None,
+                             feature_importance: Optional[Dict] = None, contributions: Optional[List[Dict]] = None,
+                             prediction_quality: Optional[str] = None) -> Dict:
+        """Formato común: todos los niveles de la cascada responden con las mismas claves"""
+        current_resonance = current_data.get('resonance', 0)
+        return {
+            "current_resonance": current_resonance,
+            "predicted_resonance": prediction,
+            "confidence": confidence,
+            "model": model,
+            "model_predictions": model_predictions,
+            "model_confidences": model_confidences,
+            "best_model": self.performance_metrics.get('best_model', 'unknown'),
+            "horizon_predictions": horizon_predictions,
+            # Predicción del aprendiz online (siguiente tick)
+            "online_prediction": online_prediction,
+            "feature_importance": feature_importance if feature_importance is not None else {"analysis": "no disponible"},
+            "contributions": contributions or [],
+            "trend": "increasing" if prediction > current_resonance else "decreasing",
+            "trend_strength": abs(prediction - current_resonance),
+            "risk_level": self._calculate_advanced_risk(prediction, current_data),
+            "prediction_quality": prediction_quality or self._assess_prediction_quality(prediction),
+            "timestamp": datetime.utcnow().isoformat(),
+            "engine_version": "AdvancedML v1.1"
+        }
+
+    def train_advanced_models(self, historical_data: List[Dict], refit: str = 'full') -> Dict:
+        """Entrenar múltiples modelos avanzados de ML (refit='auto' aplica la política de re-entrenamiento)"""
+        with self._training_lock:
+            return self._train_advanced_models(historical_data, refit)
+    
+    def _train_advanced_models(self, historical_data: List[Dict], refit: str) -> Dict:
+        """Ajustar sobre objetos locales y publicarlos de una vez: los modelos servidos no se tocan mientras tanto"""
         logger.info("🔮 Entrenando modelos avanzados de predicción heliobiológica...")
         
         try:
-            # Preparar datos avanzados
-            X, y, feature_names = self.prepare_advanced_features(historical_data)
-            self.feature_names = feature_names
+            # Preparar datos avanzados (una sola vez para todos los modelos)
+            X_rows, resonance_rows, rows, feature_names, timestamps = self._training_rows(historical_data)
+            # Objetivo: resonancia del siguiente punto (la última fila no lo tiene)
+            has_target = rows + 1 < len(resonance_rows)
+            X, rows = X_rows[has_target], rows[has_target]
+            y = np.asarray(resonance_rows[rows + 1])
+            row_timestamps = np.asarray(timestamps[rows])
             
             if len(X) < 15:
                 logger.warning("Datos insuficientes para entrenamiento avanzado")
                 return {"error": "Datos insuficientes", "samples": len(X)}
             
-            # Usar TimeSeriesSplit para validación temporal
-            tscv = TimeSeriesSplit(n_splits=min(5, len(X) // 10))
+            fingerprint = RetrainingPolicy.fingerprint(row_timestamps, X, y)
+            if refit == 'auto':
+                action, reason, new_fraction = self.retraining_policy.decide(
+                    self, fingerprint, row_timestamps, X, y, feature_names
+                )
+            else:
+                action, reason, new_fraction = 'full', "refit completo solicitado", 1.0
+            
+            if action == 'skip':
+                logger.info(f"⏭️  Re-entrenamiento omitido: {reason}")
+                return {"skipped": True, "training_action": action, "reason": reason}
+            
+            logger.info(f"♻️ Acción de entrenamiento: {action} ({reason})")
             
-            # Dividir datos manteniendo orden temporal
-            split_point = int(0.8 * len(X))
+            # Dividir datos manteniendo orden temporal; en warm-start el holdout sale de
+            # las filas aún no ajustadas y el incremento se ajusta justo antes de él
+            if action == 'full':
+                increment_start, split_point = 0, int(0.8 * len(X))
+            else:
+                fitted_until = self.training_state.get('fitted_until', self.training_state['last_timestamp'])
+                increment_start, split_point = self.retraining_policy.warm_start_split(row_timestamps, fitted_until)
             X_train, X_test = X[:split_point], X[split_point:]
             y_train, y_test = y[:split_point], y[split_point:]
             
-            # Escalar características
-            self.scalers['advanced'] = StandardScaler()
-            X_train_scaled = self.scalers['advanced'].fit_transform(X_train)
-            X_test_scaled = self.scalers['advanced'].transform(X_test)
-            
-            # Modelo 1: Random Forest avanzado
-            self.models['random_forest_advanced'] = RandomForestRegressor(
-                n_estimators=200,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
-            self.models['random_forest_advanced'].fit(X_train_scaled, y_train)
-            
-            # Modelo 2: Gradient Boosting
-            self.models['gradient_boosting'] = GradientBoostingRegressor(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
-                random_state=42
-            )
-            self.models['gradient_boosting'].fit(X_train_scaled, y_train)
+            # Escalar características (en warm-start los árboles existentes exigen el mismo scaler)
+            scaler = StandardScaler().fit(X_train) if action == 'full' else self.scalers['advanced']
+            X_train_scaled = scaler.transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
             
-            # Modelo 3: Ridge Regression con características polinómicas
-            poly_ridge_pipeline = Pipeline([
-                ('poly', PolynomialFeatures(degree=2, include_bias=False)),
-                ('ridge', Ridge(alpha=1.0))
-            ])
-            self.models['poly_ridge'] = poly_ridge_pipeline
-            self.models['poly_ridge'].fit(X_train_scaled, y_train)
+            if action == 'full':
+                # Hiperparámetros ganadores de la búsqueda walk-forward (si existen)
+                model_params = self._load_tuned_params()
+                models = {}
+                
+                # Modelo 1: Random Forest avanzado
+                models['random_forest_advanced'] = build_model('random_forest_advanced', model_params.get('random_forest_advanced'))
+                models['random_forest_advanced'].fit(X_train_scaled, y_train)
+                
+                # Modelo 2: Gradient Boosting
+                models['gradient_boosting'] = build_model('gradient_boosting', model_params.get('gradient_boosting'))
+                models['gradient_boosting'].fit(X_train_scaled, y_train)
+                
+                # Modelo 3: Ridge Regression con características polinómicas
+                models['poly_ridge'] = build_model('poly_ridge', model_params.get('poly_ridge'))
+                models['poly_ridge'].fit(X_train_scaled, y_train)
+            else:
+                # Se amplía una copia: los ensembles servidos siguen intactos hasta publicar
+                models = copy.deepcopy(self.models)
+                self._warm_start_models(models, X_train_scaled, y_train, new_fraction, increment_start)
             
             # Evaluar modelos con múltiples métricas
-            self.performance_metrics = self._evaluate_advanced_models(X_test_scaled, y_test)
+            performance_metrics = self._evaluate_advanced_models(models, X_test_scaled, y_test)
+            
+            # Modelos directos multi-horizonte (una sola salida por horizonte)
+            tick_seconds = self._estimate_tick_seconds(timestamps[-10_000:])
+            horizon_models, horizons, horizon_metrics, horizon_fitted_until = self._train_horizon_models(
+                X, resonance_rows, tick_seconds, scaler, row_timestamps,
+                warm_start_fraction=new_fraction if action == 'warm_start' else None,
+                rows=rows
+            )
+            performance_metrics['horizon_metrics'] = horizon_metrics
+            performance_metrics['training_action'] = action
+            performance_metrics['training_reason'] = reason
+            
+            # Nueva versión de modelo: invalida cachés dependientes
+            model_version = datetime.utcnow().isoformat()
+            
+            # Ensembles aplanados y compactación bajo presupuesto de latencia
+            compiled_models = compile_models(models)
+            compaction_report, compaction_variants, serving_r2 = self._compact_tree_models(
+                models, compiled_models, X_test_scaled, y_test, model_version
+            )
+            if serving_r2:
+                performance_metrics['serving_r2'] = serving_r2
+            
+            self._publish({
+                'scalers': {**self.scalers, 'advanced': scaler},
+                'models': models,
+                'feature_names': feature_names,
+                'horizon_models': horizon_models,
+                'horizons': horizons,
+                'horizon_metrics': horizon_metrics if horizon_models else {},
+                'compiled_models': compiled_models,
+                'compiled_horizon_models': compile_models(horizon_models),
+                'compaction_report': compaction_report,
+                '_compaction_variants': compaction_variants,
+                'performance_metrics': performance_metrics,
+                'model_version': model_version,
+                # Filas exactas de la evaluación: el job de permutación no las recalcula
+                'holdout': {'model_version': model_version, 'X': X_test, 'y': y_test},
+                'feature_importance': self._impurity_importance(models, feature_names, model_version),
+                'training_state': self._next_training_state(
+                    action, reason, fingerprint, row_timestamps, models, model_version,
+                    fitted_until=float(row_timestamps[split_point - 1]),
+                    horizon_fitted_until=horizon_fitted_until
+                )
+            })
             
             # Guardar modelos e información de entrenamiento
             self._save_advanced_models()
             self._save_training_info(X_train.shape[0], X_test.shape[0])
             
-            self.is_trained = True
-            
-            best_r2 = self.performance_metrics.get('best_r2', 0)
+            best_r2 = performance_metrics.get('best_r2', 0)
             logger.info(f"✅ Modelos avanzados entrenados - Mejor R²: {best_r2:.3f}")
             
-            return self.performance_metrics
+            return performance_metrics
             
         except Exception as e:
             logger.error(f"❌ Error entrenando modelos avanzados: {e}")
             return {"error": str(e)}
     
-    def _evaluate_advanced_models(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
+    def _publish(self, state: Dict):
+        """Instalar de una vez el estado entrenado: una predicción ve la versión anterior o la nueva, nunca una mezcla"""
+        with self._serving_lock:
+            for attribute, value in state.items():
+                setattr(self, attribute, value)
+            self.is_trained = True
+    
+    def _warm_start_models(self, models: Dict, X: np.ndarray, y: np.ndarray, new_fraction: float,
+                           increment_start: int = 0):
+        """
+        Añadir árboles / etapas de boosting en proporción a los datos nuevos, ajustados
+        sobre las filas desde increment_start; el resto de modelos se reajusta con todas
+        """
+        base_estimators = self.training_state.get('base_estimators', {})
+        for name, model in models.items():
+            if hasattr(model, 'warm_start') and hasattr(model, 'estimators_'):
+                extra = max(1, int(np.ceil(base_estimators.get(name, model.n_estimators) * new_fraction)))
+                model.set_params(warm_start=True, n_estimators=model.n_estimators + extra)
+                model.fit(X[increment_start:], y[increment_start:])
+                model.set_params(warm_start=False)
+            else:
+                model.fit(X, y)
+
+    def _next_training_state(self, action: str, reason: str, fingerprint: str, row_timestamps: np.ndarray,
+                             models: Dict, model_version: str, fitted_until: float,
+                             horizon_fitted_until: Optional[float]) -> Dict:
+        """Ventana entrenada para la siguiente decisión de la política"""
+        previous = self.training_state
+        full = action == 'full'
+        return {
+            'fingerprint': fingerprint,
+            'last_timestamp': float(np.max(row_timestamps)),
+            # Última fila usada en el ajuste: las posteriores (holdout incluido) siguen sin ver
+            'fitted_until': fitted_until,
+            'horizon_fitted_until': horizon_fitted_until,
+            'last_action': action,
+            'last_reason': reason,
+            'last_full_refit': model_version if full else previous.get('last_full_refit', model_version),
+            'warm_starts_since_full': 0 if full else previous.get('warm_starts_since_full', 0) + 1,
+            'base_estimators': {
+                name: model.n_estimators for name, model in models.items()
+                if hasattr(model, 'estimators_')
+            } if full else previous.get('base_estimators', {})
+        }
+
+    def _compile_tree_models(self):
+        """Aplanar RF/GB para inferencia vectorizada sin overhead de sklearn"""
+        self.compiled_models = compile_models(self.models)
+        self.compiled_horizon_models = compile_models(self.horizon_models)
+    
+    def _compact_tree_models(self, models: Dict, compiled_models: Dict, X_val: np.ndarray, y_val: np.ndarray,
+                             model_version: str) -> Tuple[Dict, Dict, Dict]:
+        """
+        Generar variantes compactas de RF/GB y dejar la elegida en compiled_models.
+        Devuelve informe, variantes y el R² servido de cada modelo en la mitad de
+        informe del holdout (pesos del ensemble)
+        """
+        report, variants = {}, {}
+        if len(X_val) < 4:
+            return report, variants, {}
+        
+        compactor = ModelCompactor(self.compaction_latency_budget_ms, latency_runs=self.compaction_latency_runs)
+        for name in list(compiled_models):
+            try:
+                result = compactor.compact(models[name], X_val, y_val)
+                report[name] = {
+                    'variants': result['variants'],
+                    'selected': result['selected']
+                }
+                variants[name] = result['models']
+                self._use_variant(compiled_models, name, result['model'])
+            except Exception as e:
+                logger.error(f"❌ Error compactando {name}: {e}")
+        
+        report['latency_budget_ms'] = self.compaction_latency_budget_ms
+        report['latency_profiled'] = compactor.latency_runs > 0
+        report['model_version'] = model_version
+        
+        _, _, X_rep, y_rep = ModelCompactor.split_holdout(X_val, y_val)
+        serving_r2 = {
+            name: float(np.nan_to_num(r2_score(y_rep, compiled_models.get(name, model).predict(X_rep))))
+            for name, model in models.items() if name not in report
+        }
+        return report, variants, {**serving_r2, **self._selected_r2(report)}
+    
+    @staticmethod
+    def _selected_r2(report: Dict) -> Dict[str, float]:
+        """R² de la variante servida de cada modelo compactado"""
+        return {
+            name: next(r['val_r2'] for r in entry['variants'] if r['variant'] == entry['selected'])
+            for name, entry in report.items()
+            if isinstance(entry, dict) and 'variants' in entry
+        }
+    
+    def _serving_r2(self, name: str, default: float = 0.5) -> float:
+        """Peso en el ensemble: R² del modelo tal como se sirve (sin compactar si no hay informe)"""
+        serving = self.performance_metrics.get('serving_r2', {})
+        return serving.get(name, self.performance_metrics.get(f'{name}_r2', default))
+    
+    @staticmethod
+    def _use_variant(compiled_models: Dict, name: str, model):
+        """Servir una variante: ensemble aplanado o el modelo sklearn original"""
+        if isinstance(model, CompiledTreeEnsemble):
+            compiled_models[name] = model
+        else:
+            compiled_models.pop(name, None)
+    
+    def select_compact_models(self, latency_budget_ms: float) -> Dict:
+        """Elegir, a partir del último informe, la variante más precisa bajo el presupuesto"""
+        with self._training_lock:
+            if not self.compaction_report:
+                return {"error": "No hay informe de compactación; entrenar primero"}
+            return self._select_variants(ModelCompactor(latency_budget_ms), copy.deepcopy(self.compaction_report))
+    
+    def profile_compaction(self, latency_runs: int = 200) -> Dict:
+        """Job opt-in: medir la latencia de las variantes en memoria y re-elegir bajo el presupuesto vigente"""
+        with self._training_lock:
+            if not self._compaction_variants:
+                return {"error": "No hay variantes de compactación en memoria; entrenar primero"}
+            
+            logger.info(f"⏱️  Midiendo latencia de variantes compactas ({latency_runs} repeticiones)...")
+            compactor = ModelCompactor(self.compaction_latency_budget_ms, latency_runs=latency_runs)
+            x = np.zeros((1, len(self.feature_names)))  # features escaladas: media 0
+            report = copy.deepcopy(self.compaction_report)
+            for name, variants in self._compaction_variants.items():
+                if name in report:
+                    report[name]['variants'] = compactor.profile(variants, report[name]['variants'], x)
+            report['latency_profiled'] = True
+            return self._select_variants(compactor, report)
+    
+    def _select_variants(self, compactor: ModelCompactor, report: Dict) -> Dict:
+        """Elegir variante por modelo en el informe dado y publicar selección y pesos"""
+        compiled_models = dict(self.compiled_models)
+        selected = {}
+        for name, entry in report.items():
+            if not isinstance(entry, dict) or 'variants' not in entry:
+                continue
+            variant = compactor.select(entry['variants'])
+            if variant != entry['selected']:
+                model = self._load_variant(name, variant)
+                if model is None:
+                    return {"error": f"Variante {variant} de {name} no disponible en memoria"}
+                self._use_variant(compiled_models, name, model)
+                entry['selected'] = variant
+            selected[name] = variant
+        
+        report['latency_budget_ms'] = compactor.latency_budget_ms
+        serving_r2 = {**self.performance_metrics.get('serving_r2', {}), **self._selected_r2(report)}
+        with self._serving_lock:
+            self.compiled_models = compiled_models
+            self.compaction_report = report
+            self.compaction_latency_budget_ms = compactor.latency_budget_ms
+            self.performance_metrics = {**self.performance_metrics, 'serving_r2': serving_r2}
+        self._save_compaction()
+        self._save_model_info()
+        return {
+            "latency_budget_ms": compactor.latency_budget_ms,
+            "latency_profiled": report.get('latency_profiled', False),
+            "selected": selected
+        }
+    
+    def _load_variant(self, name: str, variant: str):
+        """Reconstruir una variante concreta (requiere los datos de validación en memoria)"""
+        return self._compaction_variants.get(name, {}).get(variant)
+    
+    def _restore_compact_models(self):
+        """Restaurar la selección de compactación guardada para esta versión de modelo"""
+        report_path = os.path.join(self.model_path, "advanced_compaction_report.json")
+        if not os.path.exists(report_path):
+            return
+        try:
+            with open(report_path, 'r') as f:
+                report = json.load(f)
+            if report.get('model_version') != self.model_version:
+                return
+            self.compaction_report = report
+            self.compaction_latency_budget_ms = report.get('latency_budget_ms', self.compaction_latency_budget_ms)
+            for name, entry in report.items():
+                if not isinstance(entry, dict) or 'selected' not in entry:
+                    continue
+                compiled_path = os.path.join(self.model_path, f"advanced_compiled_{name}.npz")
+                if entry['selected'] == 'sklearn':
+                    self.compiled_models.pop(name, None)
+                elif os.path.exists(compiled_path):
+                    self.compiled_models[name] = CompiledTreeEnsemble.load(compiled_path)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo restaurar la compactación: {e}")
+    
+    def _save_compaction(self):
+        """Persistir informe y modelos servidos tras la compactación"""
+        for name, compiled in self.compiled_models.items():
+            compiled.save(os.path.join(self.model_path, f"advanced_compiled_{name}.npz"))
+        report_path = os.path.join(self.model_path, "advanced_compaction_report.json")
+        with open(report_path, 'w') as f:
+            json.dump(self.compaction_report, f, indent=2, default=float)
+    
+    def holdout_matrix(self, holdout: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Filas sin escalar y objetivo del holdout guardado (en memoria o rango del feature store)"""
+        if 'store_rows' not in holdout:
+            return np.asarray(holdout['X']), np.asarray(holdout['y'], dtype=float)
+        start, stop = (int(v) for v in holdout['store_rows'])
+        store = self.feature_store
+        X = np.column_stack([store.column(name)[start:stop] for name in store.meta.get('feature_names', [])])
+        return X, np.asarray(store.column('resonance')[start + 1:stop + 1], dtype=float)
+    
+    def _load_tuned_params(self) -> Dict[str, Dict]:
+        """Leer la configuración ganadora persistida por el job de tuning"""
+        tuning_path = os.path.join(self.model_path, "advanced_tuning.json")
+        if not os.path.exists(tuning_path):
+            return {}
+        try:
+            with open(tuning_path, 'r') as f:
+                return json.load(f).get('best_params', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Configuración de tuning ilegible, usando valores por defecto: {e}")
+            return {}
+    
+    def _evaluate_advanced_models(self, models: Dict, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
         """Evaluación avanzada de modelos"""
         metrics = {}
         best_r2 = -1
         best_model = None
         
-        for name, model in self.models.items():
+        for name, model in models.items():
             try:
                 y_pred = model.predict(X_test)
                 
@@ -273,96 +911,170 @@ class AdvancedHelioBioPredictor:
         
         return metrics
     
+    def _current_feature_row(self, current_data: Dict, historical_context: List[Dict]) -> np.ndarray:
+        """Fila de características del punto actual (solo la ventana mínima necesaria)"""
+        window = historical_context[-(self.MIN_FEATURE_POINTS - 1):] + [current_data]
+        X_window, _, _ = self._build_feature_matrix(window)
+        return X_window[-1]
+
+    def _predict_rows(self, X_rows: np.ndarray, current_resonance: np.ndarray) -> Dict:
+        """Inferencia vectorizada: una llamada predict por modelo para todo el lote"""
+        X_scaled = self.scalers['advanced'].transform(X_rows)
+        
+        model_predictions = {}
+        model_confidences = {}
+        for name, model in self.models.items():
+            try:
+                model = self.compiled_models.get(name, model)
+                model_predictions[name] = np.clip(np.asarray(model.predict(X_scaled), dtype=float), 0.0, 1.0)
+                model_confidences[name] = self._serving_r2(name)
+            except Exception as e:
+                logger.error(f"Error en predicción con {name}: {e}")
+                model_predictions[name] = np.asarray(current_resonance, dtype=float)
+                model_confidences[name] = 0.3
+        
+        # Predicción ensemble (promedio ponderado por R²)
+        total_confidence = sum(model_confidences.values())
+        if total_confidence > 0:
+            ensemble = sum(
+                model_predictions[name] * model_confidences[name] for name in model_predictions
+            ) / total_confidence
+        else:
+            ensemble = sum(model_predictions.values()) / len(model_predictions)
+        
+        return {
+            'scaled': X_scaled,
+            'model_predictions': model_predictions,
+            'model_confidences': model_confidences,
+            'total_confidence': total_confidence,
+            'ensemble': np.clip(ensemble, 0.0, 1.0),
+            'horizons': self._predict_horizon_matrix(X_scaled) if self.horizon_models else None,
+            'contributions': self._explain_rows(X_scaled, model_confidences) if self.explain_top_k else None
+        }
+
+    def _explain_rows(self, X_scaled: np.ndarray, model_confidences: Dict[str, float]) -> Optional[np.ndarray]:
+        """Contribuciones por camino de los ensembles de árboles, ponderadas como en el ensemble"""
+        total_confidence = sum(model_confidences.values())
+        contributions = None
+        for name, compiled in self.compiled_models.items():
+            if name not in model_confidences:
+                continue
+            weight = model_confidences[name] / total_confidence if total_confidence > 0 else 1.0 / len(model_confidences)
+            _, model_contributions = compiled.contributions(X_scaled)
+            contributions = weight * model_contributions if contributions is None else contributions + weight * model_contributions
+        return contributions
+
+    def _top_contributions(self, contributions: Optional[np.ndarray], i: int) -> List[Dict]:
+        """Top-k contribuciones con signo de la fila i (por valor absoluto)"""
+        if contributions is None:
+            return []
+        row = contributions[i]
+        top = np.argsort(-np.abs(row))[:self.explain_top_k]
+        return [
+            {"feature": self.feature_names[j], "contribution": float(row[j])}
+            for j in top if j < len(self.feature_names) and row[j] != 0
+        ]
+
+    def _top_feature_importance(self) -> Dict:
+        """Top de importancia precalculado para la versión de modelo servida"""
+        if self.feature_importance.get('model_version') != self.model_version:
+            return {"analysis": "no disponible"}
+        return self.feature_importance.get('top', {})
+
+    def _impurity_importance(self, models: Dict, feature_names: List[str], model_version: str) -> Dict:
+        """Importancia por impureza (una vez por versión) promediada sobre los ensembles de árboles"""
+        importances = [
+            model.feature_importances_ for model in models.values()
+            if hasattr(model, 'feature_importances_')
+        ]
+        feature_importance = {'model_version': model_version}
+        if importances:
+            mean_importance = np.mean(importances, axis=0)
+            feature_importance['impurity'] = dict(zip(feature_names, map(float, mean_importance)))
+            feature_importance['top'] = self._top_importance(feature_importance['impurity'])
+        return feature_importance
+
+    def set_permutation_importance(self, result: Dict):
+        """Instalar el resultado del job de permutación y persistirlo en el manifiesto"""
+        with self._training_lock:
+            if result.get('model_version') != self.model_version:
+                raise ValueError("La importancia por permutación corresponde a otra versión de modelo")
+            self.feature_importance = {
+                **self.feature_importance,
+                'model_version': self.model_version,
+                'permutation': result,
+                # La permutación es más fiable que la impureza: pasa a ser la servida
+                'top': self._top_importance({name: v['mean'] for name, v in result['importances'].items()})
+            }
+            self._save_model_info()
+
+    @staticmethod
+    def _top_importance(scores: Dict[str, float], top_k: int = 5) -> Dict[str, float]:
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return {name: float(value) for name, value in ranked}
+
+    def _format_prediction(self, batch: Dict, i: int, X_row: np.ndarray, current_data: Dict,
+                           hours_ahead: int, feature_importance: Dict) -> Dict:
+        """Respuesta de la fila i de un lote con el formato de predict_advanced_resonance"""
+        model_confidences = batch['model_confidences']
+        
+        horizon_predictions = {}
+        if batch['horizons'] is not None:
+            horizon_predictions = {
+                f"{horizon}_hour": float(value)
+                for horizon, value in zip(self.horizons, batch['horizons'][i])
+                if horizon <= hours_ahead
+            }
+        
+        return self._prediction_response(
+            current_data, float(batch['ensemble'][i]), batch['total_confidence'] / len(model_confidences), "ensemble",
+            model_predictions={name: float(pred[i]) for name, pred in batch['model_predictions'].items()},
+            model_confidences=model_confidences,
+            horizon_predictions=horizon_predictions,
+            online_prediction=self.online_predictor.predict(X_row),
+            feature_importance=feature_importance,
+            contributions=self._top_contributions(batch['contributions'], i)
+        )
+
     def predict_advanced_resonance(self, current_data: Dict, historical_context: List[Dict], hours_ahead: int = 6) -> Dict:
         """Predicción avanzada usando contexto histórico"""
+        return self.predict_advanced_batch([(current_data, historical_context, hours_ahead)])[0]
+
+    def predict_advanced_batch(self, requests: List[Tuple[Dict, List[Dict], int]]) -> List[Dict]:
+        """Predicción avanzada de un lote de peticiones (current_data, contexto, horizonte)"""
         if not self.is_trained:
-            return {"error": "Modelos no entrenados", "advice": "Ejecutar /api/ml/train primero"}
+            return [{"error": "Modelos no entrenados", "advice": "Ejecutar /api/ml/train primero"}] * len(requests)
         
-        try:
-            # Preparar características para predicción
-            prediction_data = historical_context + [current_data]
-            X_pred, _, _ = self.prepare_advanced_features(prediction_data)
-            
-            if len(X_pred) == 0:
-                return {"error": "No se pudieron generar características para predicción"}
-            
-            # Usar el último punto para predicción
-            X_current = X_pred[-1:]
-
-            # Escalar características
-            X_current_scaled = self.scalers['advanced'].transform(X_current)
-            
-            # Obtener predicciones de todos los modelos
-            model_predictions = {}
-            model_confidences = {}
-            
-            for name, model in self.models.items():
-                try:
-                    prediction = model.predict(X_current_scaled)[0]
-                    model_predictions[name] = max(0.0, min(1.0, prediction))
-                    model_confidences[name] = self.performance_metrics.get(f'{name}_r2', 0.5)
-                except Exception as e:
-                    logger.error(f"Error en predicción con {name}: {e}")
-                    model_predictions[name] = current_data.get('resonance', 0.5)
-                    model_confidences[name] = 0.3
-            
-            # Predicción ensemble (promedio ponderado por R²)
-            total_confidence = sum(model_confidences.values())
-            if total_confidence > 0:
-                ensemble_prediction = sum(
-                    pred * model_confidences[name] 
-                    for name, pred in model_predictions.items()
-                ) / total_confidence
-            else:
-                ensemble_prediction = sum(model_predictions.values()) / len(model_predictions)
-            
-            ensemble_prediction = max(0.0, min(1.0, ensemble_prediction))
-            
-            # Generar predicciones para múltiples horizontes con degradación temporal
-            horizon_predictions = {}
-            time_horizons = [1, 3, 6, 12, 24]
-            
-            for horizon in time_horizons:
-                if horizon <= hours_ahead:
-                    # Degradación más realista basada en volatilidad histórica
-                    time_decay = 1.0 / (1 + 0.08 * horizon + 0.02 * horizon**2)
-                    volatility = self.performance_metrics.get('best_r2', 0.7) * 0.3
-                    
-                    horizon_pred = ensemble_prediction * time_decay + volatility * (np.random.random() - 0.5)
-                    horizon_predictions[f"{horizon}_hour"] = max(0.0, min(1.0, horizon_pred))
-            
-            # Análisis de importancia de características (si está disponible)
-            feature_importance = {}
-            if 'random_forest_advanced' in self.models:
-                try:
-                    importances = self.models['random_forest_advanced'].feature_importances_
-                    top_indices = np.argsort(importances)[-5:][::-1]  # Top 5 características
-                    for idx in top_indices:
-                        if idx < len(self.feature_names):
-                            feature_importance[self.feature_names[idx]] = float(importances[idx])
-                except:
-                    feature_importance = {"analysis": "no disponible"}
-            
-            return {
-                "current_resonance": current_data.get('resonance', 0),
-                "predicted_resonance": ensemble_prediction,
-                "confidence": total_confidence / len(model_confidences),
-                "model_predictions": model_predictions,
-                "model_confidences": model_confidences,
-                "best_model": self.performance_metrics.get('best_model', 'unknown'),
-                "horizon_predictions": horizon_predictions,
-                "feature_importance": feature_importance,
-                "trend": "increasing" if ensemble_prediction > current_data.get('resonance', 0) else "decreasing",
-                "trend_strength": abs(ensemble_prediction - current_data.get('resonance', 0)),
-                "risk_level": self._calculate_advanced_risk(ensemble_prediction, current_data),
-                "prediction_quality": self._assess_prediction_quality(ensemble_prediction),
-                "timestamp": datetime.utcnow().isoformat(),
-                "engine_version": "AdvancedML v1.1"
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Error en predicción avanzada: {e}")
-            return {"error": str(e), "engine_version": "AdvancedML v1.1"}
+        # Características por petición; las que fallan no entran en el lote
+        responses: List[Optional[Dict]] = [None] * len(requests)
+        rows, valid = [], []
+        for i, (current_data, historical_context, _) in enumerate(requests):
+            try:
+                rows.append(self._current_feature_row(current_data, historical_context))
+                valid.append(i)
+            except Exception as e:
+                logger.error(f"❌ Error en predicción avanzada: {e}")
+                responses[i] = {"error": str(e), "engine_version": "AdvancedML v1.1"}
+        
+        if valid:
+            try:
+                X_rows = np.vstack(rows)
+                current_resonance = np.array([requests[i][0].get('resonance', 0.5) for i in valid])
+                # Todo el lote sobre la misma versión publicada (scaler, modelos y métricas)
+                with self._serving_lock:
+                    batch = self._predict_rows(X_rows, current_resonance)
+                    feature_importance = self._top_feature_importance()
+                    for k, i in enumerate(valid):
+                        current_data, _, hours_ahead = requests[i]
+                        responses[i] = self._format_prediction(
+                            batch, k, X_rows[k], current_data, hours_ahead, feature_importance
+                        )
+            except Exception as e:
+                logger.error(f"❌ Error en predicción avanzada: {e}")
+                for i in valid:
+                    responses[i] = {"error": str(e), "engine_version": "AdvancedML v1.1"}
+        
+        return responses
     
     def _calculate_advanced_risk(self, prediction: float, current_data: Dict) -> str:
         """Cálculo avanzado de riesgo considerando múltiples factores"""
@@ -401,16 +1113,43 @@ class AdvancedHelioBioPredictor:
             with open(model_path, 'wb') as f:
                 pickle.dump(model, f)
         
+        # Guardar modelos multi-horizonte
+        horizon_path = os.path.join(self.model_path, "advanced_horizon_models.pkl")
+        if self.horizon_models:
+            with open(horizon_path, 'wb') as f:
+                pickle.dump({
+                    'models': self.horizon_models,
+                    'horizons': self.horizons,
+                    'metrics': self.horizon_metrics
+                }, f)
+        elif os.path.exists(horizon_path):
+            os.remove(horizon_path)
+        
+        # Exportar ensembles aplanados (servibles sin sklearn) e informe de compactación
+        for name, compiled in self.compiled_horizon_models.items():
+            compiled.save(os.path.join(self.model_path, f"advanced_compiled_horizon_{name}.npz"))
+        self._save_compaction()
+        
+        # Holdout del entrenamiento para el job de permutación
+        np.savez(os.path.join(self.model_path, "advanced_holdout.npz"), **self.holdout)
+        
         # Guardar scaler
         scaler_path = os.path.join(self.model_path, "advanced_scaler.pkl")
         with open(scaler_path, 'wb') as f:
             pickle.dump(self.scalers['advanced'], f)
         
-        # Guardar métricas y información
+        self._save_model_info()
+    
+    def _save_model_info(self):
+        """Guardar el manifiesto del modelo: métricas, features, versión e importancia"""
         advanced_info = {
             'performance_metrics': self.performance_metrics,
             'feature_names': self.feature_names,
-            'training_date': datetime.utcnow().isoformat()
+            'model_names': list(self.models.keys()),
+            'training_date': datetime.utcnow().isoformat(),
+            'model_version': self.model_version,
+            'feature_importance': self.feature_importance,
+            'training_state': self.training_state
         }
         
         info_path = os.path.join(self.model_path, "advanced_training_info.json")
@@ -435,16 +1174,25 @@ class AdvancedHelioBioPredictor:
     
     def get_advanced_model_info(self) -> Dict:
         """Obtener información detallada de los modelos avanzados"""
-        return {
-            "is_trained": self.is_trained,
-            "models_loaded": list(self.models.keys()),
-            "performance_metrics": self.performance_metrics,
-            "feature_count": len(self.feature_names),
-            "training_history_count": len(self.training_history),
-            "best_model": self.performance_metrics.get('best_model', 'unknown'),
-            "best_r2": self.performance_metrics.get('best_r2', 0),
-            "engine_version": "AdvancedML v1.1"
-        }
+        with self._serving_lock:
+            return {
+                "is_trained": self.is_trained,
+                "model_version": self.model_version,
+                "models_loaded": list(self.models.keys()),
+                "performance_metrics": self.performance_metrics,
+                "feature_count": len(self.feature_names),
+                "horizons_trained": self.horizons,
+                "online_learning": self.online_predictor.get_info(),
+                "training_sampler": self.training_sampler.get_info() if self.training_sampler else None,
+                "compaction": {
+                    name: entry['selected'] for name, entry in self.compaction_report.items()
+                    if isinstance(entry, dict) and 'selected' in entry
+                },
+                "training_history_count": len(self.training_history),
+                "best_model": self.performance_metrics.get('best_model', 'unknown'),
+                "best_r2": self.performance_metrics.get('best_r2', 0),
+                "engine_version": "AdvancedML v1.1"
+            }
 
 # Alias para compatibilidad
 HelioBioPredictor = AdvancedHelioBioPredictor
@@ -0,0 +1,110 @@
+"""
+🪜 CASCADA DE PREDICTORES CON PRESUPUESTO DE LATENCIA
+Caché → ensemble completo → modelo compacto → tendencia determinista (siempre
+responde), según el tiempo que quede en cada petición; todos con las mismas claves
+"""
+import numpy as np
+from collections import deque
+import logging
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.prediction_cache import PredictionCache
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+logger = logging.getLogger(__name__)
+
+# Latencia supuesta (ms) de cada nivel hasta tener mediciones reales
+DEFAULT_LATENCY_PRIORS_MS = {'compact': 2.0, 'full': 50.0}
+
+class PredictorCascade:
+    """Elige el nivel más preciso cuya latencia estimada cabe en el presupuesto"""
+
+    # Del más preciso al más barato (el simple, tendencia sin modelos, siempre responde)
+    MODEL_TIERS = ['full', 'compact']
+
+    def __init__(self, predictor: AdvancedHelioBioPredictor, cache: PredictionCache,
+                 latency_window: int = 200, latency_percentile: float = 95.0,
+                 latency_priors_ms: Optional[Dict[str, float]] = None):
+        self.predictor = predictor
+        self.cache = cache
+        self.latency_window = latency_window
+        self.latency_percentile = latency_percentile
+        self.latency_priors_ms = {**DEFAULT_LATENCY_PRIORS_MS, **(latency_priors_ms or {})}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats_version = predictor.model_version
+        self._lock = threading.Lock()
+        self.tier_counts = {'cache': 0, 'full': 0, 'compact': 0, 'simple': 0}
+
+    # ---------- Estimación de latencia ----------
+
+    def _check_model_version(self):
+        """Tras un cambio de modelo las mediciones anteriores dejan de valer"""
+        if self.predictor.model_version != self._stats_version:
+            self._latencies.clear()
+            self._stats_version = self.predictor.model_version
+
+    def record_latency(self, tier: str, elapsed_ms: float):
+        with self._lock:
+            self._latencies.setdefault(tier, deque(maxlen=self.latency_window)).append(elapsed_ms)
+
+    def estimate_latency_ms(self, tier: str) -> float:
+        """Percentil alto de las últimas mediciones (o el valor a priori si hay pocas)"""
+        with self._lock:
+            samples = list(self._latencies.get(tier, ()))
+        if len(samples) < 5:
+            return self.latency_priors_ms.get(tier, 0.0)
+        return float(np.percentile(samples, self.latency_percentile))
+
+    # ---------- Predicción ----------
+
+    def _run_tier(self, tier: str, current_data: Dict, historical_context: List[Dict], hours_ahead: int) -> Dict:
+        if tier == 'full':
+            return self.predictor.predict_advanced_resonance(current_data, historical_context, hours_ahead)
+        if tier == 'compact':
+            return self.predictor.predict_fast(current_data, historical_context, hours_ahead)
+        return self.predictor.predict_baseline(current_data, historical_context, hours_ahead)
+
+    def predict(self, current_data: Dict, historical_context: List[Dict], hours_ahead: int = 6,
+                latency_budget_ms: Optional[float] = None) -> Tuple[Dict, str]:
+        """Predicción y nivel que respondió; sin presupuesto se usa siempre el ensemble completo"""
+        start = time.perf_counter()
+        self._check_model_version()
+        model_version = self.predictor.model_version
+        key = (current_data['timestamp'], model_version, hours_ahead)
+
+        prediction = self.cache.get(*key)
+        if prediction is not None:
+            self.tier_counts['cache'] += 1
+            return prediction, 'cache'
+
+        if self.predictor.is_trained:
+            for tier in self.MODEL_TIERS:
+                if latency_budget_ms is not None:
+                    remaining_ms = latency_budget_ms - (time.perf_counter() - start) * 1000
+                    if self.estimate_latency_ms(tier) > remaining_ms:
+                        continue
+
+                tier_start = time.perf_counter()
+                prediction = self._run_tier(tier, current_data, historical_context, hours_ahead)
+                self.record_latency(tier, (time.perf_counter() - tier_start) * 1000)
+                if 'error' in prediction:
+                    continue
+
+                # Solo el ensemble completo alimenta la caché compartida
+                if tier == 'full':
+                    self.cache.put(*key, prediction)
+                self.tier_counts[tier] += 1
+                return prediction, tier
+
+        prediction = self._run_tier('simple', current_data, historical_context, hours_ahead)
+        self.tier_counts['simple'] += 1
+        return prediction, 'simple'
+
+    def get_stats(self) -> Dict:
+        return {
+            "model_version": self._stats_version,
+            "answered_by": dict(self.tier_counts),
+            "estimated_latency_ms": {tier: self.estimate_latency_ms(tier) for tier in self.MODEL_TIERS}
+        }
@@ -0,0 +1,261 @@
+"""
+🏅 CORRELACIÓN DE SPEARMAN EN VENTANA DESLIZANTE
+Rangos mantenidos con un árbol de estadísticos de orden por métrica y ventana:
+O(log n) por tick que entra o expira, O(n) para leer la matriz
+"""
+import numpy as np
+from collections import deque
+from datetime import datetime
+import logging
+import random
+import threading
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.rolling_correlation import DEFAULT_WINDOWS
+from app.core.time_series import (
+    SOCIAL_METRICS, SOLAR_METRICS, correlation_confidence, load_metric_series, metric_matrix
+)
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[float, int]  # (valor, secuencia): claves únicas aunque haya empates
+
+class OrderStatisticTree:
+    """Treap con tamaño de subárbol en arrays paralelos (nodos reutilizados al borrar)"""
+
+    def __init__(self, seed: int = 0):
+        self._key: List[Key] = []
+        self._priority: List[float] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._size: List[int] = []
+        self._free: List[int] = []
+        self._root = -1
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size[self._root] if self._root >= 0 else 0
+
+    def _node_size(self, node: int) -> int:
+        return self._size[node] if node >= 0 else 0
+
+    def _refresh(self, node: int):
+        self._size[node] = 1 + self._node_size(self._left[node]) + self._node_size(self._right[node])
+
+    def _new_node(self, key: Key) -> int:
+        if self._free:
+            node = self._free.pop()
+            self._key[node], self._priority[node] = key, self._rng.random()
+            self._left[node] = self._right[node] = -1
+            self._size[node] = 1
+            return node
+        self._key.append(key)
+        self._priority.append(self._rng.random())
+        self._left.append(-1)
+        self._right.append(-1)
+        self._size.append(1)
+        return len(self._key) - 1
+
+    def _split(self, node: int, key: Key, inclusive: bool) -> Tuple[int, int]:
+        """(claves < key, resto); con inclusive, (claves <= key, resto)"""
+        if node < 0:
+            return -1, -1
+        node_key = self._key[node]
+        if node_key < key or (inclusive and node_key == key):
+            left, right = self._split(self._right[node], key, inclusive)
+            self._right[node] = left
+            self._refresh(node)
+            return node, right
+        left, right = self._split(self._left[node], key, inclusive)
+        self._left[node] = right
+        self._refresh(node)
+        return left, node
+
+    def _merge(self, left: int, right: int) -> int:
+        if left < 0 or right < 0:
+            return left if right < 0 else right
+        if self._priority[left] > self._priority[right]:
+            self._right[left] = self._merge(self._right[left], right)
+            self._refresh(left)
+            return left
+        self._left[right] = self._merge(left, self._left[right])
+        self._refresh(right)
+        return right
+
+    def insert(self, key: Key):
+        left, right = self._split(self._root, key, False)
+        self._root = self._merge(self._merge(left, self._new_node(key)), right)
+
+    def remove(self, key: Key):
+        left, right = self._split(self._root, key, False)
+        middle, right = self._split(right, key, True)
+        if middle >= 0:
+            self._free.append(middle)
+        self._root = self._merge(left, right)
+
+    def rank(self, key: Key) -> int:
+        """Número de claves estrictamente menores que key"""
+        node, below = self._root, 0
+        while node >= 0:
+            if self._key[node] < key:
+                below += 1 + self._node_size(self._left[node])
+                node = self._right[node]
+            else:
+                node = self._left[node]
+        return below
+
+    def in_order(self) -> List[Key]:
+        keys, stack, node = [], [], self._root
+        while stack or node >= 0:
+            while node >= 0:
+                stack.append(node)
+                node = self._left[node]
+            node = stack.pop()
+            keys.append(self._key[node])
+            node = self._right[node]
+        return keys
+
+def average_ranks(sorted_values: np.ndarray) -> np.ndarray:
+    """Rangos (1-based) de valores ya ordenados; los empates reciben el rango medio"""
+    _, first, counts = np.unique(sorted_values, return_index=True, return_counts=True)
+    return np.repeat(first + (counts + 1) / 2.0, counts)
+
+class SlidingSpearmanMatrix:
+    """Matriz de Spearman solar × social por ventana temporal, junto a la de Pearson"""
+
+    def __init__(self, windows: Dict[str, float] = DEFAULT_WINDOWS,
+                 solar_metrics: Sequence[str] = SOLAR_METRICS,
+                 social_metrics: Sequence[str] = SOCIAL_METRICS, min_observations: int = 10):
+        self.window_names = list(windows)
+        self.window_days = dict(windows)
+        self.solar_metrics = tuple(solar_metrics)
+        self.social_metrics = tuple(social_metrics)
+        self.metrics = self.solar_metrics + self.social_metrics
+        self.min_observations = min_observations
+        # La lectura recorre los árboles fuera del event loop mientras llegan ticks
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._ticks: Dict[str, Deque[Tuple[float, int, np.ndarray]]] = {name: deque() for name in self.window_names}
+        self._trees: Dict[str, List[OrderStatisticTree]] = {
+            name: [OrderStatisticTree(seed=k) for k in range(len(self.metrics))] for name in self.window_names
+        }
+        self._matrix_cache: Dict[str, np.ndarray] = {}
+        self._sequence = 0
+        self.last_timestamp: Optional[float] = None
+
+    # ---------- Actualización ----------
+
+    def update(self, point: Dict) -> bool:
+        timestamp = datetime.fromisoformat(point['timestamp']).timestamp()
+        values = np.array(
+            [point['solar'].get(metric, 0) for metric in self.solar_metrics] +
+            [point['social'].get(metric, 0) for metric in self.social_metrics], dtype=np.float64
+        )
+        return self.update_values(timestamp, values)
+
+    def update_values(self, timestamp: float, values: np.ndarray) -> bool:
+        """Insertar el tick y expirar los que salen de cada ventana: O(métricas · log n)"""
+        with self._lock:
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return False
+
+            sequence = self._sequence
+            for name in self.window_names:
+                ticks, trees = self._ticks[name], self._trees[name]
+                ticks.append((timestamp, sequence, values))
+                for tree, value in zip(trees, values):
+                    tree.insert((float(value), sequence))
+
+                horizon = timestamp - self.window_days[name] * 86400
+                while ticks and ticks[0][0] <= horizon:
+                    _, old_sequence, old_values = ticks.popleft()
+                    for tree, value in zip(trees, old_values):
+                        tree.remove((float(value), old_sequence))
+
+            self._sequence += 1
+            self.last_timestamp = timestamp
+            self._matrix_cache.clear()
+            return True
+
+    def warm_start(self, historical_data: List[Dict], feature_store=None) -> int:
+        """Cargar solo los ticks que caben en la ventana más larga (log crudo del feature store si cubre más)"""
+        try:
+            timestamps, columns, _ = load_metric_series(historical_data, self.metrics, feature_store)
+            if len(timestamps) == 0:
+                return 0
+            start = np.searchsorted(timestamps, timestamps[-1] - max(self.window_days.values()) * 86400,
+                                    side='right')
+            values = metric_matrix(columns, self.metrics).T
+            loaded = sum(self.update_values(float(timestamps[i]), values[i]) for i in range(start, len(timestamps)))
+            logger.info(f"🏅 Ventanas de Spearman cargadas: {loaded} ticks")
+            return loaded
+        except Exception as e:
+            logger.error(f"❌ Error cargando ventanas de Spearman: {e}")
+            return 0
+
+    # ---------- Lectura ----------
+
+    def observations(self, window: str) -> int:
+        return len(self._ticks[window])
+
+    def percentile(self, window: str, metric: str, value: float) -> float:
+        """Posición de un valor dentro de la ventana en O(log n)"""
+        with self._lock:
+            tree = self._trees[window][self.metrics.index(metric)]
+            return tree.rank((float(value), -1)) / len(tree) if len(tree) else 0.0
+
+    def correlation(self, window: str) -> np.ndarray:
+        """Pearson de los rangos leídos en orden del árbol (sin reordenar la ventana)"""
+        with self._lock:
+            if window not in self._matrix_cache:
+                self._matrix_cache[window] = self._rank_correlation(window)
+            return self._matrix_cache[window]
+
+    def _rank_correlation(self, window: str) -> np.ndarray:
+        ticks = self._ticks[window]
+        n = len(ticks)
+        p, q = len(self.solar_metrics), len(self.social_metrics)
+        if n < 2:
+            return np.zeros((p, q))
+
+        first_sequence = ticks[0][1]
+        ranks = np.empty((len(self.metrics), n))
+        for k, tree in enumerate(self._trees[window]):
+            keys = tree.in_order()
+            values = np.fromiter((key[0] for key in keys), dtype=np.float64, count=n)
+            positions = np.fromiter((key[1] for key in keys), dtype=np.int64, count=n) - first_sequence
+            ranks[k, positions] = average_ranks(values)
+
+        centered = ranks - ranks.mean(axis=1, keepdims=True)
+        norms = np.sqrt((centered ** 2).sum(axis=1))
+        scale = norms[:p, None] * norms[None, p:]
+        covariance = centered[:p] @ centered[p:].T
+        return np.divide(covariance, scale, out=np.zeros((p, q)), where=scale > 0).clip(-1.0, 1.0)
+
+    def get_matrix(self, window: str) -> Dict:
+        matrix = self.correlation(window)
+        n = self.observations(window)
+        # Varianza de Fisher z para Spearman ≈ 1.06 / (n - 3)
+        confidence = correlation_confidence(matrix, (n - 3) / 1.06 + 3) if n > 3 else np.zeros_like(matrix)
+        return {
+            "window": window,
+            "window_days": self.window_days[window],
+            "ready": n >= self.min_observations,
+            "observations": n,
+            "correlations": {
+                solar_metric: {
+                    social_metric: round(float(matrix[i, j]), 4)
+                    for j, social_metric in enumerate(self.social_metrics)
+                }
+                for i, solar_metric in enumerate(self.solar_metrics)
+            },
+            "confidence": {
+                solar_metric: {
+                    social_metric: round(float(confidence[i, j]), 4)
+                    for j, social_metric in enumerate(self.social_metrics)
+                }
+                for i, solar_metric in enumerate(self.solar_metrics)
+            }
+        }
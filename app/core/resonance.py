@@ -0,0 +1,115 @@
+"""
+🎚️ ÍNDICE DE RESONANCIA POR COLUMNAS
+Fórmula ponderada de resonancia solar-social sobre arrays: un tick, todo el
+historial o una ponderación alternativa (what-if) en una sola pasada vectorizada
+"""
+import numpy as np
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.core.time_series import history_columns
+
+logger = logging.getLogger(__name__)
+
+# Término → (métrica, escala de normalización)
+RESONANCE_TERMS = {
+    "solar_intensity": ("sunspot_number", 150.0),
+    "social_tension": ("engagement_intensity", 100.0),
+    "flare_impact": ("flare_activity", 5.0),
+    "geomagnetic_impact": ("geomagnetic_storm", 4.0)
+}
+RESONANCE_METRICS = tuple(metric for metric, _ in RESONANCE_TERMS.values())
+
+DEFAULT_RESONANCE_WEIGHTS = {
+    "solar_intensity": 0.20,
+    "social_tension": 0.25,
+    "flare_impact": 0.25,
+    "geomagnetic_impact": 0.30
+}
+
+# Niveles de alerta de /api/correlation/realtime
+RESONANCE_LEVEL_THRESHOLDS = (("HIGH", 0.7), ("MODERATE", 0.5))
+
+def resolve_weights(weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Pesos por defecto sobrescritos por los dados; términos desconocidos o negativos son un error"""
+    resolved = dict(DEFAULT_RESONANCE_WEIGHTS)
+    for term, weight in (weights or {}).items():
+        if term not in RESONANCE_TERMS:
+            raise ValueError(f"Término de resonancia desconocido: {term}. Opciones: {list(RESONANCE_TERMS)}")
+        if weight < 0:
+            raise ValueError(f"Peso negativo para {term}")
+        resolved[term] = float(weight)
+    return resolved
+
+def resonance_columns(columns: Dict[str, np.ndarray], weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Resonancia de cada fila: Σ peso · métrica / escala, acotada a 1"""
+    weights = resolve_weights(weights)
+    total = 0.0
+    for term, (metric, scale) in RESONANCE_TERMS.items():
+        total = total + np.asarray(columns.get(metric, 0.0), dtype=np.float64) * (weights[term] / scale)
+    return np.minimum(1.0, total)
+
+def resonance_score(solar: Dict, social: Dict, weights: Optional[Dict[str, float]] = None) -> float:
+    """Resonancia de un único tick (misma fórmula que el recálculo del historial)"""
+    columns = {
+        metric: solar.get(metric, 0) if metric != 'engagement_intensity' else social.get(metric, 0)
+        for metric in RESONANCE_METRICS
+    }
+    return float(resonance_columns(columns, weights))
+
+def apply_resonance(points: List[Dict], weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """Reescribir 'resonance' en cada punto del historial (en sitio) con una pasada vectorizada"""
+    if not points:
+        return points
+    _, columns = history_columns(points, RESONANCE_METRICS)
+    for point, value in zip(points, resonance_columns(columns, weights).tolist()):
+        point['resonance'] = value
+    return points
+
+def resonance_levels(resonance: np.ndarray) -> np.ndarray:
+    """Nivel HIGH / MODERATE / LOW por fila"""
+    conditions = [resonance > threshold for _, threshold in RESONANCE_LEVEL_THRESHOLDS]
+    return np.select(conditions, [level for level, _ in RESONANCE_LEVEL_THRESHOLDS], default="LOW")
+
+def _summary(resonance: np.ndarray) -> Dict:
+    levels = resonance_levels(resonance)
+    return {
+        "mean": round(float(resonance.mean()), 4),
+        "std": round(float(resonance.std()), 4),
+        "max": round(float(resonance.max()), 4),
+        "p95": round(float(np.percentile(resonance, 95)), 4),
+        "levels": {level: int((levels == level).sum()) for level in ("HIGH", "MODERATE", "LOW")}
+    }
+
+def what_if(timestamps: np.ndarray, columns: Dict[str, np.ndarray], weights: Dict[str, float],
+            baseline_weights: Optional[Dict[str, float]] = None) -> Dict:
+    """Comparar una ponderación alternativa con la vigente sobre las mismas columnas"""
+    if len(timestamps) == 0:
+        raise ValueError("No hay datos en el rango pedido")
+    baseline = resonance_columns(columns, baseline_weights)
+    alternative = resonance_columns(columns, weights)
+    delta = alternative - baseline
+    changed = resonance_levels(alternative) != resonance_levels(baseline)
+    spread = baseline.std() * alternative.std()
+
+    return {
+        "weights": resolve_weights(weights),
+        "baseline_weights": resolve_weights(baseline_weights),
+        "n_points": int(len(timestamps)),
+        "range_start": float(timestamps[0]),
+        "range_end": float(timestamps[-1]),
+        "baseline": _summary(baseline),
+        "alternative": _summary(alternative),
+        "mean_delta": round(float(delta.mean()), 4),
+        "max_abs_delta": round(float(np.abs(delta).max()), 4),
+        "correlation": round(float(np.mean((baseline - baseline.mean()) * (alternative - alternative.mean())) / spread), 4)
+        if spread > 0 else None,
+        "level_changes": int(changed.sum())
+    }
+
+def select_range(timestamps: np.ndarray, columns: Dict[str, np.ndarray], start: Optional[float] = None,
+                 end: Optional[float] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Filas con start ≤ timestamp ≤ end (timestamps ordenados)"""
+    lo = np.searchsorted(timestamps, start, side='left') if start is not None else 0
+    hi = np.searchsorted(timestamps, end, side='right') if end is not None else len(timestamps)
+    return timestamps[lo:hi], {metric: values[lo:hi] for metric, values in columns.items()}
@@ -0,0 +1,93 @@
+"""
+♻️ POLÍTICA DE RE-ENTRENAMIENTO
+Huella de la ventana de entrenamiento para omitir datos sin cambios, warm-start
+de los ensembles con pocos datos nuevos y refit completo programado o por deriva
+"""
+import numpy as np
+from datetime import datetime
+import hashlib
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RetrainingPolicy:
+    """Decide entre omitir, ampliar (warm-start) o re-entrenar desde cero"""
+
+    def __init__(self, full_refit_every_hours: float = 24.0, max_new_fraction: float = 0.2,
+                 drift_ratio: float = 1.5, min_drift_rows: int = 10, max_tree_growth: float = 2.0,
+                 min_holdout_rows: int = 5, replay_ratio: float = 1.0):
+        self.full_refit_every_hours = full_refit_every_hours
+        self.max_new_fraction = max_new_fraction
+        self.drift_ratio = drift_ratio
+        self.min_drift_rows = min_drift_rows
+        self.max_tree_growth = max_tree_growth
+        # Warm-start: holdout tomado de las filas nuevas y filas ya vistas repasadas por fila nueva ajustada
+        self.min_holdout_rows = min_holdout_rows
+        self.replay_ratio = replay_ratio
+
+    def warm_start_split(self, timestamps: np.ndarray, fitted_until: float) -> Tuple[int, int]:
+        """
+        (inicio del incremento, inicio del holdout) sobre filas ordenadas en el tiempo.
+        Las filas aún no ajustadas (posteriores a fitted_until) se reparten 80/20 entre
+        ajuste y holdout final; al ajuste se suma un tramo de filas anteriores ya vistas
+        """
+        n = len(timestamps)
+        unseen = int(np.count_nonzero(np.asarray(timestamps) > fitted_until))
+        holdout = min(n - 1, max(self.min_holdout_rows, int(np.ceil(0.2 * unseen))))
+        replay = int(round(self.replay_ratio * max(0, unseen - holdout)))
+        return max(0, n - unseen - replay), n - holdout
+
+    @staticmethod
+    def fingerprint(timestamps: np.ndarray, X: np.ndarray, y: np.ndarray) -> str:
+        """Huella del conjunto de entrenamiento (timestamps, features y objetivo)"""
+        digest = hashlib.sha256()
+        for array in (timestamps, X, y):
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _drift_detected(self, predictor, X_new: np.ndarray, y_new: np.ndarray) -> bool:
+        """Error de los modelos servidos en filas nuevas muy por encima del de su holdout"""
+        X_scaled = predictor.scalers['advanced'].transform(X_new)
+        for name, model in predictor.models.items():
+            reference_mae = predictor.performance_metrics.get(f'{name}_mae')
+            if not reference_mae:
+                continue
+            model = predictor.compiled_models.get(name, model)
+            new_mae = float(np.mean(np.abs(y_new - model.predict(X_scaled))))
+            if new_mae > self.drift_ratio * reference_mae:
+                logger.info(f"📉 Deriva en {name}: MAE {new_mae:.4f} vs {reference_mae:.4f}")
+                return True
+        return False
+
+    def decide(self, predictor, fingerprint: str, timestamps: np.ndarray,
+               X: np.ndarray, y: np.ndarray, feature_names) -> Tuple[str, str, float]:
+        """Acción ('skip' | 'warm_start' | 'full'), motivo y fracción de filas nuevas"""
+        state: Dict = predictor.training_state
+        if not predictor.is_trained or not state.get('fingerprint') or 'advanced' not in predictor.scalers:
+            return 'full', "sin entrenamiento previo comparable", 1.0
+        if list(feature_names) != list(predictor.feature_names):
+            return 'full', "cambió la definición de features", 1.0
+        if fingerprint == state['fingerprint']:
+            return 'skip', "ventana de entrenamiento sin cambios", 0.0
+
+        new_rows = np.asarray(timestamps) > state['last_timestamp']
+        new_fraction = float(new_rows.mean()) if len(new_rows) else 0.0
+        if not new_rows.any():
+            return 'skip', "sin filas nuevas", 0.0
+
+        hours_since_full = (datetime.utcnow() - datetime.fromisoformat(state['last_full_refit'])).total_seconds() / 3600
+        if hours_since_full >= self.full_refit_every_hours:
+            return 'full', "refit completo programado", new_fraction
+        if new_fraction > self.max_new_fraction:
+            return 'full', "demasiadas filas nuevas para warm-start", new_fraction
+        for name, base in state.get('base_estimators', {}).items():
+            model = predictor.models.get(name)
+            if model is not None and model.n_estimators >= self.max_tree_growth * base:
+                return 'full', f"{name} alcanzó el crecimiento máximo", new_fraction
+        if new_rows.sum() >= self.min_drift_rows and self._drift_detected(predictor, X[new_rows], y[new_rows]):
+            return 'full', "deriva detectada", new_fraction
+        if new_rows.sum() < 2 * self.min_holdout_rows:
+            return 'skip', "filas nuevas insuficientes para ajustar y evaluar", new_fraction
+
+        return 'warm_start', "pocas filas nuevas", new_fraction
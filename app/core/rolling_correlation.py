@@ -0,0 +1,192 @@
+"""
+📊 MATRIZ DE CORRELACIÓN MÓVIL
+Covarianzas exponenciales (forma de Welford/West) para todos los pares
+solar × social, actualizadas en O(pares) por tick y por ventana
+"""
+import numpy as np
+from datetime import datetime
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from app.core.time_series import (
+    SOCIAL_METRICS, SOLAR_METRICS, correlation_confidence, load_metric_series, metric_matrix
+)
+
+logger = logging.getLogger(__name__)
+
+# Mismas ventanas (en días) que Settings.time_windows
+DEFAULT_WINDOWS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+class RollingCorrelationMatrix:
+    """
+    Estadísticos EWMA con decaimiento temporal: cada tick entra con peso 1 y los
+    pesos anteriores decaen exp(-dt/τ), τ = duración de la ventana. Así los huecos
+    del feed no distorsionan la ventana y el primer tick no domina al arrancar
+    """
+
+    def __init__(self, windows: Dict[str, float] = DEFAULT_WINDOWS,
+                 solar_metrics: Sequence[str] = SOLAR_METRICS,
+                 social_metrics: Sequence[str] = SOCIAL_METRICS, min_observations: int = 10):
+        self.window_names = list(windows)
+        self.window_days = dict(windows)
+        self.tau = np.array([windows[name] * 86400.0 for name in self.window_names])
+        self.solar_metrics = tuple(solar_metrics)
+        self.social_metrics = tuple(social_metrics)
+        self.min_observations = min_observations
+        self.reset()
+
+    def reset(self):
+        n_windows, p, q = len(self.window_names), len(self.solar_metrics), len(self.social_metrics)
+        self.mean_solar = np.zeros((n_windows, p))
+        self.mean_social = np.zeros((n_windows, q))
+        self.var_solar = np.zeros((n_windows, p))
+        self.var_social = np.zeros((n_windows, q))
+        self.cov = np.zeros((n_windows, p, q))
+        self.total_weight = np.zeros(n_windows)  # Σ pesos sin normalizar
+        self.weight_sq = np.ones(n_windows)  # Σw² de los pesos normalizados: n efectivo = 1 / Σw²
+        self.observations = 0
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+    # ---------- Actualización ----------
+
+    def update(self, point: Dict) -> bool:
+        """Incorporar un tick del historial (dict con solar/social)"""
+        timestamp = datetime.fromisoformat(point['timestamp']).timestamp()
+        solar = np.array([point['solar'].get(metric, 0) for metric in self.solar_metrics], dtype=np.float64)
+        social = np.array([point['social'].get(metric, 0) for metric in self.social_metrics], dtype=np.float64)
+        return self.update_values(timestamp, solar, social)
+
+    def update_values(self, timestamp: float, solar: np.ndarray, social: np.ndarray) -> bool:
+        """Paso de Welford ponderado para todas las ventanas a la vez: O(ventanas × pares)"""
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        if self.observations == 0:
+            self.mean_solar[:] = solar
+            self.mean_social[:] = social
+            self.total_weight[:] = 1.0
+            self.first_timestamp = timestamp
+        else:
+            self.total_weight = self.total_weight * np.exp(-(timestamp - self.last_timestamp) / self.tau) + 1.0
+            alpha = (1.0 / self.total_weight)[:, None]  # peso normalizado del tick nuevo
+            dx = solar - self.mean_solar
+            dy = social - self.mean_social
+            self.mean_solar += alpha * dx
+            self.mean_social += alpha * dy
+            # Desviaciones respecto a la media anterior: forma exacta de West para pesos exponenciales
+            self.var_solar = (1 - alpha) * (self.var_solar + alpha * dx * dx)
+            self.var_social = (1 - alpha) * (self.var_social + alpha * dy * dy)
+            self.cov = (1 - alpha)[..., None] * (self.cov + alpha[..., None] * dx[:, :, None] * dy[:, None, :])
+            self.weight_sq = (1 - alpha[:, 0]) ** 2 * self.weight_sq + alpha[:, 0] ** 2
+
+        self.observations += 1
+        self.last_timestamp = timestamp
+        return True
+
+    def replay(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Reconstruir el estado desde un historial en una pasada vectorizada.
+
+        Los pesos que dejan las actualizaciones sucesivas tienen forma cerrada:
+        w_i = exp(-(t_N - t_i)/τ), normalizados por su suma
+        """
+        self.reset()
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0:
+            return 0
+        keep = np.concatenate([[True], np.diff(timestamps) > 0])
+        timestamps = timestamps[keep]
+        X = metric_matrix(columns, self.solar_metrics).T[keep]
+        Y = metric_matrix(columns, self.social_metrics).T[keep]
+
+        decay = np.exp(-(timestamps[-1] - timestamps)[None, :] / self.tau[:, None])  # (ventanas, n)
+        self.total_weight = decay.sum(axis=1)
+        weights = decay / self.total_weight[:, None]
+
+        self.mean_solar = weights @ X
+        self.mean_social = weights @ Y
+        for w in range(len(self.tau)):
+            Xc = X - self.mean_solar[w]
+            Yc = Y - self.mean_social[w]
+            self.var_solar[w] = weights[w] @ (Xc * Xc)
+            self.var_social[w] = weights[w] @ (Yc * Yc)
+            self.cov[w] = (Xc * weights[w][:, None]).T @ Yc
+        self.weight_sq = (weights ** 2).sum(axis=1)
+
+        self.observations = len(timestamps)
+        self.first_timestamp = float(timestamps[0])
+        self.last_timestamp = float(timestamps[-1])
+        return self.observations
+
+    def warm_start(self, historical_data: List[Dict], feature_store=None) -> int:
+        """Arranque desde el historial más largo disponible (log crudo del feature store si cubre más)"""
+        try:
+            metrics = self.solar_metrics + self.social_metrics
+            timestamps, columns, source = load_metric_series(historical_data, metrics, feature_store)
+            replayed = self.replay(timestamps, columns)
+            logger.info(f"📊 Matriz de correlación móvil reconstruida: {replayed} ticks ({source})")
+            return replayed
+        except Exception as e:
+            logger.error(f"❌ Error reconstruyendo correlaciones móviles: {e}")
+            return 0
+
+    # ---------- Lectura ----------
+
+    def correlation(self, window: str) -> np.ndarray:
+        """Matriz (solar × social) de correlaciones de la ventana"""
+        w = self.window_names.index(window)
+        scale = np.sqrt(self.var_solar[w][:, None] * self.var_social[w][None, :])
+        return np.divide(self.cov[w], scale, out=np.zeros_like(scale), where=scale > 0).clip(-1.0, 1.0)
+
+    def effective_samples(self, window: str) -> float:
+        return float(1.0 / self.weight_sq[self.window_names.index(window)])
+
+    def strongest_pair(self, window: str) -> Optional[Dict]:
+        """Par de mayor |r| con su confianza (Šidák sobre todos los pares de la matriz)"""
+        if self.observations < self.min_observations:
+            return None
+        matrix = self.correlation(window)
+        i, j = np.unravel_index(np.abs(matrix).argmax(), matrix.shape)
+        return {
+            "solar_metric": self.solar_metrics[i],
+            "social_metric": self.social_metrics[j],
+            "correlation": round(float(matrix[i, j]), 4),
+            "confidence": round(float(correlation_confidence(
+                matrix[i, j], self.effective_samples(window), matrix.size)), 4)
+        }
+
+    def get_matrix(self, window: str) -> Dict:
+        matrix = self.correlation(window)
+        n_eff = self.effective_samples(window)
+        confidence = correlation_confidence(matrix, n_eff)
+        return {
+            "window": window,
+            "window_days": self.window_days[window],
+            "ready": self.observations >= self.min_observations,
+            "effective_samples": round(n_eff, 1),
+            "correlations": {
+                solar_metric: {
+                    social_metric: round(float(matrix[i, j]), 4)
+                    for j, social_metric in enumerate(self.social_metrics)
+                }
+                for i, solar_metric in enumerate(self.solar_metrics)
+            },
+            "confidence": {
+                solar_metric: {
+                    social_metric: round(float(confidence[i, j]), 4)
+                    for j, social_metric in enumerate(self.social_metrics)
+                }
+                for i, solar_metric in enumerate(self.solar_metrics)
+            },
+            "strongest_pair": self.strongest_pair(window)
+        }
+
+    def get_info(self) -> Dict:
+        coverage = (self.last_timestamp - self.first_timestamp) / 3600 if self.observations else 0.0
+        return {
+            "windows": self.window_days,
+            "observations": self.observations,
+            "coverage_hours": round(coverage, 2),
+            "pairs": len(self.solar_metrics) * len(self.social_metrics)
+        }
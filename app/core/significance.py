@@ -0,0 +1,209 @@
+"""
+🎲 SIGNIFICANCIA POR SURROGATES
+Surrogates de fases aleatorias y block bootstrap generados en lote, evaluados
+con cualquier estadístico de correlación y repartidos en un pool de procesos
+"""
+import numpy as np
+from scipy.fft import irfft, rfft
+from scipy.stats import rankdata
+from collections import OrderedDict
+from functools import partial
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from joblib import Parallel, delayed
+
+from app.core.lag_correlation import cross_correlation, standardize_rows
+from app.core.time_series import load_metric_series, resample_mean, series_version
+
+logger = logging.getLogger(__name__)
+
+# Estadístico: (x (n,), Y (B, n)) → (B,) evaluado en lote sobre todos los surrogates
+Statistic = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+NULL_PERCENTILES = (0.5, 2.5, 5.0, 50.0, 95.0, 97.5, 99.5)
+
+def pearson_statistic(x: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    return standardize_rows(Y) @ standardize_rows(x[None, :])[0] / len(x)
+
+def spearman_statistic(x: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    return pearson_statistic(rankdata(x), rankdata(Y, axis=1))
+
+def max_lag_statistic(x: np.ndarray, Y: np.ndarray, max_lag: int = 24) -> np.ndarray:
+    """Máxima |correlación cruzada| en [-max_lag, max_lag] (el nulo incluye el barrido de desfases)"""
+    _, ccf = cross_correlation(x[None, :], Y, min(max_lag, len(x) - 2))
+    return np.abs(ccf[0]).max(axis=1)
+
+STATISTICS: Dict[str, Statistic] = {
+    "pearson": pearson_statistic,
+    "spearman": spearman_statistic,
+    "max_lag": max_lag_statistic
+}
+
+def phase_randomized_surrogates(y: np.ndarray, n_surrogates: int, rng: np.random.Generator) -> np.ndarray:
+    """Mismo espectro de potencia que y (y por tanto la misma autocorrelación) con fases uniformes"""
+    n = len(y)
+    spectrum = rfft(y)
+    phases = rng.uniform(0.0, 2 * np.pi, size=(n_surrogates, len(spectrum)))
+    phases[:, 0] = 0.0  # la media se conserva
+    if n % 2 == 0:
+        phases[:, -1] = 0.0  # Nyquist real
+    return irfft(spectrum[None, :] * np.exp(1j * phases), n, axis=1)
+
+def block_bootstrap_surrogates(y: np.ndarray, n_surrogates: int, block_length: int,
+                               rng: np.random.Generator) -> np.ndarray:
+    """Block bootstrap circular: bloques de longitud fija con inicio aleatorio, concatenados"""
+    n = len(y)
+    block_length = int(min(max(block_length, 1), n))
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n, size=(n_surrogates, n_blocks))
+    index = (starts[:, :, None] + np.arange(block_length)[None, None, :]) % n
+    return np.asarray(y)[index.reshape(n_surrogates, -1)[:, :n]]
+
+def _surrogate_batch(paths: Dict[str, str], statistic: Statistic, method: str, block_length: int,
+                     n_surrogates: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Un lote de surrogates de y evaluados contra x fijo"""
+    x = np.asarray(np.load(paths['x'], mmap_mode='r'))
+    y = np.asarray(np.load(paths['y'], mmap_mode='r'))
+    rng = np.random.default_rng(seed)
+    if method == "phase":
+        surrogates = phase_randomized_surrogates(y, n_surrogates, rng)
+    else:
+        surrogates = block_bootstrap_surrogates(y, n_surrogates, block_length, rng)
+    return np.asarray(statistic(x, surrogates), dtype=np.float64)
+
+class SignificanceEngine:
+    """
+    P-valor y percentiles del nulo de un estadístico solar-social.
+
+    Cada lote recibe su propia semilla derivada (SeedSequence.spawn) de la
+    semilla del motor: el resultado no depende del número de procesos
+    """
+
+    METHODS = ("phase", "block")
+
+    def __init__(self, n_surrogates: int = 1000, method: str = "phase", block_hours: float = 24.0,
+                 max_lag_hours: float = 24.0, resample_hours: float = 1.0, batch_size: int = 500,
+                 significance: float = 0.05, n_jobs: int = -1, seed: int = 42, cache_size: int = 16):
+        self.n_surrogates = n_surrogates
+        self.method = method
+        self.block_hours = block_hours  # bloques de un día: se conserva el ciclo diario
+        self.max_lag_hours = max_lag_hours
+        self.resample_hours = resample_hours
+        self.batch_size = batch_size
+        self.significance = significance  # Settings.confidence_threshold
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.latest: Optional[Dict] = None
+
+    def _resolve_statistic(self, statistic: Union[str, Statistic]) -> Statistic:
+        if callable(statistic):
+            return statistic
+        if statistic not in STATISTICS:
+            raise ValueError(f"Estadístico desconocido: {statistic}. Opciones: {list(STATISTICS)}")
+        if statistic == "max_lag":
+            return partial(max_lag_statistic, max_lag=max(1, int(round(self.max_lag_hours / self.resample_hours))))
+        return STATISTICS[statistic]
+
+    def null_distribution(self, x: np.ndarray, y: np.ndarray, statistic: Statistic, method: str,
+                          n_surrogates: int) -> np.ndarray:
+        """Estadístico sobre n_surrogates surrogates de y, por lotes en paralelo"""
+        if method not in self.METHODS:
+            raise ValueError(f"Método desconocido: {method}. Opciones: {list(self.METHODS)}")
+        block_length = max(1, int(round(self.block_hours / self.resample_hours)))
+        sizes = [min(self.batch_size, n_surrogates - start) for start in range(0, n_surrogates, self.batch_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+        with tempfile.TemporaryDirectory(prefix="heliobio_surrogates_") as workdir:
+            paths = {'x': os.path.join(workdir, "x.npy"), 'y': os.path.join(workdir, "y.npy")}
+            np.save(paths['x'], x)
+            np.save(paths['y'], y)
+            batches = Parallel(n_jobs=self.n_jobs)(
+                delayed(_surrogate_batch)(paths, statistic, method, block_length, size, seed)
+                for size, seed in zip(sizes, seeds)
+            )
+        return np.concatenate(batches)
+
+    def test(self, x: np.ndarray, y: np.ndarray, statistic: Union[str, Statistic] = "pearson",
+             method: Optional[str] = None, n_surrogates: Optional[int] = None) -> Dict:
+        """P-valor bilateral (1 + #|nulo| ≥ |observado|) / (1 + B) y percentiles del nulo"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) != len(y) or len(x) < 4:
+            raise ValueError("Se necesitan dos series alineadas de al menos 4 puntos")
+        method = method or self.method
+        n_surrogates = n_surrogates or self.n_surrogates
+        statistic_fn = self._resolve_statistic(statistic)
+
+        observed = float(statistic_fn(x, y[None, :])[0])
+        null = self.null_distribution(x, y, statistic_fn, method, n_surrogates)
+        p_value = (1 + int((np.abs(null) >= abs(observed) - 1e-12).sum())) / (1 + n_surrogates)
+        null_std = float(null.std(ddof=1))
+
+        return {
+            "statistic": statistic if isinstance(statistic, str) else getattr(statistic, '__name__', 'custom'),
+            "method": method,
+            "observed": round(observed, 6),
+            "p_value": p_value,
+            "significant": p_value < self.significance,
+            "n_surrogates": int(n_surrogates),
+            "n_points": int(len(x)),
+            "null_mean": round(float(null.mean()), 6),
+            "null_std": round(null_std, 6),
+            "z_score": round((observed - float(null.mean())) / null_std, 4) if null_std > 0 else 0.0,
+            "null_percentiles": {
+                f"p{q:g}": round(float(value), 6)
+                for q, value in zip(NULL_PERCENTILES, np.percentile(null, NULL_PERCENTILES))
+            }
+        }
+
+    def _series_key(self, version: Tuple, solar_metric: str, social_metric: str, window_hours: Optional[float],
+                    statistic: str, method: str, n_surrogates: int) -> Tuple:
+        """Versión de la serie, par y configuración del test (sin cargar datos)"""
+        return (version, solar_metric, social_metric, window_hours or None, statistic, method, n_surrogates,
+                self.block_hours, self.max_lag_hours, self.resample_hours, self.batch_size, self.seed)
+
+    def run(self, historical_data: List[Dict], feature_store=None, solar_metric: str = 'sunspot_number',
+            social_metric: str = 'conflict_metric', statistic: str = "pearson", method: Optional[str] = None,
+            n_surrogates: Optional[int] = None, window_hours: Optional[float] = None) -> Dict:
+        """Test sobre el historial remuestreado (horario por defecto), cacheado por versión de la serie"""
+        try:
+            method = method or self.method
+            n_surrogates = n_surrogates or self.n_surrogates
+            # Búsqueda antes de cargar: un acierto no vuelve a leer el log crudo
+            key = self._series_key(series_version(historical_data, feature_store), solar_metric, social_metric,
+                                   window_hours, statistic, method, n_surrogates)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.latest = self._cache[key]
+                return self.latest
+
+            timestamps, columns, source = load_metric_series(historical_data, [solar_metric, social_metric],
+                                                             feature_store)
+            if window_hours and len(timestamps):
+                start = np.searchsorted(timestamps, timestamps[-1] - window_hours * 3600, side='left')
+                timestamps = timestamps[start:]
+                columns = {metric: values[start:] for metric, values in columns.items()}
+            _, columns = resample_mean(timestamps, columns, self.resample_hours * 3600)
+            x, y = columns[solar_metric], columns[social_metric]
+
+            logger.info(f"🎲 Surrogates {method} ({n_surrogates}) para {solar_metric} × {social_metric}")
+            result = {
+                "solar_metric": solar_metric,
+                "social_metric": social_metric,
+                "resample_hours": self.resample_hours,
+                "source": source,
+                **self.test(x, y, statistic, method, n_surrogates)
+            }
+
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.latest = result
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error en test de significancia: {e}")
+            return {"error": str(e)}
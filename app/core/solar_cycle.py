@@ -0,0 +1,207 @@
+"""
+🌗 DETECTOR DE FASE DEL CICLO SOLAR
+Número de manchas suavizado a 13 meses (ventana SIDC) con suma móvil incremental
+sobre medias mensuales; fase por nivel y pendiente, recalculada solo al cerrar un mes
+"""
+import numpy as np
+from collections import deque
+import logging
+from typing import Deque, Dict, List, Optional, Sequence
+
+from app.core.time_series import load_metric_series
+
+logger = logging.getLogger(__name__)
+
+SMOOTHING_MONTHS = 13
+
+def month_index(timestamps: np.ndarray) -> np.ndarray:
+    """Meses desde 1970-01 (UTC) de cada timestamp epoch"""
+    return np.asarray(timestamps, dtype=np.float64).astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+def _month_label(month: int) -> str:
+    return str(np.datetime64(int(month), 'M'))
+
+class SolarCyclePhaseDetector:
+    """
+    Fase minimum / ascending / maximum / descending del ciclo de Schwabe.
+
+    Las observaciones (diarias o más finas) se promedian por día y los días por
+    mes. El valor suavizado de 13 meses queda centrado 6 meses antes del último
+    mes cerrado; meses sin datos repiten la última media mensual
+    """
+
+    def __init__(self, cycle_months: int = 132, slope_months: int = 6,
+                 reference_range: Sequence[float] = (5.0, 150.0)):
+        self.cycle_months = cycle_months  # Settings.time_windows["solar_cycle"] ≈ 11 años
+        self.slope_months = slope_months
+        # Rango de un ciclo típico mientras el historial no cubre uno completo
+        self.reference_range = tuple(reference_range)
+        self.reset()
+
+    def reset(self):
+        self._monthly: Deque[float] = deque()
+        self._window_sum = 0.0
+        self._smoothed: Deque[float] = deque(maxlen=self.cycle_months)
+        self._last_month_closed: Optional[int] = None
+        self._last_monthly = 0.0
+        self._day: Optional[int] = None
+        self._day_sum = 0.0
+        self._day_count = 0
+        self._month: Optional[int] = None
+        self._month_sum = 0.0
+        self._month_days = 0
+        self.last_timestamp: Optional[float] = None
+        self._cached: Optional[Dict] = None
+
+    # ---------- Ingesta ----------
+
+    def update(self, timestamp: float, sunspot_number: float) -> bool:
+        """Añadir una observación; True si cerró un mes y la fase se recalculará"""
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        day = int(timestamp // 86400)
+        month = int(month_index(np.array([timestamp]))[0])
+        closed = False
+
+        if self._day is not None and day != self._day:
+            self._close_day()
+        if self._month is not None and month != self._month:
+            self._close_month(month)
+            closed = True
+
+        if self._month is None or month != self._month:
+            self._month, self._month_sum, self._month_days = month, 0.0, 0
+        self._day = day
+        self._day_sum += float(sunspot_number)
+        self._day_count += 1
+        self.last_timestamp = float(timestamp)
+        return closed
+
+    def ingest(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """
+        Carga en bloque (historial o feature store) con el mismo estado final que
+        llamar a update punto a punto: medias diarias y mensuales con bincount
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if self.last_timestamp is not None:
+            keep = timestamps > self.last_timestamp
+            timestamps, values = timestamps[keep], values[keep]
+        if len(timestamps) == 0:
+            return 0
+        if self._day is not None:
+            # Con un día abierto la carga en bloque no aplica: punto a punto
+            for timestamp, value in zip(timestamps, values):
+                self.update(float(timestamp), float(value))
+            return len(timestamps)
+
+        days, day_inverse = np.unique((timestamps // 86400).astype(np.int64), return_inverse=True)
+        daily = np.bincount(day_inverse, weights=values) / np.bincount(day_inverse)
+        day_months = month_index(days * 86400.0)
+        months, month_inverse = np.unique(day_months, return_inverse=True)
+
+        # Meses cerrados: todos menos el último; el último día queda abierto como en update
+        closed = month_inverse < len(months) - 1
+        monthly = np.bincount(month_inverse[closed], weights=daily[closed], minlength=len(months))
+        counts = np.bincount(month_inverse[closed], minlength=len(months))
+        for k in range(len(months) - 1):
+            self._month, self._month_sum, self._month_days = int(months[k]), monthly[k], int(counts[k])
+            self._close_month(int(months[k + 1]))
+
+        open_days = np.flatnonzero(~closed)
+        self._month = int(months[-1])
+        self._month_sum = float(daily[open_days[:-1]].sum())
+        self._month_days = len(open_days) - 1
+        self._day = int(days[-1])
+        last_day = day_inverse == len(days) - 1
+        self._day_sum, self._day_count = float(values[last_day].sum()), int(last_day.sum())
+        self.last_timestamp = float(timestamps[-1])
+        return len(timestamps)
+
+    def warm_start(self, historical_data: List[Dict], feature_store=None) -> int:
+        try:
+            timestamps, columns, _ = load_metric_series(historical_data, ['sunspot_number'], feature_store)
+            loaded = self.ingest(timestamps, columns['sunspot_number'])
+            logger.info(f"🌗 Ciclo solar: {len(self._smoothed)} meses suavizados desde {loaded} observaciones")
+            return loaded
+        except Exception as e:
+            logger.error(f"❌ Error cargando historial de manchas solares: {e}")
+            return 0
+
+    def _close_day(self):
+        if self._day_count:
+            self._month_sum += self._day_sum / self._day_count
+            self._month_days += 1
+        self._day_sum, self._day_count = 0.0, 0
+
+    def _close_month(self, next_month: int):
+        """Cerrar el mes en curso (y rellenar los huecos hasta next_month)"""
+        if self._month_days:
+            self._last_monthly = self._month_sum / self._month_days
+        for month in range(self._month, next_month):
+            self._push_month(month, self._last_monthly)
+        self._month_sum, self._month_days = 0.0, 0
+
+    def _push_month(self, month: int, mean: float):
+        """Suma móvil de 13 meses: O(1) por mes cerrado"""
+        self._monthly.append(mean)
+        self._window_sum += mean
+        if len(self._monthly) > SMOOTHING_MONTHS:
+            self._window_sum -= self._monthly.popleft()
+        if len(self._monthly) == SMOOTHING_MONTHS:
+            # Pesos SIDC: 1/24 en los extremos y 1/12 en los 11 meses centrales
+            self._smoothed.append((self._window_sum - 0.5 * (self._monthly[0] + self._monthly[-1])) / 12)
+        self._last_month_closed = month
+        self._cached = None
+
+    # ---------- Fase ----------
+
+    @property
+    def ready(self) -> bool:
+        return len(self._smoothed) >= 2
+
+    @property
+    def phase(self) -> Optional[str]:
+        return self.get_phase()["phase"]
+
+    def get_phase(self) -> Dict:
+        """Fase cacheada; solo se recalcula cuando entra un mes nuevo"""
+        if self._cached is None:
+            self._cached = self._classify()
+        return self._cached
+
+    def _classify(self) -> Dict:
+        months = len(self._smoothed)
+        if not self.ready:
+            return {"phase": None, "ready": False, "smoothed_months": months}
+
+        smoothed = np.fromiter(self._smoothed, dtype=np.float64, count=months)
+        current = smoothed[-1]
+        low, high = smoothed.min(), smoothed.max()
+        if months < self.cycle_months:
+            low, high = min(low, self.reference_range[0]), max(high, self.reference_range[1])
+        level = (current - low) / (high - low) if high > low else 0.5
+        span = min(self.slope_months, months - 1)
+        slope = (current - smoothed[-1 - span]) / span
+
+        # Umbrales de nivel sobre el rango (observado o de referencia) y signo de la pendiente
+        if level <= 0.25:
+            phase = "minimum"
+        elif level >= 0.75:
+            phase = "maximum"
+        else:
+            phase = "ascending" if slope >= 0 else "descending"
+
+        minimum_at = int(np.argmin(smoothed))
+        return {
+            "phase": phase,
+            "ready": True,
+            "smoothed_sunspots": round(float(current), 2),
+            "smoothed_month": _month_label(self._last_month_closed - SMOOTHING_MONTHS // 2),
+            "level": round(float(level), 4),
+            "slope_per_month": round(float(slope), 4),
+            "smoothed_months": months,
+            # Meses desde el mínimo suavizado de la ventana (solo con un ciclo completo)
+            "cycle_progress": (round(min(1.0, (months - 1 - minimum_at) / self.cycle_months), 4)
+                               if months >= self.cycle_months else None)
+        }
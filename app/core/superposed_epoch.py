@@ -0,0 +1,170 @@
+"""
+🗓️ ANÁLISIS DE ÉPOCAS SUPERPUESTAS
+Promedio de las métricas sociales en ventanas alineadas con eventos solares
+(fulguraciones X, tormentas Kp≥7, CME) mediante indexado vectorizado
+"""
+import numpy as np
+from scipy.stats import t as t_distribution
+from collections import OrderedDict
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.time_series import (
+    SOCIAL_METRICS, iso_to_epoch, load_metric_series, metric_matrix, resample_mean, series_version
+)
+
+logger = logging.getLogger(__name__)
+
+# Umbrales sobre las intensidades crudas que guarda RealNasaService en cada tick
+# (log crudo del feature store: una media de ventana recortaría tormentas cortas)
+EVENT_PRESETS = {
+    "x_flares": ("flare_activity", 4.0),      # clase X
+    "kp7_storms": ("geomagnetic_storm", 3.0)  # Kp ≥ 7
+}
+
+def event_onsets(timestamps: np.ndarray, values: np.ndarray, threshold: float,
+                 min_separation_hours: float = 24.0) -> np.ndarray:
+    """Instantes en que la serie cruza el umbral hacia arriba, a min_separation del último evento aceptado"""
+    above = np.asarray(values) >= threshold
+    onsets = np.flatnonzero(above & ~np.concatenate([[False], above[:-1]]))
+    times = np.asarray(timestamps, dtype=np.float64)[onsets]
+    kept: List[float] = []
+    for time in times.tolist():
+        # Frente al último aceptado (no al cruce anterior): cruces seguidos no se anulan en cadena
+        if not kept or time - kept[-1] >= min_separation_hours * 3600:
+            kept.append(time)
+    return np.asarray(kept, dtype=np.float64)
+
+def parse_event_times(events: Sequence) -> np.ndarray:
+    """Epoch en segundos desde ISO (sin zona horaria = UTC) o números (p. ej. peak_time de DONKI)"""
+    return np.array(sorted(
+        iso_to_epoch(event) if isinstance(event, str) else float(event)
+        for event in events
+    ), dtype=np.float64)
+
+class SuperposedEpochAnalyzer:
+    """Curvas media / intervalo de confianza por métrica alrededor de cada evento"""
+
+    def __init__(self, before_hours: float = 72.0, after_hours: float = 168.0, resample_hours: float = 1.0,
+                 confidence: float = 0.95, cache_size: int = 32, metrics: Sequence[str] = SOCIAL_METRICS):
+        self.before_hours = before_hours
+        self.after_hours = after_hours
+        self.resample_hours = resample_hours  # rejilla regular: el desfase es índice × paso
+        self.confidence = confidence
+        self.cache_size = cache_size
+        self.metrics = tuple(metrics)
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def epoch_matrix(self, timestamps: np.ndarray, values: np.ndarray, event_times: np.ndarray,
+                     before: int, after: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ventanas (eventos, desfases, métricas) con un único indexado avanzado.
+
+        Las ventanas que salen del historial se descartan (no se rellenan)
+        """
+        centers = np.searchsorted(timestamps, event_times, side='left')
+        offsets = np.arange(-before, after + 1)
+        complete = (centers - before >= 0) & (centers + after < len(timestamps))
+        index = centers[complete][:, None] + offsets[None, :]
+        return values[index], offsets
+
+    def composite(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray], event_times: np.ndarray,
+                  before_hours: Optional[float] = None, after_hours: Optional[float] = None) -> Dict:
+        step = self.resample_hours * 3600
+        timestamps, columns = resample_mean(timestamps, columns, step)
+        before_hours = self.before_hours if before_hours is None else before_hours
+        after_hours = self.after_hours if after_hours is None else after_hours
+        before = int(round(before_hours / self.resample_hours))
+        after = int(round(after_hours / self.resample_hours))
+
+        values = metric_matrix(columns, self.metrics).T  # (n, métricas)
+        epochs, offsets = self.epoch_matrix(timestamps, values, np.asarray(event_times, dtype=np.float64),
+                                            before, after)
+        n_events = len(epochs)
+        if n_events < 2:
+            raise ValueError("Se necesitan al menos 2 eventos con ventana completa en el historial")
+
+        # Anomalía respecto a la media previa al evento de cada ventana
+        anomalies = epochs - epochs[:, offsets < 0, :].mean(axis=1, keepdims=True) if before > 0 else epochs
+        mean = anomalies.mean(axis=0)
+        half_width = (t_distribution.ppf(0.5 + self.confidence / 2, n_events - 1)
+                      * anomalies.std(axis=0, ddof=1) / np.sqrt(n_events))
+
+        after_mask = offsets >= 0
+        # Un único test por métrica (anomalía media post-evento de cada ventana): buscar el pico
+        # entre todos los desfases y testearlo sería una comparación múltiple
+        response = anomalies[:, after_mask, :].mean(axis=1)
+        response_t = response.mean(axis=0) / np.maximum(response.std(axis=0, ddof=1) / np.sqrt(n_events), 1e-300)
+        response_p = 2 * t_distribution.sf(np.abs(response_t), n_events - 1)
+
+        curves = {}
+        for k, metric in enumerate(self.metrics):
+            peak = np.flatnonzero(after_mask)[np.argmax(np.abs(mean[after_mask, k]))]
+            curves[metric] = {
+                "mean": np.round(mean[:, k], 5).tolist(),
+                "ci_low": np.round(mean[:, k] - half_width[:, k], 5).tolist(),
+                "ci_high": np.round(mean[:, k] + half_width[:, k], 5).tolist(),
+                "raw_mean": np.round(epochs[:, :, k].mean(axis=0), 5).tolist(),
+                "peak_offset_hours": float(offsets[peak] * self.resample_hours),
+                "peak_anomaly": round(float(mean[peak, k]), 5),
+                "post_event_anomaly": round(float(response[:, k].mean()), 5),
+                "post_event_p_value": float(response_p[k])
+            }
+
+        return {
+            "offsets_hours": (offsets * self.resample_hours).tolist(),
+            "n_events": int(n_events),
+            "events_dropped": int(len(event_times) - n_events),
+            "confidence": self.confidence,
+            "curves": curves
+        }
+
+    def _cache_key(self, event_filter: str, event_times: Optional[np.ndarray], version: Tuple,
+                   before_hours: Optional[float], after_hours: Optional[float]) -> str:
+        """Filtro (y eventos explícitos), versión de la serie y ventanas: sin cargar datos"""
+        digest = hashlib.sha256(np.ascontiguousarray(event_times if event_times is not None else [],
+                                                     dtype=np.float64).tobytes())
+        digest.update(repr((event_filter, version, before_hours, after_hours,
+                            self.before_hours, self.after_hours, self.resample_hours, self.metrics)).encode())
+        return digest.hexdigest()
+
+    def run(self, historical_data: List[Dict], feature_store=None, preset: Optional[str] = None,
+            events: Optional[Sequence] = None, before_hours: Optional[float] = None,
+            after_hours: Optional[float] = None) -> Dict:
+        """Eventos explícitos (ISO / epoch) o detectados con un preset; cacheado por filtro y ventana de datos"""
+        try:
+            if events is None and preset not in EVENT_PRESETS:
+                raise ValueError(f"Preset desconocido: {preset}. Opciones: {list(EVENT_PRESETS)}")
+
+            driver, threshold = EVENT_PRESETS.get(preset, (None, None))
+            metrics = self.metrics + ((driver,) if driver and events is None else ())
+            explicit_times = parse_event_times(events) if events is not None else None
+            event_filter = "explicit" if events is not None else preset
+
+            # Búsqueda antes de cargar: los eventos de un preset dependen solo de la versión de la serie
+            key = self._cache_key(event_filter, explicit_times, series_version(historical_data, feature_store),
+                                  before_hours, after_hours)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            timestamps, columns, source = load_metric_series(historical_data, metrics, feature_store)
+            event_times = (explicit_times if explicit_times is not None
+                           else event_onsets(timestamps, columns[driver], threshold))
+
+            result = {
+                "event_filter": event_filter,
+                "events_found": int(len(event_times)),
+                "source": source,
+                **self.composite(timestamps, columns, event_times, before_hours, after_hours)
+            }
+            logger.info(f"🗓️ Épocas superpuestas ({event_filter}): {result['n_events']} eventos")
+
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error en análisis de épocas superpuestas: {e}")
+            return {"error": str(e)}
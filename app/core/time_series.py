@@ -0,0 +1,97 @@
+"""
+📈 SERIES TEMPORALES SOLARES Y SOCIALES
+Extracción columnar de las métricas del historial (lista de ticks o log crudo del feature store)
+para los análisis de correlación entre dimensiones
+"""
+import numpy as np
+from scipy.special import erfc
+from datetime import datetime, timezone
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SOLAR_METRICS = ('sunspot_number', 'flare_activity', 'geomagnetic_storm', 'solar_wind_speed', 'coronal_holes')
+SOCIAL_METRICS = ('engagement_intensity', 'sentiment_polarity', 'conflict_metric', 'viral_content')
+
+def _metric_value(point: Dict, metric: str) -> float:
+    if metric == 'resonance':
+        return point.get('resonance', 0)
+    section = 'solar' if metric in SOLAR_METRICS else 'social'
+    return point.get(section, {}).get(metric, 0)
+
+def iso_to_epoch(value: str) -> float:
+    """Epoch en segundos de una fecha ISO ('Z' admitida); sin zona horaria se interpreta como UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def history_columns(historical_data: List[Dict],
+                    metrics: Sequence[str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Timestamps (epoch en segundos) y una columna float64 por métrica desde la lista de ticks"""
+    timestamps = np.array([datetime.fromisoformat(p['timestamp']).timestamp() for p in historical_data],
+                          dtype=np.float64)
+    columns = {
+        metric: np.array([_metric_value(p, metric) for p in historical_data], dtype=np.float64)
+        for metric in metrics
+    }
+    return timestamps, columns
+
+def load_metric_series(historical_data: List[Dict], metrics: Sequence[str],
+                       feature_store=None) -> Tuple[np.ndarray, Dict[str, np.ndarray], str]:
+    """
+    Usar el log crudo del feature store cuando cubre más historia que los ticks en
+    memoria: mismos valores por tick que update() (las columnas del store son
+    medias de ventana de las features, no las métricas)
+    """
+    if feature_store is not None and feature_store.n_rows > len(historical_data):
+        timestamps, columns = feature_store.raw_columns(metrics)
+        if len(timestamps) > len(historical_data):
+            return timestamps, columns, 'raw_log'
+    timestamps, columns = history_columns(historical_data, metrics)
+    return timestamps, columns, 'memory'
+
+def series_version(historical_data: List[Dict], feature_store=None) -> Tuple:
+    """
+    Huella barata de la serie que devolverá load_metric_series (sin leer el log):
+    clave de caché de los análisis antes de cargar las columnas
+    """
+    if feature_store is not None and feature_store.n_rows > len(historical_data):
+        return 'raw_log', feature_store.raw_log_size
+    return 'memory', len(historical_data), historical_data[-1]['timestamp'] if historical_data else None
+
+def estimate_tick_seconds(timestamps: np.ndarray, default: float = 60.0) -> float:
+    """Intervalo entre ticks (mediana de las diferencias positivas)"""
+    deltas = np.diff(np.asarray(timestamps, dtype=np.float64))
+    deltas = deltas[deltas > 0]
+    return float(np.median(deltas)) if len(deltas) else default
+
+def metric_matrix(columns: Dict[str, np.ndarray], metrics: Sequence[str]) -> np.ndarray:
+    """Apilar columnas en una matriz (n_metrics, n) en el orden pedido"""
+    return np.vstack([columns[metric] for metric in metrics])
+
+def correlation_confidence(correlation, n_eff, n_tests: int = 1) -> np.ndarray:
+    """1 - p-valor bilateral (Fisher z) con corrección de Šidák para n_tests comparaciones"""
+    n_eff = np.maximum(np.asarray(n_eff, dtype=np.float64), 4.0)
+    z = np.arctanh(np.minimum(np.abs(correlation), 0.999999)) * np.sqrt(n_eff - 3)
+    p_value = erfc(z / np.sqrt(2))
+    p_adjusted = -np.expm1(n_tests * np.log1p(-np.minimum(p_value, 1 - 1e-16)))
+    return 1.0 - p_adjusted
+
+def resample_mean(timestamps: np.ndarray, columns: Dict[str, np.ndarray],
+                  bin_seconds: float) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Promediar en intervalos regulares; los intervalos vacíos repiten el último valor"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) == 0:
+        return timestamps, {metric: np.empty(0) for metric in columns}
+    bins = ((timestamps - timestamps[0]) // bin_seconds).astype(np.int64)
+    n_bins = int(bins[-1]) + 1
+    counts = np.bincount(bins, minlength=n_bins)
+    # Índice del último intervalo con datos (relleno hacia delante)
+    source = np.maximum.accumulate(np.where(counts > 0, np.arange(n_bins), 0))
+    resampled = {
+        metric: (np.bincount(bins, weights=values, minlength=n_bins) / np.maximum(counts, 1))[source]
+        for metric, values in columns.items()
+    }
+    return timestamps[0] + np.arange(n_bins) * bin_seconds, resampled
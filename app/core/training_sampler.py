@@ -0,0 +1,130 @@
+"""
+🎯 MUESTREO ACOTADO DEL HISTORIAL DE ENTRENAMIENTO
+Ventana reciente densa + reservorio del historial antiguo + sobremuestreo de
+tormentas (DONKI) con un presupuesto fijo de filas, actualizado de forma incremental
+"""
+import numpy as np
+import json
+import logging
+import os
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+class TrainingSampler:
+    """Selecciona filas del feature store para entrenar sin recorrer todo el historial"""
+
+    def __init__(self, feature_store, row_budget: int = 20_000, recent_fraction: float = 0.5,
+                 storm_fraction: float = 0.2, storm_resonance: float = 0.7,
+                 storm_geomagnetic: float = 2.0, storm_flares: float = 3.0, seed: int = 42):
+        self.feature_store = feature_store
+        self.row_budget = row_budget
+        self.recent_capacity = int(row_budget * recent_fraction)
+        self.storm_capacity = int(row_budget * storm_fraction)
+        self.reservoir_capacity = row_budget - self.recent_capacity - self.storm_capacity
+        # Umbrales de tormenta: resonancia alta, G2+ (Kp ≥ 6) o fulguraciones M/X en la ventana
+        self.storm_resonance = storm_resonance
+        self.storm_geomagnetic = storm_geomagnetic
+        self.storm_flares = storm_flares
+        self.seed = seed
+        self.state = self._load_state()
+
+    # ---------- Estado persistente ----------
+
+    @property
+    def state_path(self) -> str:
+        # Dentro del directorio de versión: una nueva definición de features reinicia el muestreo
+        return os.path.join(self.feature_store.version_path, "training_sampler.json")
+
+    def _empty_state(self) -> Dict:
+        return {'next_row': 0, 'reservoir': [], 'reservoir_seen': 0, 'storms': [], 'storms_seen': 0}
+
+    def _load_state(self) -> Dict:
+        if not os.path.exists(self.state_path):
+            return self._empty_state()
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            if state.get('row_budget') != self.row_budget or state.get('next_row', 0) > self.feature_store.n_rows:
+                return self._empty_state()
+            return state
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Estado del muestreador ilegible, se reinicia: {e}")
+            return self._empty_state()
+
+    def _save_state(self):
+        os.makedirs(self.feature_store.version_path, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({**self.state, 'row_budget': self.row_budget}, f)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------- Reservorios ----------
+
+    def _offer(self, rows: np.ndarray, key: str, capacity: int):
+        """Algoritmo R vectorizado: solo se recorren en Python las filas aceptadas"""
+        if len(rows) == 0 or capacity <= 0:
+            return
+        reservoir: List[int] = self.state[key]
+        seen = self.state[f'{key}_seen']
+        rng = np.random.default_rng([self.seed, seen, len(key)])
+
+        positions = seen + np.arange(1, len(rows) + 1)  # número de fila ofrecida (1-based)
+        slots = np.where(positions <= capacity, positions - 1, rng.integers(0, positions))
+        for row, slot in zip(rows[slots < capacity], slots[slots < capacity]):
+            if slot >= len(reservoir):
+                reservoir.append(int(row))
+            else:
+                reservoir[slot] = int(row)
+
+        self.state[f'{key}_seen'] = int(positions[-1])
+
+    def _storm_mask(self, start: int, stop: int) -> np.ndarray:
+        store = self.feature_store
+        mask = np.asarray(store.column('resonance')[start:stop]) >= self.storm_resonance
+        feature_names = store.meta.get('feature_names', [])
+        if 'geomag_mean' in feature_names:
+            mask |= np.asarray(store.column('geomag_mean')[start:stop]) >= self.storm_geomagnetic
+        if 'flares_mean' in feature_names:
+            mask |= np.asarray(store.column('flares_mean')[start:stop]) >= self.storm_flares
+        return mask
+
+    def update(self) -> int:
+        """Pasar a los reservorios las filas que salieron de la ventana reciente (solo las nuevas)"""
+        n_rows = self.feature_store.n_rows
+        stop = max(0, n_rows - 1 - self.recent_capacity)
+        start = self.state['next_row']
+        if stop <= start:
+            return 0
+
+        rows = np.arange(start, stop)
+        self._offer(rows, 'reservoir', self.reservoir_capacity)
+        self._offer(rows[self._storm_mask(start, stop)], 'storms', self.storm_capacity)
+        self.state['next_row'] = int(stop)
+        self._save_state()
+        return len(rows)
+
+    # ---------- Muestra ----------
+
+    def sample_indices(self) -> np.ndarray:
+        """
+        Índices únicos ordenados en el tiempo. Una tormenta que también está en el
+        reservorio uniforme aparece una sola vez: duplicada inflaría su peso y podría
+        caer a ambos lados del split de entrenamiento y test
+        """
+        self.update()
+        last_row = self.feature_store.n_rows - 1  # la última fila no tiene objetivo
+        recent = np.arange(max(0, last_row - self.recent_capacity), last_row)
+        # Los reservorios solo contienen filas anteriores a la ventana reciente
+        older = np.array(self.state['reservoir'] + self.state['storms'], dtype=np.int64)
+        return np.unique(np.concatenate([older, recent]))
+
+    def get_info(self) -> Dict:
+        return {
+            "row_budget": self.row_budget,
+            "recent_rows": self.recent_capacity,
+            "reservoir_rows": len(self.state['reservoir']),
+            "storm_rows": len(self.state['storms']),
+            "rows_seen": self.state['reservoir_seen'],
+            "storms_seen": self.state['storms_seen']
+        }
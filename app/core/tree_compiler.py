@@ -0,0 +1,193 @@
+"""
+🌲 COMPILADOR DE ENSEMBLES DE ÁRBOLES
+Exporta Random Forest / Gradient Boosting a arrays numpy contiguos y los evalúa
+de forma vectorizada sobre todos los árboles, sin importar sklearn al servir
+"""
+import numpy as np
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _as_index_array(array) -> np.ndarray:
+    """Índices contiguos; se conserva int32 si ya viene compactado"""
+    array = np.asarray(array)
+    return np.ascontiguousarray(array, dtype=np.int32 if array.dtype == np.int32 else np.intp)
+
+def _as_float_array(array) -> np.ndarray:
+    """Valores contiguos; se conserva float32 si ya viene cuantizado"""
+    array = np.asarray(array)
+    return np.ascontiguousarray(array, dtype=np.float32 if array.dtype == np.float32 else np.float64)
+
+class CompiledTreeEnsemble:
+    """
+    Ensemble aplanado: todos los nodos de todos los árboles en arrays globales.
+
+    Las hojas apuntan a sí mismas (umbral +inf), de modo que la evaluación
+    avanza max_depth pasos sin máscaras: prediction = base + scale * Σ hojas
+    """
+
+    def __init__(self, children: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, base: float, scale: float):
+        self.children = _as_index_array(children)
+        self.feature = _as_index_array(feature)
+        self.threshold = _as_float_array(threshold)
+        self.value = _as_float_array(value)
+        self.roots = _as_index_array(roots)
+        self.max_depth = int(max_depth)
+        self.base = float(base)
+        self.scale = float(scale)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_outputs(self) -> int:
+        return self.value.shape[1]
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.children, self.feature, self.threshold, self.value, self.roots))
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Índice global de la hoja alcanzada por cada fila en cada árbol (n_samples, n_trees)"""
+        # sklearn compara en float32: mismo casteo para paridad exacta
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_samples, n_features = X.shape
+        X_flat = X.ravel()
+        row_offset = (np.arange(n_samples) * n_features)[:, None]
+        children_flat = self.children.ravel()
+
+        nodes = np.repeat(self.roots[None, :], n_samples, axis=0)
+        for _ in range(self.max_depth):
+            go_right = X_flat.take(row_offset + self.feature.take(nodes)) > self.threshold.take(nodes)
+            nodes = children_flat.take(2 * nodes + go_right)
+        return nodes
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predecir un lote completo con una única travesía vectorizada"""
+        leaves = self.apply(X)
+        output = self.base + self.scale * self.value[leaves].sum(axis=1)
+        return output[:, 0] if self.n_outputs == 1 else output
+
+    def contributions(self, X: np.ndarray, output: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Contribuciones por camino (Saabas): en cada split, la variación del valor
+        del nodo se atribuye a la feature evaluada.
+
+        Devuelve (bias, contribuciones) con prediction = bias + Σ contribuciones
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_samples, n_features = X.shape
+        X_flat = X.ravel()
+        row_offset = (np.arange(n_samples) * n_features)[:, None]
+        children_flat = self.children.ravel()
+        node_value = self.value[:, output].astype(np.float64)
+
+        nodes = np.repeat(self.roots[None, :], n_samples, axis=0)
+        totals = np.zeros(n_samples * n_features)
+        for _ in range(self.max_depth):
+            feature = self.feature.take(nodes)
+            go_right = X_flat.take(row_offset + feature) > self.threshold.take(nodes)
+            next_nodes = children_flat.take(2 * nodes + go_right)
+            # Las hojas apuntan a sí mismas: variación nula
+            delta = node_value.take(next_nodes) - node_value.take(nodes)
+            totals += np.bincount((row_offset + feature).ravel(), weights=delta.ravel(),
+                                  minlength=n_samples * n_features)
+            nodes = next_nodes
+
+        bias = self.base + self.scale * node_value.take(self.roots).sum()
+        return np.full(n_samples, bias), self.scale * totals.reshape(n_samples, n_features)
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            children=self.children,
+            feature=self.feature,
+            threshold=self.threshold,
+            value=self.value,
+            roots=self.roots,
+            meta=np.array([self.max_depth, self.base, self.scale], dtype=np.float64)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledTreeEnsemble":
+        with np.load(path) as arrays:
+            max_depth, base, scale = arrays['meta']
+            return cls(
+                arrays['children'], arrays['feature'], arrays['threshold'],
+                arrays['value'], arrays['roots'], int(max_depth), base, scale
+            )
+
+def compile_tree_ensemble(model) -> CompiledTreeEnsemble:
+    """Aplanar un RandomForestRegressor o GradientBoostingRegressor entrenado"""
+    if hasattr(model, 'learning_rate') and hasattr(model, 'init_'):
+        # Gradient Boosting: init + learning_rate * Σ árboles
+        trees = [estimator.tree_ for estimator in np.ravel(model.estimators_)]
+        init = model.init_
+        if isinstance(init, str) and init == 'zero':
+            base = 0.0
+        elif hasattr(init, 'constant_'):
+            base = float(np.ravel(init.constant_)[0])
+        else:
+            raise ValueError("Solo se soporta Gradient Boosting con init constante")
+        scale = float(model.learning_rate)
+    elif hasattr(model, 'estimators_'):
+        # Random Forest: promedio de árboles
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        base = 0.0
+        scale = 1.0 / len(trees)
+    else:
+        raise ValueError(f"Modelo no soportado para compilación: {type(model).__name__}")
+
+    children, feature, threshold, value, roots = [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        tree_children = np.empty((tree.node_count, 2), dtype=np.intp)
+        tree_children[:, 0] = np.where(is_leaf, node_ids, tree.children_left) + offset
+        tree_children[:, 1] = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+        children.append(tree_children)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, :, 0])
+        roots.append(offset)
+        offset += tree.node_count
+
+    return CompiledTreeEnsemble(
+        children=np.concatenate(children),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        value=np.concatenate(value),
+        roots=np.array(roots),
+        max_depth=max(tree.max_depth for tree in trees),
+        base=base,
+        scale=scale
+    )
+
+def compile_models(models: Dict) -> Dict[str, CompiledTreeEnsemble]:
+    """Compilar los modelos de árbol de un diccionario; el resto se ignora"""
+    compiled = {}
+    for name, model in models.items():
+        # Solo ensembles de árboles (MultiOutputRegressor también expone estimators_)
+        if not hasattr(model, 'estimators_') or not hasattr(np.ravel(model.estimators_)[0], 'tree_'):
+            continue
+        try:
+            compiled[name] = compile_tree_ensemble(model)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo compilar {name}: {e}")
+    return compiled
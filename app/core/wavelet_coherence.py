@@ -0,0 +1,207 @@
+"""
+🌊 COHERENCIA WAVELET SOLAR-SOCIAL
+Transformada wavelet continua (Morlet) por convolución FFT en cada escala,
+series largas por bloques con solapamiento y significancia por surrogates
+"""
+import numpy as np
+from scipy.fft import fft, fftfreq, ifft, next_fast_len
+from scipy.signal import lfilter
+from collections import OrderedDict
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.core.time_series import load_metric_series, resample_mean, series_version
+
+logger = logging.getLogger(__name__)
+
+# Periodos de interés (días): rotación solar, ciclo anual y ciclo de Schwabe (Settings.time_windows)
+PERIOD_BANDS = {
+    "solar_rotation_27d": (20.0, 35.0),
+    "annual": (300.0, 430.0),
+    "solar_cycle_11y": (8 * 365.25, 14 * 365.25)
+}
+
+def morlet_fourier_factor(omega0: float) -> float:
+    """Relación periodo de Fourier / escala de la wavelet de Morlet"""
+    return 4 * np.pi / (omega0 + np.sqrt(2 + omega0 ** 2))
+
+def red_noise_surrogates(y: np.ndarray, n_surrogates: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Surrogates AR(1) con la autocorrelación a un paso y la varianza de y (n_surrogates, n).
+
+    Con fases aleatorias una componente periódica pura seguiría siendo coherente
+    (solo cambia su fase, constante en el tiempo): el ruido rojo es el nulo habitual
+    """
+    y = np.asarray(y, dtype=np.float64)
+    centered = y - y.mean()
+    variance = centered.var()
+    lag_one = float(np.dot(centered[:-1], centered[1:]) / (variance * (len(y) - 1))) if variance > 0 else 0.0
+    lag_one = float(np.clip(lag_one, -0.99, 0.99))
+    noise = rng.normal(size=(n_surrogates, len(y))) * np.sqrt(1 - lag_one ** 2)
+    noise[:, 0] = rng.normal(size=n_surrogates)  # arranque estacionario
+    return lfilter([1.0], [1.0, -lag_one], noise, axis=1)
+
+class WaveletCoherenceEngine:
+    """
+    Coherencia wavelet media por periodo entre una métrica solar y una social.
+
+    El suavizado es gaussiano en tiempo (σ = escala) y se aplica también en el
+    dominio de Fourier; no se suaviza entre escalas. Solo cuentan los instantes
+    fuera del cono de influencia (√2 · escala desde cada borde)
+    """
+
+    def __init__(self, min_period_days: float = 2.0, max_period_days: float = 4018 * 1.3,
+                 scales_per_octave: int = 8, chunk_size: int = 4096, n_surrogates: int = 30,
+                 significance: float = 0.05, omega0: float = 6.0, seed: int = 42, cache_size: int = 16):
+        self.min_period_days = min_period_days
+        self.max_period_days = max_period_days
+        self.scales_per_octave = scales_per_octave
+        self.chunk_size = chunk_size
+        self.n_surrogates = n_surrogates
+        self.significance = significance
+        self.omega0 = omega0
+        self.seed = seed
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.latest: Optional[Dict] = None
+
+    def _periods(self, n: int, dt_days: float) -> np.ndarray:
+        """Periodos en progresión geométrica hasta el mayor con instantes fuera del cono"""
+        factor = morlet_fourier_factor(self.omega0)
+        longest = min(self.max_period_days, 0.9 * n * dt_days * factor / (2 * np.sqrt(2)))
+        # Por debajo de 3 muestras la wavelet se trunca en Nyquist y deja de estar localizada
+        shortest = max(self.min_period_days, 3 * dt_days)
+        if longest <= shortest:
+            return np.empty(0)
+        n_periods = int(np.floor(self.scales_per_octave * np.log2(longest / shortest))) + 1
+        return shortest * 2.0 ** (np.arange(n_periods) / self.scales_per_octave)
+
+    def _global_coherence(self, x: np.ndarray, Y: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        """Coherencia media en el tiempo por escala para x frente a cada fila de Y (B, escalas)"""
+        n = len(x)
+        coherence = np.full((len(Y), len(scales)), np.nan)
+
+        for k, scale in enumerate(scales):
+            edge = int(np.ceil(np.sqrt(2) * scale))  # cono de influencia
+            # Soporte de la wavelet (~4σ) más el del suavizado gaussiano (~3σ) aplicado después
+            pad = int(np.ceil(7 * scale))
+            lo, hi = edge, n - edge
+            if hi <= lo:
+                continue
+
+            total = np.zeros(len(Y))
+            for start in range(lo, hi, self.chunk_size):
+                stop = min(start + self.chunk_size, hi)
+                ext_start, ext_stop = max(0, start - pad), min(n, stop + pad)
+                nfft = next_fast_len(ext_stop - ext_start + pad)
+
+                omega = 2 * np.pi * fftfreq(nfft)
+                psi_hat = np.where(omega > 0, np.exp(-0.5 * (scale * omega - self.omega0) ** 2), 0.0)
+                gaussian = np.exp(-0.5 * (scale * omega) ** 2)
+
+                Wx = ifft(fft(x[ext_start:ext_stop], nfft) * psi_hat)
+                Wy = ifft(fft(Y[:, ext_start:ext_stop], nfft, axis=1) * psi_hat, axis=1)
+
+                def smooth(z: np.ndarray) -> np.ndarray:
+                    return ifft(fft(z, axis=-1) * gaussian, axis=-1)
+
+                core = slice(start - ext_start, stop - ext_start)
+                Sxy = smooth(Wx[None, :] * np.conj(Wy))[:, core]
+                Sxx = smooth(np.abs(Wx) ** 2).real[core]
+                Syy = smooth(np.abs(Wy) ** 2).real[:, core]
+
+                denominator = Sxx[None, :] * Syy
+                ratio = np.divide(np.abs(Sxy) ** 2, denominator, out=np.zeros_like(denominator),
+                                  where=denominator > 0)
+                total += np.clip(ratio, 0.0, 1.0).sum(axis=1)
+
+            coherence[:, k] = total / (hi - lo)
+        return coherence
+
+    def coherence(self, x: np.ndarray, y: np.ndarray, dt_days: float) -> Dict:
+        """Coherencia por periodo con umbral y p-valor por escala frente a surrogates de ruido rojo"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        periods = self._periods(len(x), dt_days)
+        if len(periods) == 0:
+            raise ValueError("Serie demasiado corta para la coherencia wavelet")
+
+        scales = periods / dt_days / morlet_fourier_factor(self.omega0)
+        rng = np.random.default_rng(self.seed)
+        Y = np.vstack([y[None, :], red_noise_surrogates(y, self.n_surrogates, rng)])
+        x_std = (x - x.mean()) / (x.std() or 1.0)
+        Y_std = (Y - Y.mean(axis=1, keepdims=True)) / np.where(Y.std(axis=1, keepdims=True) > 0,
+                                                                Y.std(axis=1, keepdims=True), 1.0)
+
+        coherence = self._global_coherence(x_std, Y_std, scales)
+        observed, null = coherence[0], coherence[1:]
+        p_value = (1 + (null >= observed[None, :]).sum(axis=0)) / (1 + self.n_surrogates)
+        threshold = np.percentile(null, 100 * (1 - self.significance), axis=0)
+
+        return {
+            "periods_days": [round(float(p), 3) for p in periods],
+            "coherence": [round(float(c), 4) for c in observed],
+            "threshold": [round(float(t), 4) for t in threshold],
+            "p_value": [round(float(p), 4) for p in p_value],
+            "significant_periods_days": [round(float(p), 3) for p, pv in zip(periods, p_value)
+                                         if pv < self.significance],
+            "bands": self._band_summary(periods, observed, p_value)
+        }
+
+    def _band_summary(self, periods: np.ndarray, coherence: np.ndarray, p_value: np.ndarray) -> Dict:
+        bands = {}
+        for name, (low, high) in PERIOD_BANDS.items():
+            in_band = (periods >= low) & (periods <= high)
+            if not in_band.any():
+                bands[name] = None
+                continue
+            best = np.flatnonzero(in_band)[np.argmin(p_value[in_band])]
+            bands[name] = {
+                "mean_coherence": round(float(coherence[in_band].mean()), 4),
+                "best_period_days": round(float(periods[best]), 3),
+                "best_p_value": round(float(p_value[best]), 4),
+                "significant": bool(p_value[best] < self.significance)
+            }
+        return bands
+
+    def _series_key(self, version: Tuple, solar_metric: str, social_metric: str, dt_days: float) -> Tuple:
+        """Versión de la serie y configuración (sin cargar ni remuestrear datos)"""
+        return (version, solar_metric, social_metric, dt_days, self.min_period_days, self.max_period_days,
+                self.scales_per_octave, self.n_surrogates, self.omega0, self.seed)
+
+    def run(self, historical_data: List[Dict], feature_store=None, solar_metric: str = 'sunspot_number',
+            social_metric: str = 'conflict_metric', resample_days: float = 1.0) -> Dict:
+        """Coherencia sobre el historial remuestreado (diario por defecto), cacheada por versión de la serie"""
+        try:
+            # Búsqueda antes de cargar: un acierto no vuelve a leer el log crudo
+            key = self._series_key(series_version(historical_data, feature_store), solar_metric, social_metric,
+                                   resample_days)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.latest = self._cache[key]
+                return self.latest
+
+            timestamps, columns, source = load_metric_series(historical_data, [solar_metric, social_metric],
+                                                             feature_store)
+            _, columns = resample_mean(timestamps, columns, resample_days * 86400)
+            x, y = columns[solar_metric], columns[social_metric]
+
+            logger.info(f"🌊 Coherencia wavelet {solar_metric} × {social_metric}: {len(x)} puntos")
+            result = {
+                "solar_metric": solar_metric,
+                "social_metric": social_metric,
+                "resample_days": resample_days,
+                "n_points": int(len(x)),
+                "surrogates": self.n_surrogates,
+                "source": source,
+                **self.coherence(x, y, resample_days)
+            }
+
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.latest = result
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error en coherencia wavelet: {e}")
+            return {"error": str(e)}
@@ -4,27 +4,73 @@ Sistema con conexiones reales a Facebook, NASA y ML avanzado
 """
 import asyncio
 from datetime import datetime, timedelta, timezone
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+from typing import List, Optional
 import random
 
 from app.services.real_solar_service import RealSolarService
 from app.services.social_analyzer_service import SocialAnalyzerService
 from app.core.alert_system import AlertSystem
 from app.core.prediction_engine import HelioBioPredictor
+from app.core.hyperparameter_search import WalkForwardTuner
+from app.core.prediction_cache import PredictionCache
+from app.core.feature_store import FeatureStore
+from app.core.chunked_training import ChunkedTrainer
+from app.core.backtesting import BacktestEngine
+from app.core.predictor_cascade import PredictorCascade
+from app.core.micro_batcher import PredictionMicroBatcher
+from app.core.permutation_importance import PermutationImportanceJob
+from app.core.training_sampler import TrainingSampler
+from app.core.lag_correlation import LagCorrelationEngine
+from app.core.rolling_correlation import RollingCorrelationMatrix
+from app.core.rank_correlation import SlidingSpearmanMatrix
+from app.core.granger import GrangerCausalityEngine
+from app.core.wavelet_coherence import WaveletCoherenceEngine
+from app.core.superposed_epoch import SuperposedEpochAnalyzer
+from app.core.significance import SignificanceEngine
+from app.core.solar_cycle import SolarCyclePhaseDetector
+from app.core.chizhevsky_engine import ChizhevskyEngine
+from app.core.resonance import (
+    DEFAULT_RESONANCE_WEIGHTS, RESONANCE_METRICS, resonance_score, select_range, what_if
+)
+from app.core.time_series import SOCIAL_METRICS, SOLAR_METRICS, history_columns, iso_to_epoch
 from app.services.real_facebook_service import RealFacebookService
 from app.services.real_nasa_service import RealNasaService
 
 # Servicios globales
-solar_service = RealSolarService()
+cycle_detector = SolarCyclePhaseDetector()
+solar_service = RealSolarService(cycle_detector)
 social_service = SocialAnalyzerService()
 facebook_service = RealFacebookService()
 nasa_service = RealNasaService()
 alert_system = AlertSystem()
 predictor = HelioBioPredictor()
+tuner = WalkForwardTuner(predictor)
+prediction_cache = PredictionCache()
+prediction_cascade = PredictorCascade(predictor, prediction_cache)
+micro_batcher = PredictionMicroBatcher(predictor)
+importance_job = PermutationImportanceJob(predictor)
+# Pesos vigentes de calculate_resonance: cambiarlos versiona el feature store y recalcula su historial
+RESONANCE_WEIGHTS = dict(DEFAULT_RESONANCE_WEIGHTS)
+feature_store = FeatureStore(predictor, resonance_weights=RESONANCE_WEIGHTS)
+predictor.feature_store = feature_store
+predictor.training_sampler = TrainingSampler(feature_store)
+chunked_trainer = ChunkedTrainer(predictor)
+lag_engine = LagCorrelationEngine()
+rolling_correlation = RollingCorrelationMatrix()
+rank_correlation = SlidingSpearmanMatrix()
+granger_engine = GrangerCausalityEngine()
+wavelet_engine = WaveletCoherenceEngine()
+epoch_analyzer = SuperposedEpochAnalyzer()
+significance_engine = SignificanceEngine()
+# Desfases y confianza de las resonancias registradas (barrido periódico sobre el historial)
+chizhevsky_engine = ChizhevskyEngine(solar_service, social_service, cycle_detector)
+PRECOMPUTED_HORIZONS = (6, 24)
+CHUNKED_TRAINING_MIN_ROWS = 100_000  # por encima, el historial no se carga entero en memoria
 historical_data = []
 
 @asynccontextmanager
@@ -41,12 +87,21 @@ async def lifespan(app: FastAPI):
         # Cargar modelos existentes
         predictor.load_models()
         
+        # Backfill del feature store si cambió la definición de features
+        await asyncio.to_thread(feature_store.ensure_current)
+        
+        # Correlaciones móviles desde el historial persistido
+        await asyncio.to_thread(rolling_correlation.warm_start, list(historical_data), feature_store)
+        await asyncio.to_thread(rank_correlation.warm_start, list(historical_data), feature_store)
+        await asyncio.to_thread(cycle_detector.warm_start, list(historical_data), feature_store)
+        
         # Inicializar servicios
         await update_system_data()
         asyncio.create_task(continuous_data_update())
         
         # Entrenar modelos si hay datos suficientes
         asyncio.create_task(train_models_periodically())
+        asyncio.create_task(update_lagged_resonances_periodically())
         
         print("✅ Sistema con APIs reales activado correctamente")
         yield
@@ -56,6 +111,7 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         print("🛑 Apagando sistema HelioBio-Social...")
+        await micro_batcher.stop()
         # Cerrar conexiones
         await facebook_service.close()
         await nasa_service.close()
@@ -124,30 +180,75 @@ async def train_models_periodically():
         if len(historical_data) >= 30:  # Mínimo para entrenar
             print("🔄 Re-entrenando modelos ML avanzados...")
             try:
-                metrics = predictor.train_advanced_models(historical_data)
-                if metrics and 'error' not in metrics:
+                metrics = await asyncio.to_thread(train_models, "auto", "auto")
+                if metrics and metrics.get('skipped'):
+                    print(f"⏭️  Re-entrenamiento omitido: {metrics['reason']}")
+                elif metrics and 'error' not in metrics:
+                    prediction_cache.invalidate()
+                    await asyncio.to_thread(precompute_predictions)
                     best_r2 = metrics.get('best_r2', 0)
                     samples = metrics.get('test_samples', 0)
-                    print(f"✅ Modelos actualizados - R²: {best_r2:.3f}, Muestras: {samples}")
+                    action = metrics.get('training_action', 'full')
+                    print(f"✅ Modelos actualizados ({action}) - R²: {best_r2:.3f}, Muestras: {samples}")
                 else:
                     print("⚠️  Modelos no pudieron ser entrenados (datos insuficientes)")
             except Exception as e:
                 print(f"❌ Error entrenando modelos: {e}")
 
+async def update_lagged_resonances_periodically():
+    """Barrido de desfases solar → social al arrancar y cada hora"""
+    while True:
+        try:
+            resonances = await asyncio.to_thread(
+                chizhevsky_engine.update_lagged_resonances, list(historical_data), feature_store
+            )
+            print(f"⏱️  Desfases solar-social actualizados: {len(resonances)} pares")
+        except Exception as e:
+            print(f"❌ Error actualizando desfases: {e}")
+        await asyncio.sleep(3600)
+
+def train_models(mode: str = "auto", refit: str = "full"):
+    """Entrenar en memoria o por chunks desde el feature store según el tamaño del historial"""
+    if mode == "auto":
+        # Historial enorme: chunks sobre todas las filas; por debajo, en memoria sobre la muestra
+        # acotada del muestreador (solo lee el store cuando supera su presupuesto de filas)
+        mode = "chunked" if feature_store.n_rows >= CHUNKED_TRAINING_MIN_ROWS else "memory"
+    if mode == "chunked":
+        return chunked_trainer.train()
+    return predictor.train_advanced_models(list(historical_data), refit=refit)
+
+def get_cached_prediction(hours_ahead: int, latency_budget_ms: Optional[float] = None):
+    """Predicción para el último tick vía cascada (caché primero); devuelve el nivel que respondió"""
+    # Copia: se llama desde hilos mientras el event loop añade ticks
+    history = list(historical_data)
+    return prediction_cascade.predict(history[-1], history, hours_ahead, latency_budget_ms)
+
+async def get_batched_prediction(hours_ahead: int):
+    """Predicción del último tick: caché o ensemble completo agrupado con otras peticiones concurrentes"""
+    current_data = historical_data[-1]
+    key = (current_data['timestamp'], predictor.model_version, hours_ahead)
+    
+    prediction = prediction_cache.get(*key)
+    if prediction is not None:
+        return prediction, 'cache'
+    
+    prediction = await micro_batcher.predict(current_data, historical_data, hours_ahead)
+    prediction_cache.put(*key, prediction)
+    return prediction, 'full'
+
+def precompute_predictions():
+    """Precalcular las predicciones más consultadas tras cada tick o cambio de modelo"""
+    if not historical_data or not predictor.is_trained:
+        return
+    for hours_ahead in PRECOMPUTED_HORIZONS:
+        try:
+            get_cached_prediction(hours_ahead)
+        except Exception as e:
+            print(f"⚠️  Error precalculando predicción ({hours_ahead}h): {e}")
+
 def calculate_resonance(solar, social):
-    """Calcular resonancia mejorada"""
-    solar_intensity = solar.get('sunspot_number', 0) / 150.0
-    social_tension = social.get('engagement_intensity', 0) / 100.0
-    flare_impact = solar.get('flare_activity', 0) / 5.0
-    geomagnetic_impact = solar.get('geomagnetic_storm', 0) / 4.0
-    
-    resonance = (
-        solar_intensity * 0.20 + 
-        social_tension * 0.25 + 
-        flare_impact * 0.25 +
-        geomagnetic_impact * 0.30
-    )
-    return min(1.0, resonance)
+    """Calcular resonancia mejorada (fórmula columnar de app.core.resonance)"""
+    return resonance_score(solar, social, RESONANCE_WEIGHTS)
 
 # APP FASTAPI
 app = FastAPI(
@@ -185,6 +286,7 @@ async def health_check():
             "dashboard": "active"
         },
         "alert_stats": alert_stats,
+        "chizhevsky": chizhevsky_engine.get_status(),
         "ml_info": model_info
     }
 
@@ -197,6 +299,11 @@ async def get_current_solar_activity():
         "data_source": solar_data.get('data_source', 'unknown')
     }
 
+@app.get("/api/solar/cycle")
+async def get_solar_cycle_phase():
+    """Fase del ciclo solar desde el número de manchas suavizado a 13 meses"""
+    return {"solar_cycle": cycle_detector.get_phase(), "timestamp": datetime.now().isoformat()}
+
 @app.get("/api/social/analysis")
 async def get_social_analysis():
     social_data = historical_data[-1]['social'] if historical_data else await facebook_service.get_social_analysis()
@@ -216,12 +323,15 @@ async def get_realtime_correlation():
     resonance = historical_data[-1]['resonance']
     
     interpretation = "ALTA RESONANCIA" if resonance > 0.7 else "RESONANCIA MODERADA" if resonance > 0.4 else "RESONANCIA BAJA"
+    # Confianza del par solar-social más correlacionado en la ventana diaria
+    strongest = rolling_correlation.strongest_pair("daily")
     
     return {
         "correlation_analysis": {
             "solar_social_resonance": round(resonance, 3),
             "interpretation": interpretation,
-            "confidence": 0.85,
+            "confidence": strongest['confidence'] if strongest else 0.0,
+            "strongest_pair": strongest,
             "solar_cycle_phase": solar_data.get('solar_cycle_phase', 'unknown')
         },
         "crispation_alert": {
@@ -231,9 +341,141 @@ async def get_realtime_correlation():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+@app.get("/api/correlation/matrix")
+async def get_correlation_matrix(window: Optional[str] = None):
+    """Matrices de Pearson y Spearman solar × social mantenidas en línea (daily, weekly, monthly)"""
+    windows = rolling_correlation.window_names if window is None else [window]
+    if any(name not in rolling_correlation.window_names for name in windows):
+        raise HTTPException(status_code=400, detail=f"Ventana no válida. Opciones: {rolling_correlation.window_names}")
+    
+    # Los rangos se leen recorriendo los árboles (O(n)): fuera del event loop
+    spearman = await asyncio.to_thread(lambda: {name: rank_correlation.get_matrix(name) for name in windows})
+    
+    return {
+        "correlation_matrix": {name: rolling_correlation.get_matrix(name) for name in windows},
+        "spearman_matrix": spearman,
+        "rolling_state": rolling_correlation.get_info(),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@app.get("/api/correlation/lags")
+async def get_lagged_correlations(max_lag_hours: float = 720.0):
+    """Desfase de máxima correlación entre cada métrica solar y social (±30 días por defecto)"""
+    if max_lag_hours <= 0:
+        raise HTTPException(status_code=400, detail="max_lag_hours debe ser positivo")
+    
+    # Historial largo del feature store: FFT fuera del event loop (ventana por petición, sin estado compartido)
+    result = await asyncio.to_thread(lag_engine.run, list(historical_data), feature_store, max_lag_hours)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=f"Error en barrido de desfases: {result['error']}")
+    
+    return {
+        "lag_correlation": result,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@app.post("/api/correlation/granger")
+async def run_granger_causality(window_hours: Optional[float] = None):
+    """Test de Granger solar → social para todos los pares y desfases (cacheado por ventana)"""
+    if window_hours is not None and window_hours <= 0:
+        raise HTTPException(status_code=400, detail="window_hours debe ser positivo")
+    
+    # Job pesado (pool de procesos): fuera del event loop
+    result = await asyncio.to_thread(granger_engine.run, list(historical_data), feature_store, window_hours)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=f"Error en test de Granger: {result['error']}")
+    
+    return {"status": "success", "granger": result}
+
+@app.get("/api/correlation/granger")
+async def get_granger_causality():
+    """Última tabla F / p-valor calculada"""
+    if granger_engine.latest is None:
+        return {"error": "No hay test de Granger calculado", "suggestion": "POST /api/correlation/granger"}
+    return {"granger": granger_engine.latest}
+
+@app.post("/api/correlation/wavelet")
+async def run_wavelet_coherence(solar_metric: str = "sunspot_number", social_metric: str = "conflict_metric",
+                                resample_days: float = 1.0):
+    """Coherencia wavelet por periodo (rotación de 27 días, anual, ciclo de 11 años)"""
+    if solar_metric not in SOLAR_METRICS or social_metric not in SOCIAL_METRICS:
+        raise HTTPException(status_code=400, detail=f"Métricas válidas: {SOLAR_METRICS} × {SOCIAL_METRICS}")
+    if resample_days <= 0:
+        raise HTTPException(status_code=400, detail="resample_days debe ser positivo")
+    
+    # CWT + surrogates: fuera del event loop
+    result = await asyncio.to_thread(wavelet_engine.run, list(historical_data), feature_store,
+                                     solar_metric, social_metric, resample_days)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=f"Error en coherencia wavelet: {result['error']}")
+    
+    return {"status": "success", "wavelet_coherence": result}
+
+@app.post("/api/correlation/epochs")
+async def run_superposed_epochs(preset: Optional[str] = "kp7_storms", before_hours: Optional[float] = None,
+                                after_hours: Optional[float] = None, events: Optional[List[str]] = Body(None)):
+    """Épocas superpuestas: eventos explícitos (ISO, p. ej. de DONKI) o detectados con un preset"""
+    if (before_hours is not None and before_hours < 0) or (after_hours is not None and after_hours <= 0):
+        raise HTTPException(status_code=400, detail="Ventana de épocas no válida")
+    
+    result = await asyncio.to_thread(epoch_analyzer.run, list(historical_data), feature_store,
+                                     preset, events, before_hours, after_hours)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=f"Error en épocas superpuestas: {result['error']}")
+    
+    return {"status": "success", "superposed_epochs": result}
+
+@app.post("/api/correlation/significance")
+async def run_significance_test(solar_metric: str = "sunspot_number", social_metric: str = "conflict_metric",
+                                statistic: str = "pearson", method: str = "phase",
+                                n_surrogates: int = 1000, window_hours: Optional[float] = None):
+    """P-valor de un estadístico solar-social frente a surrogates (fases aleatorias o block bootstrap)"""
+    if solar_metric not in SOLAR_METRICS or social_metric not in SOCIAL_METRICS:
+        raise HTTPException(status_code=400, detail="Métrica no válida")
+    if not 10 <= n_surrogates <= 100000:
+        raise HTTPException(status_code=400, detail="n_surrogates debe estar entre 10 y 100000")
+    
+    result = await asyncio.to_thread(significance_engine.run, list(historical_data), feature_store,
+                                     solar_metric, social_metric, statistic, method, n_surrogates, window_hours)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=f"Error en test de significancia: {result['error']}")
+    
+    return {"status": "success", "significance": result}
+
+@app.post("/api/resonance/what-if")
+async def evaluate_resonance_weights(weights: dict = Body(...), start: Optional[str] = None,
+                                     end: Optional[str] = None):
+    """Resonancia con pesos alternativos sobre un rango temporal, sin modificar datos almacenados"""
+    try:
+        # Los ticks se guardan en UTC: una fecha sin zona no depende de la hora local del servidor
+        start_ts = iso_to_epoch(start) if start else None
+        end_ts = iso_to_epoch(end) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start/end deben ser fechas ISO")
+    
+    def evaluate():
+        # Log crudo del feature store (historial largo) o los ticks en memoria
+        timestamps, columns = feature_store.raw_columns(RESONANCE_METRICS, start_ts, end_ts)
+        if len(timestamps) == 0:
+            timestamps, columns = select_range(*history_columns(list(historical_data), RESONANCE_METRICS),
+                                               start_ts, end_ts)
+        return what_if(timestamps, columns, weights, RESONANCE_WEIGHTS)
+    
+    try:
+        result = await asyncio.to_thread(evaluate)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Error evaluando pesos de resonancia: {e}")
+    
+    return {"status": "success", "what_if": result}
+
 @app.get("/api/predictions/resonance")
-async def get_resonance_predictions(hours_ahead: int = 6):
-    """Predicciones ML de resonancia"""
+async def get_resonance_predictions(hours_ahead: int = 6, latency_budget_ms: Optional[float] = None):
+    """Predicciones ML de resonancia (latency_budget_ms limita el nivel de la cascada)"""
     if not historical_data:
         return {"error": "No hay datos históricos"}
     
@@ -241,7 +483,11 @@ async def get_resonance_predictions(hours_ahead: int = 6):
         return {"error": "Modelos ML no entrenados", "suggestion": "Esperar más datos históricos"}
     
     current_data = historical_data[-1]
-    prediction = predictor.predict_advanced_resonance(current_data, historical_data, hours_ahead)
+    if latency_budget_ms is None:
+        prediction, answered_by = await get_batched_prediction(hours_ahead)
+    else:
+        # La cascada puede llegar al ensemble completo: fuera del event loop
+        prediction, answered_by = await asyncio.to_thread(get_cached_prediction, hours_ahead, latency_budget_ms)
     
     return {
         "prediction_engine": "HelioBio-ML v1.1",
@@ -250,28 +496,128 @@ async def get_resonance_predictions(hours_ahead: int = 6):
             "resonance": current_data['resonance']
         },
         "predictions": prediction,
+        "cache_hit": answered_by == 'cache',
+        "answered_by": answered_by,
         "model_info": predictor.get_advanced_model_info(),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 @app.post("/api/ml/train")
-async def train_ml_models():
-    """Forzar entrenamiento de modelos ML"""
-    if len(historical_data) < 20:
+async def train_ml_models(mode: str = "auto", refit: str = "full"):
+    """Forzar entrenamiento de modelos ML (mode: auto | memory | chunked; refit: full | auto)"""
+    if mode not in ("auto", "memory", "chunked"):
+        raise HTTPException(status_code=400, detail="mode debe ser auto, memory o chunked")
+    if refit not in ("full", "auto"):
+        raise HTTPException(status_code=400, detail="refit debe ser full o auto")
+    if mode != "chunked" and len(historical_data) < 20:
         raise HTTPException(status_code=400, detail="Se necesitan al menos 20 puntos de datos históricos")
     
-    metrics = predictor.train_advanced_models(historical_data)
+    metrics = await asyncio.to_thread(train_models, mode, refit)
     
+    if metrics and metrics.get('skipped'):
+        return {"status": "skipped", "message": metrics['reason'], "metrics": metrics}
     if metrics and 'error' not in metrics:
+        prediction_cache.invalidate()
+        await asyncio.to_thread(precompute_predictions)
         return {
             "status": "success",
             "message": f"Modelos entrenados - R²: {metrics.get('best_r2', 0):.3f}",
             "metrics": metrics,
-            "training_samples": len(historical_data) - 1
+            "training_mode": metrics.get('training_mode', 'memory'),
+            "training_samples": metrics.get('train_samples', len(historical_data) - 1)
         }
     else:
         raise HTTPException(status_code=500, detail="Error entrenando modelos")
 
+@app.post("/api/ml/tune")
+async def tune_ml_models():
+    """Búsqueda walk-forward de hiperparámetros (usada por el re-entrenamiento periódico)"""
+    if len(historical_data) < 30:
+        raise HTTPException(status_code=400, detail="Se necesitan al menos 30 puntos de datos históricos")
+    
+    # Job pesado: fuera del event loop
+    summary = await asyncio.to_thread(tuner.run, list(historical_data))
+    
+    if 'error' in summary:
+        raise HTTPException(status_code=500, detail=f"Error en tuning: {summary['error']}")
+    
+    return {
+        "status": "success",
+        "message": f"Mejor familia: {summary['best_family']}",
+        "tuning": summary
+    }
+
+@app.post("/api/ml/backtest")
+async def run_backtest(retrain_every_hours: float = 168.0, train_window_hours: Optional[float] = None,
+                       family: str = "random_forest_advanced"):
+    """Backtest walk-forward del predictor sobre el historial almacenado"""
+    if retrain_every_hours <= 0:
+        raise HTTPException(status_code=400, detail="retrain_every_hours debe ser positivo")
+    
+    engine = BacktestEngine(predictor, retrain_every_hours=retrain_every_hours,
+                            train_window_hours=train_window_hours, family=family)
+    # Job pesado (pool de procesos): fuera del event loop
+    report = await asyncio.to_thread(engine.run, list(historical_data))
+    
+    if 'error' in report:
+        raise HTTPException(status_code=400, detail=f"Error en backtest: {report['error']}")
+    
+    return {"status": "success", "backtest": report}
+
+@app.get("/api/ml/importance")
+async def get_feature_importance():
+    """Importancia de características de la versión de modelo servida"""
+    if not predictor.is_trained:
+        raise HTTPException(status_code=400, detail="Modelos ML no entrenados")
+    return predictor.feature_importance
+
+@app.post("/api/ml/importance")
+async def compute_permutation_importance():
+    """Job offline de importancia por permutación sobre el holdout"""
+    if not predictor.is_trained:
+        raise HTTPException(status_code=400, detail="Modelos ML no entrenados")
+    
+    # Job pesado (columnas en paralelo): fuera del event loop
+    result = await asyncio.to_thread(importance_job.run)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=500, detail=f"Error en importancia: {result['error']}")
+    
+    prediction_cache.invalidate()
+    return {"status": "success", "importance": result}
+
+@app.get("/api/ml/compaction")
+async def get_compaction_report():
+    """Informe de compactación: tamaño, carga, latencia y error por variante"""
+    if not predictor.compaction_report:
+        return {"error": "No hay informe de compactación", "suggestion": "Entrenar modelos primero"}
+    return {
+        "compaction_report": predictor.compaction_report,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@app.post("/api/ml/compaction/select")
+async def select_compact_models(latency_budget_ms: float = 1.0):
+    """Elegir la variante compacta más precisa bajo un presupuesto de latencia"""
+    # Espera al lock de entrenamiento y guarda los modelos: fuera del event loop
+    result = await asyncio.to_thread(predictor.select_compact_models, latency_budget_ms)
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=result['error'])
+    
+    prediction_cache.invalidate()
+    return {"status": "success", **result}
+
+@app.post("/api/ml/compaction/profile")
+async def profile_compact_models(latency_runs: int = 200):
+    """Medir la latencia de las variantes compactas (opt-in) y re-elegir bajo el presupuesto vigente"""
+    # Mediciones repetidas por variante: fuera del event loop
+    result = await asyncio.to_thread(predictor.profile_compaction, latency_runs)
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=result['error'])
+    
+    prediction_cache.invalidate()
+    return {"status": "success", **result}
+
 @app.get("/api/alerts/active")
 async def get_active_alerts():
     """Alertas activas del sistema"""
@@ -408,8 +754,6 @@ from app.services.hybrid_social_service import hybrid_service
 # Modificar la función update_system_data para usar el servicio híbrido
 async def update_system_data():
     """Actualizar todos los datos del sistema con APIs reales y análisis híbrido"""
-    global historical_data
-    
     try:
         # Obtener datos solares REALES de NASA
         solar_data = await nasa_service.get_current_solar_activity()
@@ -419,27 +763,10 @@ async def update_system_data():
         
         # Calcular resonancia con datos reales
         resonance = calculate_resonance(solar_data, social_data)
-        current_data = {
-            'solar': solar_data,
-            'social': social_data,
-            'resonance': resonance
-        }
         
         # Analizar condiciones para alertas
         new_alerts = await alert_system.analyze_conditions(solar_data, social_data, resonance)
-        
-        # Guardar histórico
-        historical_data.append({
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'solar': solar_data,
-            'social': social_data,
-            'resonance': resonance,
-            'alerts_triggered': len(new_alerts)
-        })
-        
-        # Mantener últimos 200 puntos
-        if len(historical_data) > 200:
-            historical_data.pop(0)
+        alerts_triggered = len(new_alerts)
             
     except Exception as e:
         print(f"❌ Error actualizando datos del sistema: {e}")
@@ -448,10 +775,34 @@ async def update_system_data():
         social_data = await hybrid_service.get_enhanced_social_analysis(solar_data)
         
         resonance = calculate_resonance(solar_data, social_data)
-        historical_data.append({
+        alerts_triggered = 0
+    
+    # Real o de fallback: el tick pasa por la misma ingesta (store y estructuras en línea sin huecos)
+    try:
+        ingest_tick({
             'timestamp': datetime.now(timezone.utc).isoformat(),
             'solar': solar_data,
             'social': social_data,
             'resonance': resonance,
-            'alerts_triggered': 0
+            'alerts_triggered': alerts_triggered
         })
+        # Nuevo tick: invalidar y precalcular predicciones para dashboards (ensembles fuera del event loop)
+        prediction_cache.on_new_tick(historical_data[-1]['timestamp'])
+        await asyncio.to_thread(precompute_predictions)
+    except Exception as e:
+        print(f"❌ Error ingiriendo tick: {e}")
+
+def ingest_tick(tick: dict):
+    """Guardar el tick en el historial, el feature store y las estructuras de correlación y ciclo"""
+    historical_data.append(tick)
+    
+    # Mantener últimos 200 puntos
+    if len(historical_data) > 200:
+        historical_data.pop(0)
+    
+    # Features persistentes y aprendizaje incremental en cada tick
+    predictor.process_tick(historical_data)
+    rolling_correlation.update(tick)
+    rank_correlation.update(tick)
+    cycle_detector.update(datetime.fromisoformat(tick['timestamp']).timestamp(),
+                          tick['solar'].get('sunspot_number', 0))
@@ -6,14 +6,19 @@ import asyncio
 import logging
 from datetime import datetime
 import random
+from typing import Optional
+
+from app.core.solar_cycle import SolarCyclePhaseDetector
 
 logger = logging.getLogger(__name__)
 
 class RealSolarService:
     """Servicio corregido para datos solares realistas"""
     
-    def __init__(self):
+    def __init__(self, cycle_detector: Optional[SolarCyclePhaseDetector] = None):
         self.initialized = False
+        # Fase medida con datos ingeridos; sin él (o sin historial) se estima por calendario
+        self.cycle_detector = cycle_detector
         
     async def get_current_solar_data(self) -> dict:
         """Obtener datos solares con simulación mejorada del ciclo 25"""
@@ -84,11 +89,20 @@ class RealSolarService:
         monthly_adjustment = (current_month - 6) / 6.0  # ±16%
         base_sunspots *= (1 + monthly_adjustment * 0.16)
         
-        return {
+        cycle_data = {
             'base_sunspots': base_sunspots,
             'phase': phase,
             'progress': cycle_progress
         }
+        
+        if self.cycle_detector is not None and self.cycle_detector.ready:
+            detected = self.cycle_detector.get_phase()
+            cycle_data['phase'] = detected['phase']
+            cycle_data['smoothed_sunspots'] = detected['smoothed_sunspots']
+            if detected['cycle_progress'] is not None:
+                cycle_data['progress'] = detected['cycle_progress']
+        
+        return cycle_data
     
     def _calculate_flare_activity(self, sunspots: int) -> int:
         """Calcular actividad de fulguraciones basada en manchas solares"""
@@ -48,3 +48,46 @@ def mock_environment(monkeypatch):
     monkeypatch.setenv("ENVIRONMENT", "testing")
     monkeypatch.setenv("NASA_API_KEY", "test_nasa_key")
     monkeypatch.setenv("FACEBOOK_ACCESS_TOKEN", "test_fb_token")
+
+@pytest.fixture
+def synthetic_history():
+    """Historial sintético horario y determinista con la estructura de app.main"""
+    import numpy as np
+    from datetime import datetime, timedelta, timezone
+
+    def _build(n_points=200, tick=timedelta(hours=1), seed=7):
+        rng = np.random.RandomState(seed)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        history = []
+        for i in range(n_points):
+            phase = 2 * np.pi * i / 24.0
+            sunspots = 80 + 40 * np.sin(phase) + rng.normal(0, 5)
+            engagement = 50 + 20 * np.sin(phase + 0.5) + rng.normal(0, 3)
+            flares = int(rng.randint(0, 5))
+            geomagnetic = int(rng.randint(0, 4))
+            resonance = min(1.0, max(0.0,
+                sunspots / 150.0 * 0.20 + engagement / 100.0 * 0.25 +
+                flares / 5.0 * 0.25 + geomagnetic / 4.0 * 0.30
+            ))
+            history.append({
+                'timestamp': (start + i * tick).isoformat(),
+                'solar': {
+                    'sunspot_number': sunspots,
+                    'flare_activity': flares,
+                    'geomagnetic_storm': geomagnetic,
+                    'solar_wind_speed': 400 + rng.randint(-50, 100),
+                    'coronal_holes': int(rng.randint(0, 3))
+                },
+                'social': {
+                    'engagement_intensity': engagement,
+                    'sentiment_polarity': float(np.sin(phase) * 0.5),
+                    'conflict_metric': float(rng.uniform(0, 1)),
+                    'viral_content': int(rng.randint(0, 10)),
+                    'trending_topics': []
+                },
+                'resonance': resonance,
+                'alerts_triggered': 0
+            })
+        return history
+
+    return _build
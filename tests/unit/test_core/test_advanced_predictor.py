@@ -0,0 +1,49 @@
+# tests/unit/test_core/test_advanced_predictor.py
+import pytest
+import numpy as np
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+class TestAdvancedHelioBioPredictor:
+    
+    def test_horizon_targets_are_vectorized_shifts(self, tmp_path):
+        """Test objetivos multi-horizonte por desplazamiento"""
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        resonance = np.arange(10, dtype=float)
+        
+        Y = predictor._build_horizon_targets(resonance, [1, 3])
+        
+        assert Y.shape == (10, 2)
+        assert Y[0].tolist() == [1.0, 3.0]
+        assert np.isnan(Y[-1]).all()
+        assert np.isnan(Y[7, 1]) and Y[7, 0] == 8.0
+    
+    def test_multi_horizon_predictions_are_deterministic(self, tmp_path, synthetic_history):
+        """Test predicciones multi-horizonte deterministas y persistidas"""
+        history = synthetic_history(200)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        
+        metrics = predictor.train_advanced_models(history)
+        assert 'error' not in metrics
+        assert predictor.horizons == [1, 3, 6, 12, 24]
+        
+        first = predictor.predict_advanced_resonance(history[-1], history, hours_ahead=24)
+        second = predictor.predict_advanced_resonance(history[-1], history, hours_ahead=24)
+        assert first['horizon_predictions'] == second['horizon_predictions']
+        assert set(first['horizon_predictions']) == {'1_hour', '3_hour', '6_hour', '12_hour', '24_hour'}
+        
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        reloaded.load_models()
+        third = reloaded.predict_advanced_resonance(history[-1], history, hours_ahead=6)
+        assert third['horizon_predictions'] == {
+            k: v for k, v in first['horizon_predictions'].items() if k in ('1_hour', '3_hour', '6_hour')
+        }
+    
+    def test_untrainable_horizons_are_skipped(self, tmp_path, synthetic_history):
+        """Test horizontes sin historial suficiente no se entrenan"""
+        from datetime import timedelta
+        history = synthetic_history(120, tick=timedelta(minutes=1))
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        
+        predictor.train_advanced_models(history)
+        
+        assert predictor.horizons == [1]
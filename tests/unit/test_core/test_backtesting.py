@@ -0,0 +1,49 @@
+# tests/unit/test_core/test_backtesting.py
+import pytest
+import numpy as np
+from app.core.backtesting import BacktestEngine, cycle_phase_labels
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+class TestBacktesting:
+    
+    def test_report_per_horizon_and_phase(self, tmp_path, synthetic_history):
+        """Test informe con MAE/R²/acierto por horizonte y fase del ciclo"""
+        history = synthetic_history(200)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        engine = BacktestEngine(predictor, retrain_every_hours=24, family='poly_ridge', n_jobs=1)
+        
+        report = engine.run(history)
+        
+        assert 'error' not in report
+        assert report['horizons'] == [1, 3, 6, 12, 24]
+        assert report['n_slices'] > 1
+        for summary in report['by_horizon'].values():
+            assert summary['samples'] == report['samples']
+            assert 0.0 <= summary['hit_rate'] <= 1.0
+        assert set(report['by_cycle_phase']) <= {'minimum', 'ascending', 'maximum', 'descending'}
+        assert (tmp_path / "advanced_backtest.json").exists()
+    
+    def test_parallel_matches_sequential(self, tmp_path, synthetic_history):
+        """Test tramos en paralelo con el mismo resultado que en secuencia"""
+        history = synthetic_history(160)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        
+        sequential = BacktestEngine(predictor, retrain_every_hours=24, family='poly_ridge', n_jobs=1).run(history)
+        parallel = BacktestEngine(predictor, retrain_every_hours=24, family='poly_ridge', n_jobs=2).run(history)
+        
+        assert sequential['by_horizon'] == parallel['by_horizon']
+    
+    def test_cycle_phase_labels(self):
+        """Test fases mínimo/ascendente/máximo/descendente sobre un ciclo sintético, sin mirar al futuro"""
+        timestamps = np.arange(0, 4000) * 86400.0
+        sunspots = 100 - 100 * np.cos(2 * np.pi * timestamps / (4000 * 86400.0))
+        
+        phases = cycle_phase_labels(sunspots, timestamps)
+        
+        assert phases[0] is None
+        assert phases[600] == 'minimum'
+        assert phases[1000] == 'ascending'
+        assert phases[2000] == 'maximum'
+        assert phases[3000] == 'descending'
+        # Etiquetas causales: añadir datos posteriores no cambia las anteriores
+        assert list(cycle_phase_labels(sunspots[:2500], timestamps[:2500])) == list(phases[:2500])
@@ -1,6 +1,8 @@
 # tests/unit/test_core/test_chizhevsky_engine.py
+import asyncio
+import numpy as np
 import pytest
-from app.core.chizhevsky_engine import ChizhevskyEngine
+from app.core.chizhevsky_engine import BATCH_SOCIAL_COLUMNS, RESONANCE_LEVELS, ChizhevskyEngine
 
 class TestChizhevskyEngine:
     
@@ -42,3 +44,59 @@ class TestChizhevskyEngine:
         )
         
         assert -1 <= correlation <= 1
+
+class _StaticSolarMonitor:
+    def __init__(self, activity):
+        self.activity = activity
+
+    async def get_current_activity(self):
+        return self.activity
+
+class TestBatchResonance:
+
+    SOLAR = {'sunspot_number': 250, 'flare_activity': 8, 'geomagnetic_storm': 8}
+
+    def test_batch_matches_scalar_path(self):
+        """Test cada stream del lote coincide con el cálculo escalar de un único feed"""
+        rng = np.random.default_rng(0)
+        engine = ChizhevskyEngine(_StaticSolarMonitor(self.SOLAR), None)
+        engine.solar_cycle_phase = "maximum"
+        streams = np.column_stack([rng.uniform(0, 100, 500), rng.uniform(-1, 1, 500), rng.uniform(0, 1, 500)])
+
+        batch = engine.compute_batch_resonance(self.SOLAR, streams)
+
+        for i in range(0, 500, 25):
+            metrics = asyncio.run(engine._compute_resonance_metrics(
+                self.SOLAR, dict(zip(BATCH_SOCIAL_COLUMNS, streams[i]))))
+            for name, values in batch['resonance_metrics'].items():
+                assert values[i] == pytest.approx(metrics[name])
+            heading = engine._chizhevsky_interpretation(metrics).split(':')[0]
+            assert RESONANCE_LEVELS[batch['resonance_level'][i]] in heading.split()
+            assert batch['crispation_alert'][i] == (engine._check_crispation_alert(metrics)['level'] == "HIGH")
+            assert batch['collective_excitability'][i] == pytest.approx(
+                engine._calculate_collective_excitability(metrics))
+
+    def test_report_for_many_streams(self):
+        """Test el informe por columnas de 10k streams: niveles, alertas agregadas y top streams"""
+        rng = np.random.default_rng(1)
+        engine = ChizhevskyEngine(_StaticSolarMonitor(self.SOLAR), None)
+        columns = {'engagement_intensity': rng.uniform(0, 100, 10000),
+                   'sentiment_polarity': rng.uniform(-1, 1, 10000),
+                   'conflict_metric': rng.uniform(0, 1, 10000)}
+
+        report = asyncio.run(engine.calculate_batch_correlation(columns, top_k=5))
+
+        assert report['n_streams'] == 10000 and len(report['resonance_level']) == 10000
+        assert sum(report['summary']['levels'].values()) == 10000
+        assert report['summary']['crispation_streams'] == sum(report['crispation_alert']) > 0
+        assert len(engine.crispation_alerts) == 1 and len(engine.crispation_alerts[0]['streams']) == 5
+        top = [s['collective_excitability'] for s in report['summary']['top_streams']]
+        assert top == sorted(top, reverse=True) and top[0] == pytest.approx(max(report['collective_excitability']), abs=1e-4)
+
+    def test_rejects_malformed_matrix(self):
+        """Test una matriz sin las columnas esperadas o ids desalineados devuelven error"""
+        engine = ChizhevskyEngine(_StaticSolarMonitor(self.SOLAR), None)
+
+        assert 'error' in asyncio.run(engine.calculate_batch_correlation(np.zeros((4, 2))))
+        assert 'error' in asyncio.run(engine.calculate_batch_correlation(np.zeros((4, 3)), stream_ids=['a']))
+        assert engine.status == "error"
@@ -0,0 +1,58 @@
+# tests/unit/test_core/test_chunked_training.py
+import pytest
+import numpy as np
+from app.core.chunked_training import ChunkedTrainer, _StreamingRegressionMetrics
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+def _predictor_with_store(tmp_path, history):
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+    predictor.feature_store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+    for tick in history:
+        predictor.feature_store.append_tick(tick)
+    return predictor
+
+class TestChunkedTraining:
+
+    def test_streaming_metrics_match_batch(self):
+        """Test MAE y R² acumulados por chunks iguales al cálculo en bloque"""
+        rng = np.random.RandomState(0)
+        y_true, y_pred = rng.rand(500), rng.rand(500)
+        metrics = _StreamingRegressionMetrics()
+        for start in range(0, 500, 64):
+            metrics.update(y_true[start:start + 64], y_pred[start:start + 64])
+
+        mae, r2 = metrics.result()
+        expected_r2 = 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - y_true.mean()) ** 2)
+        assert mae[0] == pytest.approx(np.mean(np.abs(y_true - y_pred)))
+        assert r2[0] == pytest.approx(expected_r2)
+
+    def test_chunk_size_does_not_change_scaler(self, tmp_path, synthetic_history):
+        """Test el escalador en streaming no depende del tamaño de chunk"""
+        history = synthetic_history(120)
+        small = _predictor_with_store(tmp_path / "a", history)
+        large = _predictor_with_store(tmp_path / "b", history)
+
+        assert 'error' not in ChunkedTrainer(small, chunk_rows=7, epochs=1).train()
+        assert 'error' not in ChunkedTrainer(large, chunk_rows=10_000, epochs=1).train()
+
+        np.testing.assert_allclose(small.scalers['advanced'].mean_, large.scalers['advanced'].mean_)
+        np.testing.assert_allclose(small.scalers['advanced'].var_, large.scalers['advanced'].var_, atol=1e-12)
+
+    def test_chunked_models_serve_and_survive_reload(self, tmp_path, synthetic_history):
+        """Test modelos chunked instalados, servibles y recargables"""
+        history = synthetic_history(150)
+        predictor = _predictor_with_store(tmp_path, history)
+
+        metrics = ChunkedTrainer(predictor, chunk_rows=32).train()
+
+        assert metrics['training_mode'] == 'chunked'
+        assert metrics['test_samples'] + metrics['train_samples'] == predictor.feature_store.n_rows - 1
+        assert 1 in predictor.horizons
+        prediction = predictor.predict_advanced_resonance(history[-1], history[-30:-1])
+        assert set(prediction['model_predictions']) == {'sgd_chunked', 'hist_gradient_boosting'}
+
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        reloaded.load_models()
+        assert set(reloaded.models) == {'sgd_chunked', 'hist_gradient_boosting'}
+        assert reloaded.model_version == predictor.model_version
@@ -0,0 +1,96 @@
+# tests/unit/test_core/test_feature_store.py
+import pytest
+import numpy as np
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.time_series import SOCIAL_METRICS, SOLAR_METRICS, history_columns, load_metric_series
+
+class TestFeatureStore:
+    
+    def test_per_tick_rows_match_batch_features(self, tmp_path, synthetic_history):
+        """Test filas por tick idénticas a las calculadas en batch"""
+        history = synthetic_history(60)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        
+        for tick in history:
+            store.append_tick(tick)
+        store.append_tick(history[-1])  # tick repetido: se ignora
+        
+        timestamps, X, resonance, names = store.load_matrix()
+        X_batch, resonance_batch, batch_names = predictor._build_feature_matrix(history)
+        assert store.n_rows == len(history) - 19
+        assert names == batch_names
+        np.testing.assert_allclose(X, X_batch[-store.n_rows:])
+        np.testing.assert_allclose(resonance, resonance_batch[-store.n_rows:])
+    
+    def test_definition_change_triggers_backfill(self, tmp_path, synthetic_history, monkeypatch):
+        """Test nueva versión de features reconstruida desde el log crudo"""
+        history = synthetic_history(80)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+        
+        monkeypatch.setattr(FeatureStore, "compute_definition_hash", staticmethod(lambda p: "b" * 64))
+        new_store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        assert new_store.needs_backfill
+        
+        new_store.backfill(chunk_size=7)
+        
+        X_batch, _, _ = predictor._build_feature_matrix(history)
+        assert not new_store.needs_backfill
+        np.testing.assert_allclose(new_store.load_matrix()[1], X_batch)
+        reopened = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        assert reopened.n_rows == len(X_batch)
+    
+    def test_training_reads_longer_history_from_store(self, tmp_path, synthetic_history):
+        """Test el entrenamiento usa el store cuando cubre más historia"""
+        history = synthetic_history(150)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        predictor.feature_store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        for end in range(1, len(history) + 1):
+            predictor.process_tick(history[:end])
+        
+        X_all, _, _, _ = predictor._training_matrix(history[-40:])
+        
+        assert len(X_all) == predictor.feature_store.n_rows == 131
+        assert predictor.online_predictor.updates == 130
+    
+    def test_metric_series_reads_raw_ticks_from_log(self, tmp_path, synthetic_history):
+        """Test las series largas salen del log crudo: valores por tick, no medias de ventana"""
+        history = synthetic_history(100)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+        metrics = SOLAR_METRICS + SOCIAL_METRICS
+        
+        timestamps, columns, source = load_metric_series(history[-20:], metrics, store)
+        
+        expected_timestamps, expected = history_columns(history, metrics)
+        assert source == 'raw_log'
+        np.testing.assert_allclose(timestamps, expected_timestamps)
+        for metric in metrics:
+            np.testing.assert_allclose(columns[metric], expected[metric])
+        assert load_metric_series(history, metrics, store)[2] == 'memory'
+    
+    def test_raw_columns_parse_only_appended_ticks(self, tmp_path, synthetic_history):
+        """Test lecturas sucesivas del log crudo: solo se parsean las líneas nuevas y completas"""
+        history = synthetic_history(60)
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        for tick in history[:40]:
+            store.append_tick(tick)
+        assert len(store.raw_columns(['sunspot_number'])[0]) == 40
+        
+        for tick in history[40:]:
+            store.append_tick(tick)
+        with open(store.raw_log_path, 'a') as f:
+            f.write('{"timestamp": "2024-')  # tick a medio escribir
+        timestamps, columns = store.raw_columns(['sunspot_number', 'conflict_metric'], chunk_size=7)
+        
+        expected_timestamps, expected = history_columns(history, ['sunspot_number', 'conflict_metric'])
+        np.testing.assert_allclose(timestamps, expected_timestamps)
+        np.testing.assert_allclose(columns['conflict_metric'], expected['conflict_metric'])
+        assert store._raw_offset < store.raw_log_size
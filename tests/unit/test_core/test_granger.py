@@ -0,0 +1,74 @@
+# tests/unit/test_core/test_granger.py
+import numpy as np
+from app.core import granger
+from app.core.granger import GrangerCausalityEngine
+from app.core.time_series import load_metric_series, resample_mean
+
+def _planted_series(n: int = 24 * 60, seed: int = 5):
+    """Conflicto que responde a la tormenta geomagnética con 3 horas de retraso"""
+    rng = np.random.default_rng(seed)
+    storm = rng.normal(size=n)
+    conflict = np.zeros(n)
+    for t in range(3, n):
+        conflict[t] = 0.3 * conflict[t - 1] + 0.5 * storm[t - 3] + rng.normal()
+    return np.arange(n) * 3600.0, {
+        'geomagnetic_storm': storm,
+        'sunspot_number': rng.normal(size=n),
+        'conflict_metric': conflict,
+        'engagement_intensity': rng.normal(size=n)
+    }
+
+class TestGrangerCausality:
+
+    def test_detects_planted_driver(self):
+        """Test se detecta el driver real y su desfase; el par independiente no es significativo"""
+        timestamps, columns = _planted_series()
+        engine = GrangerCausalityEngine(max_lags=(1, 3, 6), n_jobs=1,
+                                        solar_metrics=['geomagnetic_storm', 'sunspot_number'],
+                                        social_metrics=['conflict_metric', 'engagement_intensity'])
+
+        result = engine.test(*engine._prepare(timestamps, columns, None))
+        pairs = {(pair['driver'], pair['response']): pair for pair in result['pairs']}
+        planted = pairs[('geomagnetic_storm', 'conflict_metric')]
+
+        assert result['pairs'][0] is planted
+        assert planted['significant'] and planted['best_lag'] in (3, 6)
+        assert planted['by_lag'][0]['max_lag'] == 1 and planted['by_lag'][0]['p_value'] > 0.01
+        assert not pairs[('sunspot_number', 'engagement_intensity')]['significant']
+
+    def test_run_caches_per_data_window(self, synthetic_history):
+        """Test la misma ventana reutiliza la tabla y una ventana distinta se recalcula"""
+        history = synthetic_history(200)
+        engine = GrangerCausalityEngine(max_lags=(1, 2), n_jobs=1)
+
+        result = engine.run(history)
+
+        assert len(result['pairs']) == 5 * 4
+        assert all(0.0 <= pair['p_value'] <= pair['p_value_adjusted'] <= 1.0 for pair in result['pairs'])
+        assert engine.run(history) is result
+        assert engine.run(history, window_hours=120) is not result
+        assert engine.latest['n_points'] < result['n_points']
+        assert 'error' in engine.run(history[:20])
+
+    def test_cache_lookup_precedes_loading(self, synthetic_history, monkeypatch):
+        """Test repetir la misma ventana no vuelve a cargar las series (ni el log crudo)"""
+        history = synthetic_history(200)
+        engine = GrangerCausalityEngine(max_lags=(1, 2), n_jobs=1)
+        loads = []
+        monkeypatch.setattr(granger, 'load_metric_series',
+                            lambda *args: loads.append(1) or load_metric_series(*args))
+
+        result = engine.run(history)
+
+        assert engine.run(history) is result and len(loads) == 1
+        assert engine.run(history[1:] + synthetic_history(201)[-1:]) is not result and len(loads) == 2
+
+    def test_resample_mean_fills_gaps(self):
+        """Test el remuestreo promedia cada intervalo y repite el último valor en huecos"""
+        timestamps = np.array([0.0, 1800.0, 3600.0, 4.5 * 3600])
+        values = {'x': np.array([1.0, 3.0, 5.0, 7.0])}
+
+        grid, resampled = resample_mean(timestamps, values, 3600.0)
+
+        np.testing.assert_array_equal(grid, [0.0, 3600.0, 7200.0, 10800.0, 14400.0])
+        np.testing.assert_array_equal(resampled['x'], [2.0, 5.0, 5.0, 5.0, 7.0])
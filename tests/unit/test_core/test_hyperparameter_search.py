@@ -0,0 +1,45 @@
+# tests/unit/test_core/test_hyperparameter_search.py
+import json
+import pytest
+from app.core.hyperparameter_search import WalkForwardTuner
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+SMALL_SEARCH_SPACE = {
+    'random_forest_advanced': {'n_estimators': [10], 'max_depth': [3, 6]},
+    'poly_ridge': {'alpha': [1.0, 100.0]}
+}
+
+class TestWalkForwardTuner:
+    
+    def test_tuning_persists_winning_configuration(self, tmp_path, synthetic_history):
+        """Test búsqueda walk-forward y persistencia del ganador"""
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        tuner = WalkForwardTuner(predictor, n_splits=3, search_space=SMALL_SEARCH_SPACE, n_jobs=2)
+        
+        summary = tuner.run(synthetic_history(120))
+        
+        assert 'error' not in summary
+        assert summary['n_candidates'] == 4
+        assert summary['n_folds'] == 3
+        assert set(summary['best_params']) == set(SMALL_SEARCH_SPACE)
+        with open(tmp_path / "advanced_tuning.json") as f:
+            assert json.load(f)['best_params'] == summary['best_params']
+    
+    def test_trainer_uses_tuned_parameters(self, tmp_path, synthetic_history):
+        """Test el entrenador usa la configuración persistida"""
+        with open(tmp_path / "advanced_tuning.json", 'w') as f:
+            json.dump({'best_params': {'random_forest_advanced': {'n_estimators': 7, 'max_depth': 3}}}, f)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        
+        predictor.train_advanced_models(synthetic_history(80))
+        
+        forest = predictor.models['random_forest_advanced']
+        assert forest.n_estimators == 7
+        assert forest.max_depth == 3
+        assert predictor.models['gradient_boosting'].n_estimators == 100
+    
+    def test_insufficient_data_reports_error(self, tmp_path, synthetic_history):
+        """Test error con historial insuficiente"""
+        tuner = WalkForwardTuner(AdvancedHelioBioPredictor(model_path=str(tmp_path)))
+        
+        assert 'error' in tuner.run(synthetic_history(25))
@@ -0,0 +1,80 @@
+# tests/unit/test_core/test_lag_correlation.py
+import numpy as np
+from app.core.feature_store import FeatureStore
+from app.core.lag_correlation import LagCorrelationEngine, cross_correlation
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+class TestLagCorrelation:
+
+    def test_fft_matches_direct_correlation(self):
+        """Test la correlación cruzada por FFT coincide con el cálculo directo por desfase"""
+        rng = np.random.default_rng(0)
+        solar, social = rng.normal(size=(2, 300)), rng.normal(size=(3, 300))
+
+        lags, ccf = cross_correlation(solar, social, max_lag=20)
+
+        zs = (solar - solar.mean(axis=1, keepdims=True)) / solar.std(axis=1, keepdims=True)
+        zq = (social - social.mean(axis=1, keepdims=True)) / social.std(axis=1, keepdims=True)
+        for k, lag in enumerate(lags):
+            if lag >= 0:
+                direct = zs[:, None, :300 - lag] * zq[None, :, lag:]
+            else:
+                direct = zs[:, None, -lag:] * zq[None, :, :300 + lag]
+            np.testing.assert_allclose(ccf[:, :, k], direct.mean(axis=2), atol=1e-10)
+
+    def test_recovers_planted_lag(self):
+        """Test se recupera un desfase conocido (social 36h tras la solar) con confianza alta"""
+        rng = np.random.default_rng(1)
+        n, lag = 24 * 120, 36
+        driver = np.convolve(rng.normal(size=n + lag), np.ones(6) / 6, mode='same')
+        columns = {
+            'sunspot_number': driver[lag:],
+            'engagement_intensity': driver[:n] + 0.3 * rng.normal(size=n),
+            'conflict_metric': rng.normal(size=n)
+        }
+        timestamps = np.arange(n) * 3600.0
+        engine = LagCorrelationEngine(solar_metrics=['sunspot_number'],
+                                      social_metrics=['engagement_intensity', 'conflict_metric'])
+
+        result = engine.scan(timestamps, columns)
+        pairs = {pair['social_metric']: pair for pair in result['pairs']}
+
+        assert result['max_lag_ticks'] == 720
+        assert pairs['engagement_intensity']['lag_hours'] == 36
+        assert pairs['engagement_intensity']['confidence'] > 0.99
+        assert pairs['conflict_metric']['confidence'] < 0.9
+
+    def test_run_from_history_is_cached(self, synthetic_history):
+        """Test barrido sobre el historial de ticks, cacheado mientras no llegue un tick nuevo"""
+        history = synthetic_history(200)
+        engine = LagCorrelationEngine(max_lag_hours=48)
+
+        result = engine.run(history)
+
+        assert result['source'] == 'memory'
+        assert len(result['pairs']) == 5 * 4
+        assert result['max_lag_ticks'] == 48
+        assert all(abs(pair['lag_ticks']) <= 48 and 0 <= pair['confidence'] <= 1 for pair in result['pairs'])
+        assert engine.run(history) is result
+        assert engine.run(history[:-1]) is not result
+        assert 'error' in engine.run(history[:10])
+
+    def test_store_cache_hit_skips_log_and_keys_on_window(self, tmp_path, synthetic_history, monkeypatch):
+        """Test un acierto de caché no relee el log crudo y la ventana de desfases es parte de la clave"""
+        history = synthetic_history(200)
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+        reads = []
+        raw_columns = store.raw_columns
+        monkeypatch.setattr(store, 'raw_columns', lambda *args, **kwargs: reads.append(1) or raw_columns(*args, **kwargs))
+        engine = LagCorrelationEngine()
+
+        wide = engine.run(history[-20:], store, max_lag_hours=48)
+        assert wide['source'] == 'raw_log' and wide['max_lag_ticks'] == 48
+        assert engine.run(history[-20:], store, max_lag_hours=48) is wide and len(reads) == 1
+
+        narrow = engine.run(history[-20:], store, max_lag_hours=12)
+        assert narrow['max_lag_ticks'] == 12 and len(reads) == 2
+        assert engine.max_lag_hours == 720.0
@@ -0,0 +1,74 @@
+# tests/unit/test_core/test_micro_batcher.py
+import pytest
+import asyncio
+from app.core.micro_batcher import PredictionMicroBatcher
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+@pytest.fixture
+def trained_predictor(tmp_path, synthetic_history):
+    history = synthetic_history(120)
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+    predictor.train_advanced_models(history)
+    return predictor, history
+
+class TestMicroBatcher:
+    
+    def test_batch_matches_single_predictions(self, trained_predictor):
+        """Test predicción por lotes idéntica a la predicción individual"""
+        predictor, history = trained_predictor
+        requests = [(history[end], history[:end], 24) for end in range(60, 70)]
+        
+        batch = predictor.predict_advanced_batch(requests)
+        single = [predictor.predict_advanced_resonance(*request) for request in requests]
+        
+        for b, s in zip(batch, single):
+            assert b['predicted_resonance'] == pytest.approx(s['predicted_resonance'])
+            assert b['horizon_predictions'] == pytest.approx(s['horizon_predictions'])
+    
+    def test_concurrent_requests_share_batches(self, trained_predictor):
+        """Test peticiones concurrentes agrupadas y resultados devueltos a cada una"""
+        predictor, history = trained_predictor
+        batcher = PredictionMicroBatcher(predictor, max_batch_size=8, max_wait_ms=50)
+        
+        async def run():
+            results = await asyncio.gather(*[
+                batcher.predict(history[end], history[:end], 6) for end in range(40, 60)
+            ])
+            await batcher.stop()
+            return results
+        
+        results = asyncio.run(run())
+        
+        assert len(results) == 20
+        assert batcher.largest_batch == 8
+        assert batcher.batches < 20
+        expected = predictor.predict_advanced_resonance(history[45], history[:45], 6)
+        assert results[5]['predicted_resonance'] == pytest.approx(expected['predicted_resonance'])
+    
+    def test_identical_inflight_requests_are_merged(self, trained_predictor):
+        """Test peticiones concurrentes del mismo tick y horizonte comparten una única inferencia"""
+        predictor, history = trained_predictor
+        batcher = PredictionMicroBatcher(predictor, max_batch_size=8, max_wait_ms=50)
+        
+        async def run():
+            results = await asyncio.gather(*[
+                batcher.predict(history[50], history[:50], hours) for hours in [6] * 10 + [24] * 5
+            ])
+            await batcher.stop()
+            return results
+        
+        results = asyncio.run(run())
+        
+        assert batcher.requests == 2 and batcher.merged_requests == 13
+        assert all(result is results[0] for result in results[:10])
+        assert all(result is results[10] for result in results[10:])
+        assert not batcher._inflight
+    
+    def test_invalid_request_does_not_break_batch(self, trained_predictor):
+        """Test una petición sin contexto suficiente devuelve error sin afectar al resto"""
+        predictor, history = trained_predictor
+        
+        responses = predictor.predict_advanced_batch([(history[50], history[:50], 6), (history[5], history[:5], 6)])
+        
+        assert 'predicted_resonance' in responses[0]
+        assert 'error' in responses[1]
@@ -0,0 +1,106 @@
+# tests/unit/test_core/test_model_compaction.py
+import pytest
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from app.core.model_compaction import ModelCompactor, truncate_depth, select_members, cap_leaves, split_gains
+from app.core.tree_compiler import compile_tree_ensemble
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+@pytest.fixture
+def regression_data():
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(400, 6))
+    y = X[:, 0] + 0.5 * np.sin(2 * X[:, 1]) + 0.1 * rng.normal(size=400)
+    return X[:300], y[:300], X[300:], y[300:]
+
+class TestModelCompaction:
+    
+    def test_depth_truncation(self, regression_data):
+        """Test poda de profundidad y eliminación de nodos inalcanzables"""
+        X, y, X_val, _ = regression_data
+        model = RandomForestRegressor(n_estimators=10, max_depth=10, random_state=0).fit(X, y)
+        compiled = compile_tree_ensemble(model)
+        
+        truncated = truncate_depth(compiled, 3)
+        
+        assert truncated.max_depth == 3
+        assert truncated.n_nodes <= 10 * (2 ** 4 - 1)
+        assert np.isfinite(truncated.predict(X_val)).all()
+    
+    def test_leaf_cap_matches_max_leaf_nodes(self, regression_data):
+        """Test poda de hojas primero-el-mejor equivalente a entrenar con max_leaf_nodes"""
+        X, y, X_val, _ = regression_data
+        params = dict(n_estimators=3, bootstrap=False, max_features=None, random_state=0)
+        model = RandomForestRegressor(**params).fit(X, y)
+        reference = RandomForestRegressor(max_leaf_nodes=8, **params).fit(X, y)
+        
+        capped = cap_leaves(compile_tree_ensemble(model), 8, split_gains(model))
+        
+        assert capped.n_nodes == sum(e.tree_.node_count for e in reference.estimators_)
+        np.testing.assert_allclose(capped.predict(X_val), reference.predict(X_val), atol=1e-12)
+    
+    def test_member_selection_does_not_hurt_selection_error(self, regression_data):
+        """Test selección de miembros (RF greedy y prefijo de GB)"""
+        X, y, X_val, y_val = regression_data
+        for model, averaging in (
+            (RandomForestRegressor(n_estimators=30, random_state=0).fit(X, y), True),
+            (GradientBoostingRegressor(n_estimators=60, random_state=0).fit(X, y), False)
+        ):
+            compiled = compile_tree_ensemble(model)
+            selected = select_members(compiled, averaging, X_val, y_val)
+            
+            assert selected.n_trees <= compiled.n_trees
+            full_error = np.abs(compiled.predict(X_val) - y_val).mean()
+            assert np.abs(selected.predict(X_val) - y_val).mean() <= full_error + 1e-12
+    
+    def test_report_and_budget_selection(self, regression_data):
+        """Test informe por variante y elección bajo presupuesto"""
+        X, y, X_val, y_val = regression_data
+        model = RandomForestRegressor(n_estimators=20, max_depth=10, random_state=0).fit(X, y)
+        compactor = ModelCompactor(latency_budget_ms=1000.0, latency_runs=5)
+        
+        result = compactor.compact(model, X_val, y_val)
+        
+        names = [r["variant"] for r in result["variants"]]
+        assert {"sklearn", "compiled", "full+select+f32", "depth4+select"} <= set(names)
+        for entry in result["variants"]:
+            assert {"size_bytes", "load_ms", "latency_us", "val_mae", "val_r2"} <= set(entry)
+        best = min(result["variants"], key=lambda r: (r["val_mae"], r["size_bytes"]))
+        assert result["selected"] == best["variant"]
+        fastest = min(result["variants"], key=lambda r: r["latency_us"])
+        assert compactor.select(result["variants"], latency_budget_ms=1e-6) == fastest["variant"]
+    
+    def test_predictor_persists_selected_variant(self, tmp_path, synthetic_history):
+        """Test el predictor sirve y restaura la variante elegida"""
+        history = synthetic_history(120)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        predictor.train_advanced_models(history)
+        
+        assert set(predictor.compaction_report) >= {'random_forest_advanced', 'gradient_boosting'}
+        first = predictor.predict_advanced_resonance(history[-1], history)
+        
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        reloaded.load_models()
+        second = reloaded.predict_advanced_resonance(history[-1], history)
+        
+        assert second['model_predictions'] == pytest.approx(first['model_predictions'])
+        assert reloaded.get_advanced_model_info()['compaction'] == predictor.get_advanced_model_info()['compaction']
+    
+    def test_latency_is_opt_in_and_weights_follow_served_variant(self, tmp_path, synthetic_history):
+        """Test sin medir latencia al entrenar, perfilado bajo demanda y pesos del ensemble de la variante servida"""
+        history = synthetic_history(120)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        predictor.train_advanced_models(history)
+        
+        entry = predictor.compaction_report['random_forest_advanced']
+        assert all(r['latency_us'] is None for r in entry['variants'])
+        served = next(r for r in entry['variants'] if r['variant'] == entry['selected'])
+        assert predictor._serving_r2('random_forest_advanced') == served['val_r2']
+        
+        result = predictor.profile_compaction(latency_runs=3)
+        
+        assert result['latency_profiled']
+        entry = predictor.compaction_report['random_forest_advanced']
+        assert all(r['latency_us'] > 0 for r in entry['variants'])
+        served = next(r for r in entry['variants'] if r['variant'] == entry['selected'])
+        assert predictor._serving_r2('random_forest_advanced') == served['val_r2']
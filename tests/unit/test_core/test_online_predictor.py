@@ -0,0 +1,49 @@
+# tests/unit/test_core/test_online_predictor.py
+import pytest
+import numpy as np
+from app.core.online_predictor import OnlineHelioBioPredictor
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+class TestOnlineHelioBioPredictor:
+    
+    def test_learns_incrementally_after_warmup(self, tmp_path):
+        """Test aprendizaje incremental tick a tick"""
+        online = OnlineHelioBioPredictor(model_path=str(tmp_path), warmup_ticks=5)
+        rng = np.random.RandomState(0)
+        
+        for _ in range(5):
+            online.update(rng.normal(size=4), 0.5)
+        assert online.predict(rng.normal(size=4)) is None
+        
+        online.update(rng.normal(size=4), 0.5)
+        prediction = online.predict(rng.normal(size=4))
+        assert online.updates == 5
+        assert 0.0 <= prediction <= 1.0
+    
+    def test_checkpoint_roundtrip(self, tmp_path):
+        """Test checkpoints periódicos y restauración"""
+        online = OnlineHelioBioPredictor(model_path=str(tmp_path), checkpoint_every=3, warmup_ticks=1)
+        for i in range(4):
+            online.update(np.ones(3) * i, 0.1 * i)
+        
+        restored = OnlineHelioBioPredictor(model_path=str(tmp_path), warmup_ticks=1)
+        assert restored.load_checkpoint()
+        assert restored.updates == 3
+        assert restored.predict(np.ones(3)) == online.predict(np.ones(3))
+        
+        # La fila pendiente no se restaura: el primer tick tras el reinicio no se aprende como su objetivo
+        assert restored.pending_features is None
+        restored.update(np.ones(3) * 9, 0.9)
+        assert restored.updates == 3
+    
+    def test_runs_alongside_batch_predictor(self, tmp_path, synthetic_history):
+        """Test predictor online integrado en AdvancedHelioBioPredictor"""
+        history = synthetic_history(60)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        
+        for end in range(20, len(history) + 1):
+            predictor.process_tick(history[:end])
+        
+        info = predictor.get_advanced_model_info()["online_learning"]
+        assert info["updates"] == len(history) - 20
+        assert info["is_ready"]
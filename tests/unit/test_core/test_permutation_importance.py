@@ -0,0 +1,62 @@
+# tests/unit/test_core/test_permutation_importance.py
+import pytest
+import numpy as np
+from app.core.permutation_importance import PermutationImportanceJob
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+@pytest.fixture
+def trained_predictor(tmp_path, synthetic_history):
+    history = synthetic_history(120)
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+    predictor.train_advanced_models(history)
+    return predictor, history
+
+class TestPermutationImportance:
+    
+    def test_importance_cached_per_model_version(self, trained_predictor, tmp_path):
+        """Test importancia calculada al entrenar, servida sin recalcular y persistida en el manifiesto"""
+        predictor, history = trained_predictor
+        
+        assert predictor.feature_importance['model_version'] == predictor.model_version
+        prediction = predictor.predict_advanced_resonance(history[-1], history)
+        assert prediction['feature_importance'] == predictor.feature_importance['top']
+        
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        reloaded.load_models()
+        assert reloaded.feature_importance['top'] == predictor.feature_importance['top']
+    
+    def test_parallel_matches_sequential(self, trained_predictor):
+        """Test reparto de columnas entre workers sin efecto en el resultado"""
+        predictor, history = trained_predictor
+        
+        sequential = PermutationImportanceJob(predictor, n_repeats=2, n_jobs=1).run()
+        parallel = PermutationImportanceJob(predictor, n_repeats=2, n_jobs=3).run()
+        
+        for name, scores in sequential['importances'].items():
+            assert scores['mean'] == pytest.approx(parallel['importances'][name]['mean'])
+        assert len(parallel['importances']) == len(predictor.feature_names)
+    
+    def test_permutation_replaces_served_top(self, trained_predictor, tmp_path):
+        """Test el resultado de permutación pasa a ser el top servido y sobrevive a la recarga"""
+        predictor, history = trained_predictor
+        
+        result = PermutationImportanceJob(predictor, n_repeats=2, n_jobs=1).run()
+        
+        best = max(result['importances'], key=lambda name: result['importances'][name]['mean'])
+        assert next(iter(predictor.feature_importance['top'])) == best
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        reloaded.load_models()
+        assert reloaded.feature_importance['permutation']['baseline_mae'] == pytest.approx(result['baseline_mae'])
+    
+    def test_permutes_saved_training_holdout(self, trained_predictor, tmp_path):
+        """Test se permutan exactamente las filas de evaluación del entrenamiento, también tras recargar"""
+        predictor, history = trained_predictor
+        
+        result = PermutationImportanceJob(predictor, n_repeats=2, n_jobs=1).run()
+        
+        assert result['samples'] == predictor.performance_metrics['test_samples']
+        reloaded = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        reloaded.load_models()
+        np.testing.assert_array_equal(reloaded.holdout['X'], predictor.holdout['X'])
+        again = PermutationImportanceJob(reloaded, n_repeats=2, n_jobs=1).run()
+        assert again['baseline_mae'] == pytest.approx(result['baseline_mae'])
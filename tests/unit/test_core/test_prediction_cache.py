@@ -0,0 +1,34 @@
+# tests/unit/test_core/test_prediction_cache.py
+import pytest
+from app.core.prediction_cache import PredictionCache
+
+class TestPredictionCache:
+    
+    def test_hit_and_miss(self):
+        """Test aciertos por (tick, versión, horizonte)"""
+        cache = PredictionCache()
+        cache.put("t1", "v1", 6, {"predicted_resonance": 0.4})
+        
+        assert cache.get("t1", "v1", 6) == {"predicted_resonance": 0.4}
+        assert cache.get("t1", "v1", 24) is None
+        assert cache.get("t1", "v2", 6) is None
+        assert cache.get_stats()["hits"] == 1
+    
+    def test_new_tick_and_model_swap_invalidate(self):
+        """Test invalidación con nuevo tick y con nuevo modelo"""
+        cache = PredictionCache()
+        cache.put("t1", "v1", 6, {"predicted_resonance": 0.4})
+        cache.on_new_tick("t2")
+        assert cache.get("t1", "v1", 6) is None
+        
+        cache.put("t2", "v1", 6, {"predicted_resonance": 0.5})
+        cache.put("t2", "v2", 6, {"predicted_resonance": 0.6})
+        assert cache.get("t2", "v1", 6) is None
+        assert cache.get_stats()["entries"] == 1
+    
+    def test_errors_are_not_cached(self):
+        """Test respuestas de error no se cachean"""
+        cache = PredictionCache()
+        cache.put("t1", "v1", 6, {"error": "Modelos no entrenados"})
+        
+        assert cache.get("t1", "v1", 6) is None
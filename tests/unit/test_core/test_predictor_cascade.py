@@ -0,0 +1,63 @@
+# tests/unit/test_core/test_predictor_cascade.py
+import pytest
+from app.core.prediction_cache import PredictionCache
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.predictor_cascade import PredictorCascade
+
+@pytest.fixture
+def trained_predictor(tmp_path, synthetic_history):
+    history = synthetic_history(120)
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+    predictor.train_advanced_models(history)
+    return predictor, history
+
+class TestPredictorCascade:
+    
+    def test_untrained_falls_back_to_simple(self, tmp_path, synthetic_history):
+        """Test sin modelos entrenados responde el motor simple"""
+        history = synthetic_history(30)
+        cascade = PredictorCascade(AdvancedHelioBioPredictor(model_path=str(tmp_path)), PredictionCache())
+        
+        prediction, tier = cascade.predict(history[-1], history, 6, latency_budget_ms=5)
+        
+        assert tier == 'simple'
+        assert 0.0 <= prediction['predicted_resonance'] <= 1.0
+        assert prediction['confidence'] <= AdvancedHelioBioPredictor.BASELINE_MAX_CONFIDENCE
+        again, _ = cascade.predict(history[-1], history, 6, latency_budget_ms=5)
+        assert {**again, 'timestamp': None} == {**prediction, 'timestamp': None}
+    
+    def test_unbounded_uses_full_then_cache(self, trained_predictor):
+        """Test sin presupuesto responde el ensemble completo y luego la caché"""
+        predictor, history = trained_predictor
+        cascade = PredictorCascade(predictor, PredictionCache())
+        
+        first, first_tier = cascade.predict(history[-1], history, 6)
+        second, second_tier = cascade.predict(history[-1], history, 6, latency_budget_ms=0.001)
+        
+        assert (first_tier, second_tier) == ('full', 'cache')
+        assert second is first
+    
+    def test_tight_budget_uses_compact_tier(self, trained_predictor):
+        """Test presupuesto ajustado responde el modelo compacto y el cambio de modelo reinicia mediciones"""
+        predictor, history = trained_predictor
+        cascade = PredictorCascade(predictor, PredictionCache())
+        for _ in range(5):
+            cascade.record_latency('full', 100.0)
+        
+        prediction, tier = cascade.predict(history[-1], history, 6, latency_budget_ms=20)
+        
+        assert tier == 'compact'
+        assert prediction['model'] in predictor.compiled_models or prediction['model'] == 'poly_ridge'
+        predictor.model_version = "new-version"
+        assert cascade.predict(history[-1], history, 6, latency_budget_ms=60)[1] == 'full'
+    
+    def test_all_tiers_return_same_keys(self, trained_predictor):
+        """Test ensemble, modelo compacto y tendencia responden con las mismas claves y horizontes"""
+        predictor, history = trained_predictor
+        cascade = PredictorCascade(predictor, PredictionCache())
+        
+        responses = {tier: cascade._run_tier(tier, history[-1], history, 6) for tier in ('full', 'compact', 'simple')}
+        
+        assert set(responses['compact']) == set(responses['full']) == set(responses['simple'])
+        for response in responses.values():
+            assert set(response['horizon_predictions']) == {'1_hour', '3_hour', '6_hour'}
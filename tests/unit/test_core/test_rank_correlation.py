@@ -0,0 +1,73 @@
+# tests/unit/test_core/test_rank_correlation.py
+import numpy as np
+from scipy.stats import spearmanr
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.rank_correlation import OrderStatisticTree, SlidingSpearmanMatrix
+
+class TestSlidingSpearman:
+
+    def test_order_statistic_tree_ranks(self):
+        """Test inserciones, borrados y rangos coinciden con una lista ordenada"""
+        rng = np.random.default_rng(0)
+        tree, reference = OrderStatisticTree(), []
+        keys = [(float(v), i) for i, v in enumerate(rng.integers(0, 20, size=300))]
+
+        for key in keys:
+            tree.insert(key)
+            reference.append(key)
+        for key in keys[::3]:
+            tree.remove(key)
+            reference.remove(key)
+
+        reference.sort()
+        assert len(tree) == len(reference)
+        assert tree.in_order() == reference
+        assert tree.rank((10.0, -1)) == sum(value < 10.0 for value, _ in reference)
+
+    def test_sliding_window_matches_scipy_with_ties(self):
+        """Test la matriz por ventana coincide con Spearman recalculado desde cero (con empates)"""
+        rng = np.random.default_rng(1)
+        matrix = SlidingSpearmanMatrix(windows={"daily": 1, "weekly": 7},
+                                       solar_metrics=['sunspot_number', 'flare_activity'],
+                                       social_metrics=['conflict_metric'])
+        values = np.round(rng.normal(size=(24 * 10, 3)), 1)
+        values[:, 2] += values[:, 0]
+
+        for hour, row in enumerate(values):
+            assert matrix.update_values(hour * 3600.0, row)
+        assert not matrix.update_values(0.0, values[0])
+
+        for window, hours in (("daily", 24), ("weekly", 24 * 7)):
+            assert matrix.observations(window) == hours
+            expected = spearmanr(values[-hours:]).correlation[:2, 2:]
+            np.testing.assert_allclose(matrix.correlation(window), expected, atol=1e-12)
+
+    def test_report_and_percentile(self, synthetic_history):
+        """Test el informe por ventana y el percentil del último valor en O(log n)"""
+        history = synthetic_history(48)
+        matrix = SlidingSpearmanMatrix()
+
+        assert matrix.warm_start(history) == 48
+        report = matrix.get_matrix('daily')
+        latest = history[-1]['solar']['sunspot_number']
+        sunspots = [p['solar']['sunspot_number'] for p in history[-24:]]
+
+        assert report['ready'] and report['observations'] == 24
+        assert set(report['correlations']['sunspot_number']) == set(matrix.social_metrics)
+        assert matrix.percentile('daily', 'sunspot_number', latest) == sum(s < latest for s in sunspots) / 24
+
+    def test_warm_start_from_store_matches_tick_updates(self, tmp_path, synthetic_history):
+        """Test el arranque desde el log crudo del store deja las mismas ventanas que update() tick a tick"""
+        history = synthetic_history(150)
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        incremental, warmed = SlidingSpearmanMatrix(), SlidingSpearmanMatrix()
+        for point in history:
+            store.append_tick(point)
+            incremental.update(point)
+
+        assert warmed.warm_start([], store) == len(history)
+        for window in ('daily', 'weekly'):
+            assert warmed.observations(window) == incremental.observations(window)
+            np.testing.assert_allclose(warmed.correlation(window), incremental.correlation(window), atol=1e-12)
@@ -0,0 +1,81 @@
+# tests/unit/test_core/test_resonance.py
+import numpy as np
+import pytest
+from datetime import datetime
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.resonance import (
+    RESONANCE_METRICS, apply_resonance, resolve_weights, resonance_columns, resonance_score, what_if
+)
+from app.core.time_series import history_columns, iso_to_epoch
+
+ALTERNATIVE = {"solar_intensity": 0.4, "geomagnetic_impact": 0.1}
+
+class TestResonance:
+
+    def test_columns_match_tick_formula(self, synthetic_history):
+        """Test la fórmula por columnas reproduce la resonancia guardada tick a tick"""
+        history = synthetic_history(100)
+        _, columns = history_columns(history, RESONANCE_METRICS)
+
+        np.testing.assert_allclose(resonance_columns(columns), [p['resonance'] for p in history])
+        assert resonance_score(history[0]['solar'], history[0]['social']) == pytest.approx(history[0]['resonance'])
+        recomputed = apply_resonance([dict(p) for p in history], ALTERNATIVE)
+        np.testing.assert_allclose([p['resonance'] for p in recomputed], resonance_columns(columns, ALTERNATIVE))
+        with pytest.raises(ValueError):
+            resolve_weights({"lunar_phase": 0.1})
+
+    def test_new_weights_version_and_backfill_store(self, tmp_path, synthetic_history):
+        """Test pesos distintos crean otra versión cuyo backfill recalcula la resonancia del log"""
+        history = synthetic_history(80)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+
+        assert FeatureStore(predictor, base_path=str(tmp_path / "store")).definition_hash == store.definition_hash
+        reweighted = FeatureStore(predictor, base_path=str(tmp_path / "store"), resonance_weights=ALTERNATIVE)
+        assert reweighted.needs_backfill and reweighted.definition_hash != store.definition_hash
+
+        reweighted.backfill(chunk_size=7)
+        _, columns = history_columns(history, RESONANCE_METRICS)
+        _, _, resonance, _ = reweighted.load_matrix()
+        np.testing.assert_allclose(resonance, resonance_columns(columns, ALTERNATIVE)[-reweighted.n_rows:])
+        _, _, original, _ = store.load_matrix()
+        np.testing.assert_allclose(original, [p['resonance'] for p in history[-store.n_rows:]])
+
+    def test_what_if_over_raw_log_range(self, tmp_path, synthetic_history):
+        """Test what-if sobre un rango del log crudo sin modificar el almacén"""
+        history = synthetic_history(80)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+        store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+        stored = np.array(store.load_matrix()[2])
+
+        start = datetime.fromisoformat(history[10]['timestamp']).timestamp()
+        end = datetime.fromisoformat(history[49]['timestamp']).timestamp()
+        timestamps, columns = store.raw_columns(RESONANCE_METRICS, start, end, chunk_size=9)
+        same = what_if(timestamps, columns, {})
+        changed = what_if(timestamps, columns, ALTERNATIVE)
+
+        assert len(timestamps) == 40 and timestamps[0] == start and timestamps[-1] == end
+        assert same['mean_delta'] == 0 and same['level_changes'] == 0 and same['correlation'] == 1.0
+        assert changed['weights']['solar_intensity'] == 0.4 and changed['weights']['social_tension'] == 0.25
+        assert sum(changed['alternative']['levels'].values()) == 40 and changed['max_abs_delta'] > 0
+        np.testing.assert_array_equal(store.load_matrix()[2], stored)
+
+    def test_naive_range_bounds_are_utc(self, synthetic_history, monkeypatch):
+        """Test una fecha sin zona horaria se lee como UTC (igual que los ticks) sea cual sea la zona local"""
+        import time
+        timestamp = synthetic_history(5)[3]['timestamp']
+        monkeypatch.setenv('TZ', 'America/New_York')
+        time.tzset()
+        try:
+            expected = datetime.fromisoformat(timestamp).timestamp()
+            assert iso_to_epoch(timestamp) == expected
+            assert iso_to_epoch(timestamp[:19]) == expected
+            assert iso_to_epoch(timestamp[:19] + 'Z') == expected
+        finally:
+            monkeypatch.undo()
+            time.tzset()
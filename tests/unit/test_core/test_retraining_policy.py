@@ -0,0 +1,85 @@
+# tests/unit/test_core/test_retraining_policy.py
+import pytest
+import numpy as np
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+
+@pytest.fixture
+def trained_predictor(tmp_path, synthetic_history):
+    history = synthetic_history(200)
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+    predictor.train_advanced_models(history[:180])
+    return predictor, history
+
+class TestRetrainingPolicy:
+    
+    def test_unchanged_window_is_skipped(self, trained_predictor):
+        """Test misma ventana de entrenamiento: no se re-entrena ni cambia la versión"""
+        predictor, history = trained_predictor
+        version = predictor.model_version
+        
+        result = predictor.train_advanced_models(history[:180], refit='auto')
+        
+        assert result['skipped'] and result['training_action'] == 'skip'
+        assert predictor.model_version == version
+    
+    def test_few_new_rows_warm_start(self, trained_predictor):
+        """Test pocas filas nuevas: se añaden árboles y etapas en lugar de re-entrenar"""
+        predictor, history = trained_predictor
+        predictor.retraining_policy.drift_ratio = float('inf')
+        rf_trees = predictor.models['random_forest_advanced'].n_estimators
+        gb_stages = predictor.models['gradient_boosting'].n_estimators
+        
+        metrics = predictor.train_advanced_models(history[:190], refit='auto')
+        
+        assert metrics['training_action'] == 'warm_start'
+        assert rf_trees < predictor.models['random_forest_advanced'].n_estimators < 2 * rf_trees
+        assert predictor.models['gradient_boosting'].n_estimators > gb_stages
+        assert len(predictor.models['random_forest_advanced'].estimators_) == predictor.models['random_forest_advanced'].n_estimators
+        assert predictor.training_state['warm_starts_since_full'] == 1
+    
+    def test_schedule_and_new_fraction_force_full_refit(self, trained_predictor):
+        """Test refit completo por calendario y por exceso de filas nuevas"""
+        predictor, history = trained_predictor
+        predictor.retraining_policy.drift_ratio = float('inf')
+        
+        predictor.retraining_policy.max_new_fraction = 0.01
+        assert predictor.train_advanced_models(history[:190], refit='auto')['training_action'] == 'full'
+        
+        predictor.retraining_policy.max_new_fraction = 0.5
+        predictor.retraining_policy.full_refit_every_hours = 0
+        metrics = predictor.train_advanced_models(history, refit='auto')
+        assert metrics['training_action'] == 'full'
+        assert metrics['training_reason'] == "refit completo programado"
+    
+    def test_training_does_not_touch_served_models(self, trained_predictor):
+        """Test el entrenamiento ajusta copias y publica de una vez: los objetos servidos no cambian"""
+        predictor, history = trained_predictor
+        predictor.retraining_policy.drift_ratio = float('inf')
+        served_models, served_scaler = predictor.models, predictor.scalers['advanced']
+        served_forest = served_models['random_forest_advanced']
+        rf_trees = served_forest.n_estimators
+        
+        metrics = predictor.train_advanced_models(history[:190], refit='auto')
+        
+        assert metrics['training_action'] == 'warm_start'
+        assert served_forest.n_estimators == rf_trees == len(served_forest.estimators_)
+        assert predictor.models is not served_models
+        assert predictor.models['random_forest_advanced'] is not served_forest
+        
+        predictor.train_advanced_models(history, refit='full')
+        assert predictor.scalers['advanced'] is not served_scaler
+        assert served_models['random_forest_advanced'] is served_forest
+    
+    def test_warm_start_holds_out_unseen_rows(self, trained_predictor):
+        """Test warm-start: incremento sobre filas nuevas y repaso, holdout posterior a ambas"""
+        predictor, history = trained_predictor
+        predictor.retraining_policy.drift_ratio = float('inf')
+        previous = predictor.training_state
+        
+        assert predictor.retraining_policy.warm_start_split(np.arange(100.0), 79.0) == (65, 95)
+        metrics = predictor.train_advanced_models(history[:190], refit='auto')
+        
+        state = predictor.training_state
+        assert metrics['training_action'] == 'warm_start'
+        assert previous['fitted_until'] < state['fitted_until'] < state['last_timestamp']
+        assert metrics['test_samples'] >= predictor.retraining_policy.min_holdout_rows
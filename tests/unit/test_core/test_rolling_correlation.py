@@ -0,0 +1,78 @@
+# tests/unit/test_core/test_rolling_correlation.py
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.rolling_correlation import RollingCorrelationMatrix
+from app.core.time_series import history_columns
+
+class TestRollingCorrelationMatrix:
+
+    def test_incremental_updates_match_vectorized_replay(self, synthetic_history):
+        """Test las actualizaciones tick a tick coinciden con la reconstrucción vectorizada"""
+        history = synthetic_history(200)
+        incremental, replayed = RollingCorrelationMatrix(), RollingCorrelationMatrix()
+
+        for point in history:
+            assert incremental.update(point)
+        metrics = replayed.solar_metrics + replayed.social_metrics
+        replayed.replay(*history_columns(history, metrics))
+
+        assert not incremental.update(history[-1])  # tick repetido
+        for window in incremental.window_names:
+            np.testing.assert_allclose(incremental.correlation(window), replayed.correlation(window), atol=1e-9)
+            assert abs(incremental.effective_samples(window) - replayed.effective_samples(window)) < 1e-6
+
+    def test_short_window_tracks_regime_change(self):
+        """Test la ventana diaria sigue un cambio de signo que la mensual todavía promedia"""
+        rng = np.random.default_rng(3)
+        matrix = RollingCorrelationMatrix(solar_metrics=['sunspot_number'], social_metrics=['conflict_metric'])
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        for hour in range(24 * 20):
+            solar = rng.normal()
+            sign = 1.0 if hour < 24 * 18 else -1.0
+            matrix.update({
+                'timestamp': (start + timedelta(hours=hour)).isoformat(),
+                'solar': {'sunspot_number': solar},
+                'social': {'conflict_metric': sign * solar + 0.2 * rng.normal()}
+            })
+
+        assert matrix.correlation('daily')[0, 0] < -0.5
+        assert matrix.correlation('monthly')[0, 0] > 0.3
+        assert matrix.effective_samples('daily') < matrix.effective_samples('monthly')
+
+    def test_matrix_report_and_strongest_pair(self, synthetic_history):
+        """Test informe por ventana con confianza y par más fuerte solo tras el calentamiento"""
+        history = synthetic_history(60)
+        matrix = RollingCorrelationMatrix(min_observations=20)
+
+        for point in history[:5]:
+            matrix.update(point)
+        assert matrix.strongest_pair('daily') is None
+
+        for point in history[5:]:
+            matrix.update(point)
+        report = matrix.get_matrix('weekly')
+        strongest = report['strongest_pair']
+
+        assert report['ready'] and report['window_days'] == 7
+        assert set(report['correlations']) == set(matrix.solar_metrics)
+        assert abs(strongest['correlation']) == max(
+            abs(r) for row in report['correlations'].values() for r in row.values()
+        )
+        assert 0.0 <= strongest['confidence'] <= 1.0
+
+    def test_warm_start_from_store_matches_tick_updates(self, tmp_path, synthetic_history):
+        """Test el arranque desde el log crudo del store deja el mismo estado que update() tick a tick"""
+        history = synthetic_history(150)
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        incremental, warmed = RollingCorrelationMatrix(), RollingCorrelationMatrix()
+        for point in history:
+            store.append_tick(point)
+            incremental.update(point)
+
+        assert warmed.warm_start([], store) == len(history)
+        for window in incremental.window_names:
+            np.testing.assert_allclose(warmed.correlation(window), incremental.correlation(window), atol=1e-9)
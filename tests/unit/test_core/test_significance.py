@@ -0,0 +1,69 @@
+# tests/unit/test_core/test_significance.py
+import numpy as np
+from scipy.signal import lfilter
+from app.core import significance
+from app.core.significance import (
+    SignificanceEngine, block_bootstrap_surrogates, phase_randomized_surrogates
+)
+from app.core.time_series import load_metric_series
+
+def _red_noise(n: int, rng: np.random.Generator) -> np.ndarray:
+    return lfilter([1.0], [1.0, -0.9], rng.normal(size=n))
+
+class TestSignificance:
+
+    def test_surrogates_preserve_structure(self):
+        """Test las fases aleatorias conservan el espectro y el bootstrap reutiliza bloques de la serie"""
+        rng = np.random.default_rng(0)
+        y = _red_noise(1000, rng)
+
+        phase = phase_randomized_surrogates(y, 8, rng)
+        block = block_bootstrap_surrogates(y, 8, 24, rng)
+
+        np.testing.assert_allclose(np.abs(np.fft.rfft(phase, axis=1)), np.abs(np.fft.rfft(y))[None, :].repeat(8, 0),
+                                   rtol=1e-8, atol=1e-8)
+        assert block.shape == (8, 1000) and np.isin(block, y).all()
+        start = int(np.flatnonzero(y == block[0, 0])[0])
+        np.testing.assert_array_equal(block[0, :24], np.roll(y, -start)[:24])
+
+    def test_detects_coupling_and_is_deterministic(self):
+        """Test el acoplamiento real es significativo, el independiente no, y el resultado no depende de n_jobs"""
+        rng = np.random.default_rng(1)
+        x, noise = _red_noise(2000, rng), _red_noise(2000, rng)
+
+        engine = SignificanceEngine(n_surrogates=199, batch_size=50, n_jobs=1)
+        coupled = engine.test(x, noise + 0.8 * x, "pearson", "phase")
+        independent = engine.test(x, noise, "spearman", "block")
+
+        assert coupled['significant'] and coupled['p_value'] == 1 / 200
+        assert not independent['significant']
+        assert independent['null_percentiles']['p2.5'] < 0 < independent['null_percentiles']['p97.5']
+        assert SignificanceEngine(n_surrogates=199, batch_size=50, n_jobs=2).test(
+            x, noise, "spearman", "block") == independent
+
+    def test_run_on_history_with_cache(self, synthetic_history):
+        """Test el historial se remuestrea por hora, se cachea y un estadístico desconocido falla"""
+        history = synthetic_history(200)
+        engine = SignificanceEngine(n_surrogates=50, n_jobs=1)
+
+        result = engine.run(history, solar_metric='sunspot_number', social_metric='engagement_intensity',
+                            statistic='max_lag')
+
+        assert result['n_points'] == 200 and result['source'] == 'memory'
+        assert 0 < result['p_value'] <= 1 and result['observed'] > 0.5
+        assert engine.run(history, solar_metric='sunspot_number', social_metric='engagement_intensity',
+                          statistic='max_lag') is result
+        assert 'error' in engine.run(history, statistic='kendall')
+
+    def test_cache_lookup_precedes_loading(self, synthetic_history, monkeypatch):
+        """Test un acierto de caché no vuelve a cargar las series; otra ventana sí"""
+        history = synthetic_history(200)
+        engine = SignificanceEngine(n_surrogates=20, n_jobs=1)
+        loads = []
+        monkeypatch.setattr(significance, 'load_metric_series',
+                            lambda *args: loads.append(1) or load_metric_series(*args))
+
+        result = engine.run(history)
+
+        assert engine.run(history) is result and len(loads) == 1
+        assert engine.run(history, window_hours=100) is not result and len(loads) == 2
@@ -0,0 +1,64 @@
+# tests/unit/test_core/test_solar_cycle.py
+import numpy as np
+from datetime import datetime
+from app.core.chizhevsky_engine import ChizhevskyEngine
+from app.core.solar_cycle import SolarCyclePhaseDetector
+from app.services.real_solar_service import RealSolarService
+
+def _daily_cycle(years: int = 30, seed: int = 0):
+    """Manchas diarias desde 1990 con un ciclo de 11 años (mínimo en 1990-01) y ruido"""
+    rng = np.random.default_rng(seed)
+    days = np.arange(int(years * 365.25))
+    sunspots = 80 * (1 - np.cos(2 * np.pi * days / (11 * 365.25))) + rng.normal(0, 20, len(days))
+    return (days + 7305) * 86400.0 + 43200, np.maximum(sunspots, 0)
+
+class TestSolarCyclePhase:
+
+    def test_smoothed_series_and_phases(self):
+        """Test el suavizado de 13 meses coincide con la convolución SIDC y las fases siguen el ciclo"""
+        timestamps, sunspots = _daily_cycle()
+        detector = SolarCyclePhaseDetector()
+        phases = {}
+        for timestamp, value in zip(timestamps, sunspots):
+            if detector.update(timestamp, value) and detector.ready:
+                phases[detector.get_phase()['smoothed_month']] = detector.phase
+
+        monthly = np.array(detector._monthly)
+        expected = np.convolve(monthly, np.r_[0.5, np.ones(11), 0.5] / 12, mode='valid')[-1]
+        assert np.isclose(detector._smoothed[-1], expected)
+        assert phases['1990-09'] == 'minimum' and phases['1993-01'] == 'ascending'
+        assert phases['1995-06'] == 'maximum' and phases['1998-01'] == 'descending'
+        assert phases['2014-06'] == 'ascending' and phases['2017-06'] == 'maximum'
+
+    def test_bulk_ingest_matches_updates_and_caches(self):
+        """Test la carga en bloque deja el mismo estado y la fase solo se recalcula al cerrar un mes"""
+        timestamps, sunspots = _daily_cycle(years=4)
+        incremental, bulk = SolarCyclePhaseDetector(), SolarCyclePhaseDetector()
+        for timestamp, value in zip(timestamps[:-40], sunspots[:-40]):
+            incremental.update(timestamp, value)
+
+        assert bulk.ingest(timestamps[:-40], sunspots[:-40]) == len(timestamps) - 40
+        np.testing.assert_allclose(list(bulk._smoothed), list(incremental._smoothed))
+        report = bulk.get_phase()
+        assert report == incremental.get_phase() and report['cycle_progress'] is None
+
+        same_day = [bulk.update(timestamps[-40] + hour * 3600, 500.0) for hour in range(3)]
+        assert same_day == [False, False, False] and bulk.get_phase() is report
+        assert bulk.ingest(timestamps[-40:], sunspots[-40:]) > 0 and bulk.get_phase() is not report
+
+    def test_drives_engine_and_solar_service(self):
+        """Test el motor y el servicio solar usan la fase detectada en lugar de la manual o del calendario"""
+        timestamps, sunspots = _daily_cycle(years=6)
+        detector = SolarCyclePhaseDetector()
+        engine = ChizhevskyEngine(None, None, cycle_detector=detector)
+        service = RealSolarService(detector)
+        engine.solar_cycle_phase = "minimum"
+
+        assert engine.solar_cycle_phase == "minimum"
+        detector.ingest(timestamps, sunspots)
+
+        phase = detector.phase
+        assert phase in ("maximum", "descending") and engine.solar_cycle_phase == phase
+        expected = 0.5 * (1.8 if phase == "maximum" else 1.1)
+        assert engine._calculate_collective_excitability({"overall_resonance": 0.5}) == expected
+        assert service._get_current_cycle_data(datetime(2024, 6, 1))['phase'] == phase
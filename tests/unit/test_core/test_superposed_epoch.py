@@ -0,0 +1,95 @@
+# tests/unit/test_core/test_superposed_epoch.py
+import numpy as np
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.superposed_epoch import SuperposedEpochAnalyzer, event_onsets, parse_event_times
+
+def _planted_response(n_hours: int = 24 * 365, n_events: int = 60, seed: int = 3):
+    """Conflicto que sube 12-36 h después de cada evento; el resto de métricas es ruido"""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(n_hours) * 3600.0
+    events = np.sort(rng.choice(np.arange(100, n_hours - 200), size=n_events, replace=False))
+    columns = {metric: rng.normal(size=n_hours) for metric in ('conflict_metric', 'engagement_intensity')}
+    for event in events:
+        columns['conflict_metric'][event + 12:event + 37] += 1.0
+    return timestamps, columns, timestamps[events]
+
+class TestSuperposedEpoch:
+
+    def test_detects_planted_response(self):
+        """Test la respuesta plantada aparece en la curva media y la métrica independiente no"""
+        timestamps, columns, events = _planted_response()
+        analyzer = SuperposedEpochAnalyzer(before_hours=48, after_hours=72,
+                                           metrics=['conflict_metric', 'engagement_intensity'])
+
+        result = analyzer.composite(timestamps, columns, events)
+        conflict = result['curves']['conflict_metric']
+
+        assert result['n_events'] == 60 and len(result['offsets_hours']) == 48 + 72 + 1
+        assert 12 <= conflict['peak_offset_hours'] <= 36 and conflict['peak_anomaly'] > 0.5
+        assert conflict['post_event_p_value'] < 1e-3
+        assert result['curves']['engagement_intensity']['post_event_p_value'] > 1e-3
+        assert all(lo <= m <= hi for lo, m, hi in zip(conflict['ci_low'], conflict['mean'], conflict['ci_high']))
+
+    def test_onsets_are_rising_edges(self):
+        """Test solo cuenta el cruce del umbral, separado al menos min_separation"""
+        timestamps = np.arange(12) * 3600.0
+        values = np.array([0, 4, 4, 0, 4, 0, 0, 0, 0, 0, 4, 4])
+
+        assert event_onsets(timestamps, values, 4.0, min_separation_hours=0).tolist() == [3600.0, 14400.0, 36000.0]
+        assert event_onsets(timestamps, values, 4.0, min_separation_hours=5).tolist() == [3600.0, 36000.0]
+        # Eventos ISO sin zona horaria: UTC, como los ticks
+        assert parse_event_times(['2024-01-01T12:15', '2024-01-01T11:00Z', 0]).tolist() == [
+            0.0, 1704106800.0, 1704111300.0]
+        # Cruces cada 2 h: la separación se mide frente al último evento aceptado
+        assert event_onsets(timestamps, np.arange(12) % 2 * 4, 4.0, min_separation_hours=3).tolist() == [
+            3600.0, 5 * 3600.0, 9 * 3600.0]
+
+    def test_run_with_explicit_events_and_cache(self, synthetic_history):
+        """Test eventos ISO explícitos, ventanas incompletas descartadas y resultado cacheado"""
+        history = synthetic_history(200)
+        analyzer = SuperposedEpochAnalyzer(before_hours=6, after_hours=12)
+        events = [history[i]['timestamp'] for i in (2, 50, 100, 150, 195)]
+
+        result = analyzer.run(history, events=events)
+
+        assert result['event_filter'] == 'explicit' and result['source'] == 'memory'
+        assert result['events_found'] == 5 and result['n_events'] == 3 and result['events_dropped'] == 2
+        assert analyzer.run(history, events=events) is result
+        assert 'error' in analyzer.run(history, preset='unknown')
+
+    def test_short_storms_detected_on_raw_ticks(self, tmp_path, synthetic_history):
+        """Test tormentas de un solo tick del log crudo detectadas en su instante (la media de 5 ticks no llega al umbral)"""
+        history = synthetic_history(300)
+        spikes = (40, 100, 160, 220)
+        for i, tick in enumerate(history):
+            tick['solar']['geomagnetic_storm'] = 3 if i in spikes else 0
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        for tick in history:
+            store.append_tick(tick)
+        analyzer = SuperposedEpochAnalyzer(before_hours=6, after_hours=12)
+
+        result = analyzer.run(history[-20:], store, preset='kp7_storms')
+
+        assert result['source'] == 'raw_log'
+        assert result['events_found'] == result['n_events'] == len(spikes)
+        assert store.column('geomag_mean').max() < 3
+
+    def test_preset_cache_hit_skips_log(self, tmp_path, synthetic_history, monkeypatch):
+        """Test repetir un preset sobre el store no vuelve a leer el log crudo; un tick nuevo sí"""
+        history = synthetic_history(300)
+        store = FeatureStore(AdvancedHelioBioPredictor(model_path=str(tmp_path / "models")),
+                             base_path=str(tmp_path / "store"))
+        for tick in history[:-1]:
+            store.append_tick(tick)
+        reads = []
+        raw_columns = store.raw_columns
+        monkeypatch.setattr(store, 'raw_columns', lambda *args, **kwargs: reads.append(1) or raw_columns(*args, **kwargs))
+        analyzer = SuperposedEpochAnalyzer(before_hours=6, after_hours=12)
+
+        result = analyzer.run(history[-20:-1], store, preset='kp7_storms')
+        assert analyzer.run(history[-20:-1], store, preset='kp7_storms') is result and len(reads) == 1
+
+        store.append_tick(history[-1])
+        assert analyzer.run(history[-20:], store, preset='kp7_storms') is not result and len(reads) == 2
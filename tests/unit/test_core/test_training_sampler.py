@@ -0,0 +1,70 @@
+# tests/unit/test_core/test_training_sampler.py
+import pytest
+import numpy as np
+from app.core.feature_store import FeatureStore
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.training_sampler import TrainingSampler
+
+def _store_with_history(tmp_path, history):
+    predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path / "models"))
+    store = FeatureStore(predictor, base_path=str(tmp_path / "store"))
+    predictor.feature_store = store
+    for tick in history:
+        store.append_tick(tick)
+    return predictor, store
+
+class TestTrainingSampler:
+    
+    def test_budget_recent_window_and_storm_oversampling(self, tmp_path, synthetic_history):
+        """Test presupuesto fijo, ventana reciente completa y tormentas sobremuestreadas"""
+        _, store = _store_with_history(tmp_path, synthetic_history(400))
+        sampler = TrainingSampler(store, row_budget=100, recent_fraction=0.5, storm_fraction=0.2)
+        
+        rows = sampler.sample_indices()
+        
+        assert len(rows) <= 100
+        assert np.all(np.diff(rows) >= 0)
+        np.testing.assert_array_equal(rows[-50:], np.arange(store.n_rows - 51, store.n_rows - 1))
+        storm_rows = np.array(sampler.state['storms'])
+        assert len(storm_rows) > 0 and np.all(sampler._storm_mask(0, store.n_rows)[storm_rows])
+    
+    def test_rows_in_both_reservoirs_sampled_once(self, tmp_path, synthetic_history):
+        """Test una tormenta que también está en el reservorio uniforme no se duplica en la muestra"""
+        _, store = _store_with_history(tmp_path, synthetic_history(400))
+        # Todas las filas son tormenta: ambos reservorios muestrean la misma población
+        sampler = TrainingSampler(store, row_budget=200, recent_fraction=0.25, storm_fraction=0.35,
+                                  storm_resonance=0.0)
+        
+        rows = sampler.sample_indices()
+        
+        overlap = set(sampler.state['storms']) & set(sampler.state['reservoir'])
+        assert overlap
+        assert np.all(np.diff(rows) > 0)
+        assert len(rows) == 50 + len(set(sampler.state['storms']) | set(sampler.state['reservoir']))
+    
+    def test_incremental_update_matches_single_pass(self, tmp_path, synthetic_history):
+        """Test la actualización incremental solo procesa filas nuevas y el estado persiste"""
+        history = synthetic_history(400)
+        _, store = _store_with_history(tmp_path, history[:250])
+        sampler = TrainingSampler(store, row_budget=100)
+        sampler.update()
+        consumed = sampler.state['next_row']
+        
+        for tick in history[250:]:
+            store.append_tick(tick)
+        reopened = TrainingSampler(store, row_budget=100)
+        
+        assert reopened.state['next_row'] == consumed
+        assert reopened.update() == store.n_rows - 1 - reopened.recent_capacity - consumed
+        assert reopened.state['reservoir_seen'] == reopened.state['next_row']
+    
+    def test_training_uses_bounded_sample(self, tmp_path, synthetic_history):
+        """Test el entrenamiento lee solo las filas muestreadas cuando el store supera el presupuesto"""
+        predictor, store = _store_with_history(tmp_path, synthetic_history(400))
+        predictor.training_sampler = TrainingSampler(store, row_budget=120)
+        
+        metrics = predictor.train_advanced_models(synthetic_history(400)[-50:])
+        
+        assert 'error' not in metrics
+        total = metrics['test_samples'] + predictor.training_history[-1]['train_samples']
+        assert total <= 120
@@ -0,0 +1,47 @@
+# tests/unit/test_core/test_tree_compiler.py
+import pytest
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from app.core.tree_compiler import CompiledTreeEnsemble, compile_tree_ensemble
+
+@pytest.fixture
+def regression_data():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 8))
+    y = X[:, 0] + np.sin(3 * X[:, 1]) + 0.1 * rng.normal(size=300)
+    return X, y, rng.normal(size=(200, 8))
+
+class TestTreeCompiler:
+    
+    def test_random_forest_parity(self, regression_data):
+        """Test paridad con sklearn para Random Forest"""
+        X, y, X_new = regression_data
+        model = RandomForestRegressor(n_estimators=30, max_depth=8, random_state=42).fit(X, y)
+        
+        compiled = compile_tree_ensemble(model)
+        
+        assert compiled.n_trees == 30
+        np.testing.assert_allclose(compiled.predict(X_new), model.predict(X_new), rtol=1e-10, atol=1e-12)
+    
+    def test_gradient_boosting_parity(self, regression_data):
+        """Test paridad con sklearn para Gradient Boosting"""
+        X, y, X_new = regression_data
+        model = GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=42).fit(X, y)
+        
+        compiled = compile_tree_ensemble(model)
+        
+        np.testing.assert_allclose(compiled.predict(X_new), model.predict(X_new), rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(compiled.predict(X_new[0]), model.predict(X_new[:1]), rtol=1e-10)
+    
+    def test_multi_output_and_roundtrip(self, regression_data, tmp_path):
+        """Test multi-salida y persistencia en .npz"""
+        X, y, X_new = regression_data
+        Y = np.column_stack([y, -y, 2 * y])
+        model = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, Y)
+        
+        compiled = compile_tree_ensemble(model)
+        compiled.save(str(tmp_path / "forest.npz"))
+        loaded = CompiledTreeEnsemble.load(str(tmp_path / "forest.npz"))
+        
+        assert loaded.predict(X_new).shape == (200, 3)
+        np.testing.assert_allclose(loaded.predict(X_new), model.predict(X_new), rtol=1e-10, atol=1e-12)
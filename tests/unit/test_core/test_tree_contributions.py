@@ -0,0 +1,53 @@
+# tests/unit/test_core/test_tree_contributions.py
+import pytest
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from app.core.model_compaction import truncate_depth
+from app.core.prediction_engine import AdvancedHelioBioPredictor
+from app.core.tree_compiler import compile_tree_ensemble
+
+@pytest.fixture
+def regression_data():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 6))
+    y = 2 * X[:, 0] + np.sin(3 * X[:, 1]) + 0.1 * rng.normal(size=300)
+    return X, y, rng.normal(size=(50, 6))
+
+class TestTreeContributions:
+    
+    def test_contributions_add_up_to_prediction(self, regression_data):
+        """Test bias + Σ contribuciones = predicción (RF, GB y variante podada)"""
+        X, y, X_new = regression_data
+        ensembles = [
+            compile_tree_ensemble(RandomForestRegressor(n_estimators=20, max_depth=6, random_state=42).fit(X, y)),
+            compile_tree_ensemble(GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=42).fit(X, y))
+        ]
+        ensembles.append(truncate_depth(ensembles[0], 3))
+        
+        for ensemble in ensembles:
+            bias, contributions = ensemble.contributions(X_new)
+            np.testing.assert_allclose(bias + contributions.sum(axis=1), ensemble.predict(X_new), atol=1e-9)
+    
+    def test_informative_features_dominate(self, regression_data):
+        """Test las features que no entran en el objetivo apenas contribuyen"""
+        X, y, X_new = regression_data
+        ensemble = compile_tree_ensemble(RandomForestRegressor(n_estimators=30, random_state=42).fit(X, y))
+        
+        _, contributions = ensemble.contributions(X_new)
+        
+        mean_abs = np.abs(contributions).mean(axis=0)
+        assert mean_abs[0] > 5 * mean_abs[2:].max()
+    
+    def test_prediction_reports_top_k_contributions(self, tmp_path, synthetic_history):
+        """Test la respuesta incluye las top-k contribuciones con signo"""
+        history = synthetic_history(120)
+        predictor = AdvancedHelioBioPredictor(model_path=str(tmp_path))
+        predictor.train_advanced_models(history)
+        
+        prediction = predictor.predict_advanced_resonance(history[-1], history)
+        
+        contributions = prediction['contributions']
+        assert 0 < len(contributions) <= predictor.explain_top_k
+        magnitudes = [abs(c['contribution']) for c in contributions]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        assert all(c['feature'] in predictor.feature_names for c in contributions)
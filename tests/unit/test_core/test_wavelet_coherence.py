@@ -0,0 +1,62 @@
+# tests/unit/test_core/test_wavelet_coherence.py
+import numpy as np
+from app.core import wavelet_coherence
+from app.core.time_series import load_metric_series
+from app.core.wavelet_coherence import WaveletCoherenceEngine
+
+def _rotation_coupled(n_days: int = 4 * 365, seed: int = 0):
+    """Series diarias que comparten una componente de 27 días bajo ruido blanco"""
+    rng = np.random.default_rng(seed)
+    rotation = np.sin(2 * np.pi * np.arange(n_days) / 27.0)
+    return rotation + rng.normal(size=n_days), np.roll(rotation, 3) + rng.normal(size=n_days), rng
+
+class TestWaveletCoherence:
+
+    def test_detects_coupling_at_rotation_period(self):
+        """Test la coherencia es significativa en la banda de 27 días y no en una serie independiente"""
+        x, y, rng = _rotation_coupled()
+        engine = WaveletCoherenceEngine(n_surrogates=39)
+
+        coupled = engine.coherence(x, y, dt_days=1.0)
+        independent = engine.coherence(x, rng.normal(size=len(x)), dt_days=1.0)
+
+        assert coupled['bands']['solar_rotation_27d']['significant']
+        assert coupled['bands']['solar_rotation_27d']['mean_coherence'] > 0.7
+        assert not independent['bands']['solar_rotation_27d']['significant']
+
+    def test_chunking_matches_single_block(self):
+        """Test procesar por bloques con solapamiento da el mismo resultado que un único bloque"""
+        x, y, _ = _rotation_coupled(n_days=2 * 365)
+
+        chunked = WaveletCoherenceEngine(chunk_size=64, n_surrogates=3).coherence(x, y, dt_days=1.0)
+        whole = WaveletCoherenceEngine(chunk_size=10 ** 6, n_surrogates=3).coherence(x, y, dt_days=1.0)
+
+        assert chunked['periods_days'] == whole['periods_days']
+        np.testing.assert_allclose(chunked['coherence'], whole['coherence'], atol=1e-4)
+
+    def test_run_caches_by_series_version(self, synthetic_history):
+        """Test el historial se remuestrea, la misma versión de la serie reutiliza el resultado y una corta falla"""
+        history = synthetic_history(200)
+        engine = WaveletCoherenceEngine(min_period_days=0.25, n_surrogates=5)
+
+        result = engine.run(history, resample_days=1 / 24)
+
+        assert result['n_points'] == 200 and result['source'] == 'memory'
+        assert len(result['periods_days']) == len(result['coherence']) == len(result['p_value'])
+        assert all(0.0 <= c <= 1.0 for c in result['coherence'])
+        assert engine.run(history, resample_days=1 / 24) is result
+        assert 'error' in engine.run(history[:5], resample_days=1 / 24)
+
+    def test_cache_lookup_precedes_loading(self, synthetic_history, monkeypatch):
+        """Test un acierto de caché no vuelve a cargar las series; otro par de métricas sí"""
+        history = synthetic_history(200)
+        engine = WaveletCoherenceEngine(min_period_days=0.25, n_surrogates=5)
+        loads = []
+        monkeypatch.setattr(wavelet_coherence, 'load_metric_series',
+                            lambda *args: loads.append(1) or load_metric_series(*args))
+
+        result = engine.run(history, resample_days=1 / 24)
+
+        assert engine.run(history, resample_days=1 / 24) is result and len(loads) == 1
+        assert engine.run(history, social_metric='engagement_intensity', resample_days=1 / 24) is not result
+        assert len(loads) == 2